@@ -8,8 +8,10 @@ import os
 from dotenv import load_dotenv
 
 from .config import config
+from . import db_pool, metrics, replica
 
-db = SQLAlchemy()
+# Read-only routes may be routed to a replica bind (see app.replica)
+db = SQLAlchemy(session_options={"class_": replica.RoutingSession})
 
 def create_app(config_name: str = "development") -> Flask:
     """Create and configure a Flask application."""
@@ -18,13 +20,24 @@ def create_app(config_name: str = "development") -> Flask:
     CORS(app)
 
     app.config.from_object(config[config_name])
-    app.config.setdefault("SESSION_TYPE", "filesystem")
-
-    Session(app)
+    app.logger.setLevel(app.config["LOG_LEVEL"])
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", db_pool.engine_options(app.config))
+    # Binds (the read replica) get the same pool settings
+    app.config["SQLALCHEMY_BINDS"] = {
+        key: {"url": url, **db_pool.engine_options(app.config, url)} if isinstance(url, str) else url
+        for key, url in app.config.get("SQLALCHEMY_BINDS", {}).items()
+    }
+
+    # Signed cookie sessions by default (see app.access); a configured
+    # SESSION_TYPE switches to a Flask-Session server-side store instead
+    if app.config.get("SESSION_TYPE"):
+        Session(app)
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
 
     db.init_app(app)
+    replica.init_app(app, db)
+    metrics.init_app(app)
     # Note: Database tables are now managed by Alembic migrations
     # Run 'python db_utils/manage_migrations.py upgrade' to apply migrations
     return app
@@ -0,0 +1,88 @@
+"""Sessions, request-scoped user and project access checks.
+
+A session is a signed cookie holding the user ID and the user's
+``session_version``; any worker or node can verify it without shared
+storage, and bumping the version revokes all of the user's sessions. The
+logged-in user is loaded at most once per request, and project access
+is one ``EXISTS`` probe on the ``user_projects`` primary key per project,
+remembered for the rest of the request. Routes with a ``project_id`` URL
+argument use the ``project_access_required`` decorator; routes that find
+the project through a requirement, group or form field call
+``has_project_access`` directly.
+"""
+
+from functools import wraps
+
+from flask import g, jsonify, session
+from sqlalchemy import exists, select
+
+from app import db
+from app.models import User, user_projects
+
+
+def current_user():
+    """The logged-in ``User`` (or None), loaded once per request"""
+    if 'current_user' not in g:
+        user = None
+        user_id = session.get('user_id')
+        if user_id:
+            user = db.session.get(User, user_id)
+            # Unknown, deactivated or revoked: drop the session
+            if user is None or not user.is_active or session.get('session_version', 0) != user.session_version:
+                session.clear()
+                user = None
+        g.current_user = user
+    return g.current_user
+
+
+def start_session(user):
+    """Log ``user`` in for ``PERMANENT_SESSION_LIFETIME``"""
+    session.clear()
+    session.permanent = True
+    session['user_id'] = user.id
+    session['session_version'] = user.session_version
+    g.current_user = user
+
+
+def end_session():
+    session.clear()
+    g.current_user = None
+
+
+def revoke_sessions(user):
+    """Invalidate every existing session of ``user``; the caller commits"""
+    user.session_version = User.session_version + 1
+
+
+def current_username():
+    user = current_user()
+    return user.username if user else None
+
+
+def has_project_access(project_id, user_id=None):
+    """Whether the user (default: the logged-in one) is a member of the project"""
+    if user_id is None:
+        user = current_user()
+        user_id = user.id if user else None
+    if not user_id or not project_id:
+        return False
+    checked = g.setdefault('project_access', {})
+    key = (user_id, project_id)
+    if key not in checked:
+        checked[key] = db.session.execute(
+            select(exists().where(
+                user_projects.c.user_id == user_id,
+                user_projects.c.project_id == project_id
+            ))
+        ).scalar()
+    return checked[key]
+
+
+def project_access_required(f):
+    """Route decorator: 403 unless the logged-in user may access the ``project_id`` URL argument"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not has_project_access(kwargs.get('project_id')):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
@@ -1,27 +1,45 @@
-from flask import request, jsonify, send_file, render_template, session, redirect, url_for
+from flask import Response, request, jsonify, send_file, render_template, redirect, stream_with_context, url_for
 from werkzeug.utils import secure_filename
 import os
+import tempfile
+import unicodedata
+from urllib.parse import quote
 import pandas as pd
 from datetime import datetime
 import uuid
+from sqlalchemy import and_, delete, exists, func, select
+from sqlalchemy.orm import aliased
 from app import create_app, db
-from app.models import Requirement, CellHistory, Group, User, Project
+from app.models import Requirement, CellHistory, Group, User, Project, ProjectSnapshot, Baseline, Changeset, requirement_links, user_projects
+from app import access, audit, baselines, changesets, cloning, columnar, db_pool, exports, graph_index, metrics, notifications, project_deletion, replica, schema, snapshots, traceability
+from app.cache import ProjectCache
+from app.export_cache import ExportCache
 
 
 # Load environment variables
-app = create_app()
+app = create_app(os.environ.get('APP_CONFIG', 'development'))
+coverage_cache = ProjectCache(ttl=app.config['METRICS_CACHE_TTL'])
+export_cache = ExportCache(
+    app.config['EXPORT_CACHE_FOLDER'],
+    max_bytes=app.config['EXPORT_CACHE_MAX_BYTES'],
+    max_age=app.config['EXPORT_CACHE_MAX_AGE']
+) if app.config['EXPORT_CACHE_ENABLED'] else None
+
+def start_background_workers():
+    """Start this process's snapshot, change listener and metrics threads and resume any interrupted project deletions"""
+    snapshots.start_snapshot_worker(app)
+    project_deletion.start_deletion_worker(app)
+    notifications.start_listener(app)
+    metrics.start_flusher(app)
 
 def get_current_user():
     """Get current user from session"""
-    if 'user_id' in session:
-        user = db.session.get(User, session['user_id'])
-        return user.username if user else None
-    return None
+    return access.current_username()
 
 def login_required(f):
     """Decorator to require login for routes"""
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if access.current_user() is None:
             return jsonify({'success': False, 'error': 'Authentication required'}), 401
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
@@ -32,16 +50,6 @@ def login_required(f):
 def users_exist():
     return db.session.query(User).first() is not None
 
-def check_project_access(user_id, project_id):
-    """Helper function to check if user has access to a project"""
-    user = db.session.get(User, user_id)
-    project = db.session.get(Project, project_id)
-    
-    if not user or not project:
-        return False, None, None
-    
-    return user in project.users, user, project
-
 # Web Routes
 @app.route('/')
 def index():
@@ -49,12 +57,8 @@ def index():
     # If no users exist, redirect to login for registration
     if not users_exist():
         return redirect(url_for('login_page'))
-    if 'user_id' not in session:
-        return redirect(url_for('login_page'))
-    # Defensive: check if user_id is valid
-    user = db.session.get(User, session['user_id'])
-    if not user:
-        session.pop('user_id', None)
+    # Missing, expired or revoked sessions go back to the login page
+    if access.current_user() is None:
         return redirect(url_for('login_page'))
     return render_template('index.html')
 
@@ -64,12 +68,8 @@ def login_page():
     # If no users exist, allow registration
     if not users_exist():
         return render_template('login.html')
-    if 'user_id' in session:
-        user = db.session.get(User, session['user_id'])
-        if user:
-            return redirect(url_for('index'))
-        else:
-            session.pop('user_id', None)
+    if access.current_user() is not None:
+        return redirect(url_for('index'))
     return render_template('login.html')
 
 @app.route('/api/login', methods=['POST'])
@@ -85,7 +85,7 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         if user and user.check_password(password) and user.is_active:
-            session['user_id'] = user.id
+            access.start_session(user)
             return jsonify({
                 'success': True,
                 'message': 'Login successful',
@@ -100,9 +100,22 @@ def login():
 @app.route('/api/logout', methods=['POST'])
 def logout():
     """Handle user logout"""
-    session.pop('user_id', None)
+    access.end_session()
     return jsonify({'success': True, 'message': 'Logout successful'})
 
+@app.route('/api/logout-all', methods=['POST'])
+@login_required
+def logout_all():
+    """Revoke every session of the current user, on all devices and nodes"""
+    try:
+        access.revoke_sessions(access.current_user())
+        db.session.commit()
+        access.end_session()
+        return jsonify({'success': True, 'message': 'All sessions revoked'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/register', methods=['POST'])
 def register():
     """Handle user registration"""
@@ -148,12 +161,9 @@ def get_current_user_info():
     """Get current user information"""
     if not users_exist():
         return jsonify({'success': False, 'error': 'No users exist'}), 401
-    if 'user_id' not in session:
-        return jsonify({'success': False, 'error': 'Not logged in'}), 401
-    user = db.session.get(User, session['user_id'])
+    user = access.current_user()
     if not user:
-        session.pop('user_id', None)
-        return jsonify({'success': False, 'error': 'User not found'}), 401
+        return jsonify({'success': False, 'error': 'Not logged in'}), 401
     return jsonify({
         'success': True,
         'user': user.to_dict()
@@ -161,11 +171,12 @@ def get_current_user_info():
 
 # Project Management APIs
 @app.route('/api/projects', methods=['GET'])
+@replica.read_replica
 @login_required
 def get_projects():
     """Get all projects accessible to current user"""
     try:
-        user = db.session.get(User, session['user_id'])
+        user = access.current_user()
         if not user:
             return jsonify({'success': False, 'error': 'User not found'}), 401
         
@@ -185,8 +196,8 @@ def create_project():
     """Create a new project"""
     try:
         data = request.json
-        current_user = get_current_user()
-        user = db.session.get(User, session['user_id'])
+        user = access.current_user()
+        current_user = user.username
         
         if not data.get('name'):
             return jsonify({'success': False, 'error': 'Project name is required'}), 400
@@ -219,19 +230,12 @@ def create_project():
 
 @app.route('/api/projects/<project_id>', methods=['PUT'])
 @login_required
+@access.project_access_required
 def update_project(project_id):
     """Update a project"""
     try:
-        user = db.session.get(User, session['user_id'])
         project = db.session.get(Project, project_id)
         
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
-        # Check if user has access to this project
-        if user not in project.users:
-            return jsonify({'success': False, 'error': 'Access denied'}), 403
-        
         data = request.json
         
         if 'name' in data:
@@ -258,26 +262,61 @@ def update_project(project_id):
 
 @app.route('/api/projects/<project_id>', methods=['DELETE'])
 @login_required
+@access.project_access_required
 def delete_project(project_id):
     """Delete a project"""
     try:
-        user = db.session.get(User, session['user_id'])
         project = db.session.get(Project, project_id)
         
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
+        # Hide the project now; its rows are removed in batches in the background
+        project_deletion.schedule_project_deletion(project)
+        db.session.commit()
+        graph_index.invalidate_project_index(project_id)
+        project_deletion.start_deletion_worker(app)
         
-        # Check if user has access to this project
-        if user not in project.users:
-            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        return jsonify({
+            'success': True,
+            'message': 'Project deletion started'
+        }), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/clone', methods=['POST'])
+@db_pool.statement_timeout('long')
+@login_required
+@access.project_access_required
+def clone_project(project_id):
+    """Clone a project with its groups, requirements and links"""
+    try:
+        user = access.current_user()
+        source = db.session.get(Project, project_id)
+        data = request.json or {}
+        name = data.get('name') or f'{source.name} (copy)'
+        if Project.query.filter_by(name=name).first():
+            return jsonify({'success': False, 'error': 'Project name already exists'}), 400
+        
+        project = Project(
+            name=name,
+            description=data.get('description', source.description),
+            created_by=user.username
+        )
+        project.users.append(user)
+        db.session.add(project)
+        db.session.flush()
         
-        # Delete project (cascade will handle groups and requirements)
-        db.session.delete(project)
+        copied = cloning.clone_project_data(
+            project_id, project.id, user.username,
+            include_positions=data.get('include_positions', True),
+            include_history=data.get('include_history', False)
+        )
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Project deleted successfully'
+            'message': 'Project cloned successfully',
+            'data': project.to_dict(),
+            'copied': copied
         })
     except Exception as e:
         db.session.rollback()
@@ -285,19 +324,12 @@ def delete_project(project_id):
 
 @app.route('/api/projects/<project_id>/users', methods=['POST'])
 @login_required
+@access.project_access_required
 def add_user_to_project(project_id):
     """Add user access to project"""
     try:
-        user = db.session.get(User, session['user_id'])
         project = db.session.get(Project, project_id)
         
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
-        # Check if current user has access to this project
-        if user not in project.users:
-            return jsonify({'success': False, 'error': 'Access denied'}), 403
-        
         data = request.json
         username = data.get('username')
         
@@ -308,7 +340,7 @@ def add_user_to_project(project_id):
         if not target_user:
             return jsonify({'success': False, 'error': 'User not found'}), 404
         
-        if target_user in project.users:
+        if access.has_project_access(project_id, target_user.id):
             return jsonify({'success': False, 'error': 'User already has access to this project'}), 400
         
         project.users.append(target_user)
@@ -324,31 +356,27 @@ def add_user_to_project(project_id):
 
 @app.route('/api/projects/<project_id>/users/<user_id>', methods=['DELETE'])
 @login_required
+@access.project_access_required
 def remove_user_from_project(project_id, user_id):
     """Remove user access from project"""
     try:
-        current_user = db.session.get(User, session['user_id'])
-        project = db.session.get(Project, project_id)
-        
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
-        # Check if current user has access to this project
-        if current_user not in project.users:
-            return jsonify({'success': False, 'error': 'Access denied'}), 403
-        
         target_user = db.session.get(User, user_id)
         if not target_user:
             return jsonify({'success': False, 'error': 'User not found'}), 404
         
-        if target_user not in project.users:
+        if not access.has_project_access(project_id, target_user.id):
             return jsonify({'success': False, 'error': 'User does not have access to this project'}), 400
         
-        # Don't allow removing the last user from a project
-        if len(project.users) == 1:
+        # Don't allow removing the last user from a project (membership rows are probed, not loaded)
+        other_members = db.session.execute(select(exists().where(
+            user_projects.c.project_id == project_id, user_projects.c.user_id != target_user.id
+        ))).scalar()
+        if not other_members:
             return jsonify({'success': False, 'error': 'Cannot remove the last user from a project'}), 400
         
-        project.users.remove(target_user)
+        db.session.execute(delete(user_projects).where(
+            user_projects.c.project_id == project_id, user_projects.c.user_id == target_user.id
+        ))
         db.session.commit()
         
         return jsonify({
@@ -361,6 +389,7 @@ def remove_user_from_project(project_id, user_id):
 
 # API Routes
 @app.route('/api/groups', methods=['GET'])
+@replica.read_replica
 @login_required
 def get_groups():
     """Get all groups with hierarchy for a specific project"""
@@ -369,14 +398,8 @@ def get_groups():
         if not project_id:
             return jsonify({'success': False, 'error': 'Project ID is required'}), 400
         
-        user = db.session.get(User, session['user_id'])
-        project = db.session.get(Project, project_id)
-        
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
         # Check if user has access to this project
-        if user not in project.users:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Get all groups for this project
@@ -410,14 +433,8 @@ def create_group():
         if not data.get('project_id'):
             return jsonify({'success': False, 'error': 'Project ID is required'}), 400
         
-        user = db.session.get(User, session['user_id'])
-        project = db.session.get(Project, data['project_id'])
-        
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
         # Check if user has access to this project
-        if user not in project.users:
+        if not access.has_project_access(data['project_id']):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Check if parent group exists and belongs to the same project
@@ -450,15 +467,13 @@ def create_group():
 def update_group(group_id):
     """Update a group"""
     try:
-        user = db.session.get(User, session['user_id'])
         group = db.session.get(Group, group_id)
         
         if not group:
             return jsonify({'success': False, 'error': 'Group not found'}), 404
         
         # Check if user has access to the project this group belongs to
-        project = db.session.get(Project, group.project_id)
-        if user not in project.users:
+        if not access.has_project_access(group.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         data = request.json
@@ -492,15 +507,13 @@ def update_group(group_id):
 def delete_group(group_id):
     """Delete a group"""
     try:
-        user = db.session.get(User, session['user_id'])
         group = db.session.get(Group, group_id)
         
         if not group:
             return jsonify({'success': False, 'error': 'Group not found'}), 404
         
         # Check if user has access to the project this group belongs to
-        project = db.session.get(Project, group.project_id)
-        if user not in project.users:
+        if not access.has_project_access(group.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Check if group has requirements
@@ -520,6 +533,7 @@ def delete_group(group_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/requirements', methods=['GET'])
+@replica.read_replica
 @login_required
 def get_requirements():
     """Get all requirements with optional filtering for a specific project"""
@@ -528,14 +542,8 @@ def get_requirements():
         if not project_id:
             return jsonify({'success': False, 'error': 'Project ID is required'}), 400
         
-        user = db.session.get(User, session['user_id'])
-        project = db.session.get(Project, project_id)
-        
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
         # Check if user has access to this project
-        if user not in project.users:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Query parameters for filtering
@@ -545,6 +553,9 @@ def get_requirements():
         parent_id = request.args.get('parent_id')
         include_deleted = request.args.get('include_deleted', 'false').lower() == 'true'
         
+        if request.args.get('as_of'):
+            return _requirements_as_of(project_id, request.args['as_of'], status, chapter, group_id, include_deleted)
+        
         query = Requirement.query.filter_by(project_id=project_id)
         
         # Handle deleted requirements logic
@@ -578,24 +589,294 @@ def get_requirements():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _requirements_as_of(project_id, as_of, status, chapter, group_id, include_deleted):
+    try:
+        at = snapshots.naive_utc(datetime.fromisoformat(as_of))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid as_of timestamp'}), 400
+    
+    requirements, snapshot = snapshots.requirements_as_of(project_id, at)
+    if status:
+        requirements = [r for r in requirements if r['status'] == status]
+    elif not include_deleted:
+        requirements = [r for r in requirements if r['status'] != 'deleted']
+    if chapter:
+        requirements = [r for r in requirements if r['chapter'] == chapter]
+    if group_id:
+        requirements = [r for r in requirements if r['group_id'] == group_id]
+    
+    return jsonify({
+        'success': True,
+        'data': requirements,
+        'as_of': at.isoformat(),
+        'snapshot': snapshot.to_dict() if snapshot else None
+    })
+
+@app.route('/api/projects/<project_id>/snapshots', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_project_snapshots(project_id):
+    """List the stored point-in-time snapshots of a project"""
+    try:
+        project_snapshots = ProjectSnapshot.query.filter_by(project_id=project_id).order_by(ProjectSnapshot.taken_at.desc()).all()
+        
+        return jsonify({
+            'success': True,
+            'data': [snapshot.to_dict() for snapshot in project_snapshots]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/snapshots', methods=['POST'])
+@db_pool.statement_timeout('long')
+@login_required
+@access.project_access_required
+def create_project_snapshot(project_id):
+    """Take a point-in-time snapshot of a project now"""
+    try:
+        snapshot = snapshots.take_snapshot(project_id)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Snapshot created successfully',
+            'data': snapshot.to_dict()
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/baselines', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_project_baselines(project_id):
+    """List the baselines of a project"""
+    try:
+        project_baselines = Baseline.query.filter_by(project_id=project_id).order_by(Baseline.created_at.desc()).all()
+        
+        return jsonify({
+            'success': True,
+            'data': [baseline.to_dict() for baseline in project_baselines]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/baselines', methods=['POST'])
+@db_pool.statement_timeout('long')
+@login_required
+@access.project_access_required
+def create_project_baseline(project_id):
+    """Freeze the current requirements and links of a project as a named baseline"""
+    try:
+        data = request.json or {}
+        if not data.get('name'):
+            return jsonify({'success': False, 'error': 'Baseline name is required'}), 400
+        
+        if Baseline.query.filter_by(project_id=project_id, name=data['name']).first():
+            return jsonify({'success': False, 'error': 'Baseline name already exists'}), 400
+        
+        baseline = baselines.create_baseline(project_id, data['name'], data.get('description', ''), get_current_user())
+        db.session.add(baseline)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Baseline created successfully',
+            'data': baseline.to_dict()
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/baselines/diff', methods=['GET'])
+@replica.read_replica
+@db_pool.statement_timeout('long')
+@login_required
+@access.project_access_required
+def diff_project_baselines(project_id):
+    """Diff two baselines, or a baseline against the live project (from=<id>&to=<id>|live)"""
+    try:
+        sides = []
+        for side in (request.args.get('from'), request.args.get('to', 'live')):
+            if not side:
+                return jsonify({'success': False, 'error': 'Baseline to compare from is required'}), 400
+            if side == 'live':
+                sides.append(baselines.capture(project_id))
+                continue
+            baseline = Baseline.query.filter_by(project_id=project_id, id=side).first()
+            if not baseline:
+                return jsonify({'success': False, 'error': f'Baseline {side} not found'}), 404
+            sides.append(baselines.load(baseline))
+        
+        return jsonify({
+            'success': True,
+            'data': baselines.diff(*sides)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/changesets', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_project_changesets(project_id):
+    """Get a project's changesets newest first, one keyset page at a time"""
+    try:
+        try:
+            limit = audit.page_size(request.args.get('limit'), app.config['HISTORY_PAGE_SIZE'])
+            data, cursor = changesets.list_changesets(project_id, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            'data': data,
+            'next_cursor': cursor
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/events', methods=['GET'])
+@login_required
+@access.project_access_required
+def get_project_events(project_id):
+    """Stream a project's committed changes as Server-Sent Events"""
+    if not app.config['LIVE_UPDATES_ENABLED']:
+        return jsonify({'success': False, 'error': 'Live updates are disabled'}), 404
+
+    # Reconnecting browsers send the last data_version they saw
+    data_version = db.session.query(Project.data_version).filter(Project.id == project_id).scalar()
+    stream = notifications.open_stream(
+        project_id,
+        app.config['LIVE_UPDATES_KEEPALIVE'],
+        app.config['LIVE_UPDATES_MAX_DURATION'],
+        app.config['LIVE_UPDATES_MAX_STREAMS'],
+        data_version=data_version,
+        last_version=request.headers.get('Last-Event-ID', type=int)
+    )
+    if stream is None:
+        # The browser falls back to fetching after its own saves
+        return jsonify({'success': False, 'error': 'Too many live update streams, try again later'}), 503
+    
+    # The stream runs after the request's app context ends and holds no connection
+    return Response(
+        stream,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/changesets/<changeset_id>', methods=['GET'])
+@replica.read_replica
+@login_required
+def get_changeset(changeset_id):
+    """Get a changeset with a page of its history entries"""
+    try:
+        changeset = db.session.get(Changeset, changeset_id)
+        if not changeset:
+            return jsonify({'success': False, 'error': 'Changeset not found'}), 404
+        
+        if not access.has_project_access(changeset.project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        try:
+            limit = audit.page_size(request.args.get('limit'), app.config['HISTORY_PAGE_SIZE'])
+            entries, cursor = audit.history_page(
+                [CellHistory.changeset_id == changeset.id], limit, request.args.get('cursor')
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        labels = audit.requirement_labels(entries)
+        data = changeset.to_dict()
+        data['entries'] = []
+        for entry in entries:
+            item = entry.to_dict()
+            item['requirement_display_id'] = labels.get(entry.requirement_id)
+            data['entries'].append(item)
+        data['entries_cursor'] = cursor
+        
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/changesets/<changeset_id>/revert', methods=['POST'])
+@db_pool.statement_timeout('long')
+@login_required
+def revert_changeset(changeset_id):
+    """Revert every value a changeset wrote; 409 if later edits conflict unless force is set"""
+    try:
+        changeset = db.session.get(Changeset, changeset_id)
+        if not changeset:
+            return jsonify({'success': False, 'error': 'Changeset not found'}), 404
+        
+        if not access.has_project_access(changeset.project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            revert_id, restored = changesets.revert(changeset, get_current_user(), force=bool(data.get('force')))
+        except changesets.ChangesetConflict as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e), 'conflicts': e.conflicts}), 409
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)}), 400
+        db.session.commit()
+        graph_index.invalidate_project_index(changeset.project_id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Changeset reverted',
+            'data': {
+                'revert_changeset_id': revert_id,
+                'restored': restored
+            }
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _find_requirement(requirement_id):
+    """The requirement with this display ID in the ``project_id`` query argument's project.
+
+    Display IDs are unique per project only (clones copy them). Without
+    ``project_id`` the ID must be unambiguous among the user's projects,
+    otherwise None is returned.
+    """
+    query = Requirement.query.filter_by(requirement_id=requirement_id)
+    project_id = request.args.get('project_id')
+    if project_id:
+        return query.filter_by(project_id=project_id).first()
+    user = access.current_user()
+    matches = query.filter(Requirement.project_id.in_(
+        select(user_projects.c.project_id).where(user_projects.c.user_id == (user.id if user else None))
+    )).limit(2).all()
+    return matches[0] if len(matches) == 1 else None
+
 @app.route('/api/requirements/<requirement_id>', methods=['GET'])
+@replica.read_replica
 @login_required
 def get_requirement(requirement_id):
     """Get a specific requirement with details (M2M children)"""
     try:
-        requirement = Requirement.query.filter_by(requirement_id=requirement_id).first()
+        requirement = _find_requirement(requirement_id)
         if not requirement:
             return jsonify({'success': False, 'error': 'Requirement not found'}), 404
         
         # Check if user has access to the project this requirement belongs to
-        has_access, user, project = check_project_access(session['user_id'], requirement.project_id)
-        if not has_access:
+        if not access.has_project_access(requirement.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
-        # Get history
-        history = CellHistory.query.filter_by(requirement_id=requirement.id).order_by(CellHistory.changed_at.desc()).all()
+        # Only the latest history page; older entries come from the history endpoint
+        entries, cursor = audit.requirement_history_page(requirement.id, app.config['HISTORY_PAGE_SIZE'])
         data = requirement.to_dict()
-        data['history'] = [h.to_dict() for h in history]
+        data['history'] = [h.to_dict() for h in entries]
+        data['history_cursor'] = cursor
         # children already included as M2M in to_dict
         return jsonify({
             'success': True,
@@ -604,18 +885,91 @@ def get_requirement(requirement_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/requirements/<requirement_id>/history', methods=['GET'])
+@replica.read_replica
+@login_required
+def get_requirement_history(requirement_id):
+    """Get a requirement's change history newest first, one keyset page at a time"""
+    try:
+        requirement = _find_requirement(requirement_id)
+        if not requirement:
+            return jsonify({'success': False, 'error': 'Requirement not found'}), 404
+        
+        # Check if user has access to the project this requirement belongs to
+        if not access.has_project_access(requirement.project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        try:
+            limit = audit.page_size(request.args.get('limit'), app.config['HISTORY_PAGE_SIZE'])
+            entries, cursor = audit.requirement_history_page(requirement.id, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            'data': [h.to_dict() for h in entries],
+            'next_cursor': cursor
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/audit', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_project_audit_feed(project_id):
+    """Get a project's change history newest first, filtered by user, field, time range or requirement"""
+    try:
+        requirement_uuid = None
+        if request.args.get('requirement'):
+            requirement = Requirement.query.filter_by(
+                project_id=project_id, requirement_id=request.args['requirement']
+            ).first()
+            if not requirement:
+                return jsonify({'success': False, 'error': 'Requirement not found'}), 404
+            requirement_uuid = requirement.id
+        
+        try:
+            since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+            until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+            limit = audit.page_size(request.args.get('limit'), app.config['HISTORY_PAGE_SIZE'])
+            entries, cursor = audit.project_feed_page(
+                project_id, limit, request.args.get('cursor'),
+                changed_by=request.args.get('user'),
+                field_name=request.args.get('field'),
+                since=since,
+                until=until,
+                requirement_id=requirement_uuid
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        labels = audit.requirement_labels(entries)
+        data = []
+        for entry in entries:
+            item = entry.to_dict()
+            item['requirement_display_id'] = labels.get(entry.requirement_id)
+            data.append(item)
+        
+        return jsonify({
+            'success': True,
+            'data': data,
+            'next_cursor': cursor
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/requirements/<requirement_id>', methods=['PUT'])
 @login_required
 def update_requirement(requirement_id):
     """Update a requirement and track changes"""
     try:
-        requirement = Requirement.query.filter_by(requirement_id=requirement_id).first()
+        requirement = _find_requirement(requirement_id)
         if not requirement:
             return jsonify({'success': False, 'error': 'Requirement not found'}), 404
         
         # Check if user has access to the project this requirement belongs to
-        has_access, user, project = check_project_access(session['user_id'], requirement.project_id)
-        if not has_access:
+        if not access.has_project_access(requirement.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         data = request.json
@@ -625,6 +979,8 @@ def update_requirement(requirement_id):
         if 'group_id' in data and not data['group_id']:
             return jsonify({'success': False, 'error': 'Group is required'}), 400
         
+        changesets.begin(requirement.project_id, 'edit', current_user)
+        
         # Handle group_id - create group if it doesn't exist
         if 'group_id' in data and data['group_id'] and requirement.group_id != data['group_id']:
             new_group = db.session.get(Group, data['group_id'])
@@ -641,11 +997,14 @@ def update_requirement(requirement_id):
         
         # Track changes for each field
         fields_to_track = ['title', 'description', 'status', 'chapter', 'verification_method']
+        changed_fields = set()
         for field in fields_to_track:
             if field in data and getattr(requirement, field) != data[field]:
+                changed_fields.add(field)
                 # Record the change
                 history = CellHistory(
                     requirement_id=requirement.id,
+                    project_id=requirement.project_id,
                     field_name=field,
                     old_value=str(getattr(requirement, field)),
                     new_value=str(data[field]),
@@ -660,6 +1019,7 @@ def update_requirement(requirement_id):
             if requirement.group_id != data['group_id']:
                 history = CellHistory(
                     requirement_id=requirement.id,
+                    project_id=requirement.project_id,
                     field_name='group_id',
                     old_value=str(requirement.group_id),
                     new_value=str(data['group_id']),
@@ -668,10 +1028,19 @@ def update_requirement(requirement_id):
                 db.session.add(history)
                 requirement.group_id = data['group_id']
         
+        # Content changes make every downstream link suspect until re-reviewed
+        suspect_count = 0
+        if changed_fields.intersection(traceability.SUSPECT_TRIGGER_FIELDS):
+            suspect_count = traceability.mark_downstream_suspect(requirement.project_id, requirement.id)
+        
         requirement.updated_by = current_user
         requirement.updated_at = datetime.utcnow()
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Requirement updated successfully'})
+        return jsonify({
+            'success': True,
+            'message': 'Requirement updated successfully',
+            'suspect_links': suspect_count
+        })
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -691,14 +1060,8 @@ def create_requirement():
         if not group_id:
             return jsonify({'success': False, 'error': 'Group is required'}), 400
         
-        user = db.session.get(User, session['user_id'])
-        project = db.session.get(Project, data['project_id'])
-        
-        if not project:
-            return jsonify({'success': False, 'error': 'Project not found'}), 404
-        
         # Check if user has access to this project
-        if user not in project.users:
+        if not access.has_project_access(data['project_id']):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Get or create group
@@ -730,6 +1093,7 @@ def create_requirement():
         
         db.session.add(requirement)
         db.session.commit()
+        graph_index.on_requirement_created(requirement.project_id, requirement.id, requirement.requirement_id)
         
         return jsonify({
             'success': True,
@@ -745,15 +1109,16 @@ def create_requirement():
 def delete_requirement(requirement_id):
     """Soft delete a requirement by setting status to 'deleted'"""
     try:
-        requirement = Requirement.query.filter_by(requirement_id=requirement_id).first()
+        requirement = _find_requirement(requirement_id)
         if not requirement:
             return jsonify({'success': False, 'error': 'Requirement not found'}), 404
         
         # Check if user has access to the project this requirement belongs to
-        has_access, user, project = check_project_access(session['user_id'], requirement.project_id)
-        if not has_access:
+        if not access.has_project_access(requirement.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
+        changesets.begin(requirement.project_id, 'delete', get_current_user())
+        
         # Soft delete: set status to 'deleted' instead of actually deleting
         old_status = requirement.status
         requirement.status = 'deleted'
@@ -763,6 +1128,7 @@ def delete_requirement(requirement_id):
         # Add history entry for the status change
         history = CellHistory(
             requirement_id=requirement.id,
+            project_id=requirement.project_id,
             field_name='status',
             old_value=old_status,
             new_value='deleted',
@@ -777,7 +1143,100 @@ def delete_requirement(requirement_id):
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def import_requirements_frame(df, project_id, group, current_user):
+    """Bulk import path shared by the Excel, CSV and columnar uploads (M2M parent-child).
+    
+    Returns (records_processed, records_skipped). The caller commits.
+    """
+    required_columns = ['Requirement ID', 'Title']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+    records_processed = 0
+    records_skipped = 0
+    
+    # Look up requirements that already exist in this project with one query
+    ids_in_file = [str(value) for value in df['Requirement ID']]
+    existing_by_id = {
+        req.requirement_id: req
+        for req in Requirement.query.filter(
+            Requirement.project_id == project_id,
+            Requirement.requirement_id.in_(ids_in_file)
+        )
+    } if ids_in_file else {}
+    
+    req_obj_by_file_id = {}
+    # First pass: Create all requirements (ignore parent-child for now)
+    for _, row in df.iterrows():
+        req_id = str(row.get('Requirement ID', f'REQ_{uuid.uuid4().hex[:8]}'))
+        
+        # Check if requirement already exists in this project (or earlier in this file)
+        existing_requirement = existing_by_id.get(req_id)
+        if existing_requirement:
+            # Skip this requirement and use the existing one
+            req_obj_by_file_id[row.get('Requirement ID')] = existing_requirement
+            records_skipped += 1
+            continue
+        
+        requirement = Requirement(
+            id=str(uuid.uuid4()),
+            requirement_id=req_id,
+            title=str(row.get('Title', '')),
+            description=str(row.get('Description', '')),
+            status=str(row.get('Status', 'Draft')),
+            chapter=_optional_cell(row, 'Chapter'),
+            verification_method=_optional_cell(row, 'Verification Method'),
+            group_id=group.id,
+            project_id=project_id,
+            created_by=current_user,
+            updated_by=current_user
+        )
+        db.session.add(requirement)
+        history = CellHistory(
+            requirement_id=requirement.id,
+            project_id=requirement.project_id,
+            field_name='created',
+            old_value=None,
+            new_value=requirement.requirement_id,
+            changed_by=current_user
+        )
+        db.session.add(history)
+        existing_by_id[req_id] = requirement
+        req_obj_by_file_id[row.get('Requirement ID')] = requirement
+        records_processed += 1
+    db.session.flush()
+    # Second pass: Create M2M parent-child links
+    for _, row in df.iterrows():
+        child_file_id = row.get('Requirement ID')
+        if child_file_id not in req_obj_by_file_id:
+            continue
+        child = req_obj_by_file_id[child_file_id]
+        for parent_file_id in _parent_cells(row):
+            if parent_file_id and parent_file_id in req_obj_by_file_id:
+                parent = req_obj_by_file_id[parent_file_id]
+                if parent not in child.parents:
+                    child.parents.append(parent)
+    return records_processed, records_skipped
+
+def _optional_cell(row, column):
+    """Value of an optional import column, None when absent or empty"""
+    value = row.get(column)
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value == '':
+        return None
+    return str(value)
+
+def _parent_cells(row):
+    """Parent references of an import row: 'Parent ID' plus any list in 'Parent IDs'"""
+    parents = [row.get('Parent ID')]
+    many = row.get('Parent IDs')
+    if isinstance(many, str):
+        parents.extend(part.strip() for part in many.split(','))
+    elif many is not None and not isinstance(many, float):
+        parents.extend(many)
+    return parents
+
 @app.route('/api/upload-excel', methods=['POST'])
+@db_pool.statement_timeout('long')
 @login_required
 def upload_excel():
     """Upload and process Excel file (M2M parent-child)"""
@@ -800,8 +1259,7 @@ def upload_excel():
             return jsonify({'success': False, 'error': 'Group ID is required'}), 400
         
         # Check if user has access to this project
-        has_access, user, project = check_project_access(session['user_id'], project_id)
-        if not has_access:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Verify group belongs to this project
@@ -815,67 +1273,15 @@ def upload_excel():
         file.save(filepath)
         
         current_user = get_current_user()
+        changesets.begin(project_id, 'upload_excel', current_user, description=filename)
         try:
             if filename.endswith('.xlsx'):
                 df = pd.read_excel(filepath, engine='openpyxl')
             else:
                 df = pd.read_excel(filepath, engine='xlrd')
-            required_columns = ['Requirement ID', 'Title']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Missing required columns: {missing_columns}")
-            records_processed = 0
-            records_skipped = 0
-            req_obj_by_excel_id = {}
-            # First pass: Create all requirements (ignore parent-child for now)
-            for _, row in df.iterrows():
-                req_id = str(row.get('Requirement ID', f'REQ_{uuid.uuid4().hex[:8]}'))
-                
-                # Check if requirement already exists in this project
-                existing_requirement = Requirement.query.filter_by(
-                    requirement_id=req_id, 
-                    project_id=project_id
-                ).first()
-                
-                if existing_requirement:
-                    # Skip this requirement and use the existing one
-                    req_obj_by_excel_id[row.get('Requirement ID')] = existing_requirement
-                    records_skipped += 1
-                    continue
-                
-                requirement = Requirement(
-                    requirement_id=req_id,
-                    title=str(row.get('Title', '')),
-                    description=str(row.get('Description', '')),
-                    status=str(row.get('Status', 'Draft')),
-                    group_id=group.id,
-                    project_id=project_id,
-                    created_by=current_user,
-                    updated_by=current_user
-                )
-                db.session.add(requirement)
-                db.session.flush()
-                history = CellHistory(
-                    requirement_id=requirement.id,
-                    field_name='created',
-                    old_value=None,
-                    new_value=requirement.requirement_id,
-                    changed_by=current_user
-                )
-                db.session.add(history)
-                req_obj_by_excel_id[row.get('Requirement ID')] = requirement
-                records_processed += 1
-            db.session.flush()
-            # Second pass: Create M2M parent-child links
-            for _, row in df.iterrows():
-                parent_excel_id = row.get('Parent ID')
-                child_excel_id = row.get('Requirement ID')
-                if parent_excel_id and parent_excel_id in req_obj_by_excel_id and child_excel_id in req_obj_by_excel_id:
-                    child = req_obj_by_excel_id[child_excel_id]
-                    parent = req_obj_by_excel_id[parent_excel_id]
-                    if parent not in child.parents:
-                        child.parents.append(parent)
+            records_processed, records_skipped = import_requirements_frame(df, project_id, group, current_user)
             db.session.commit()
+            graph_index.invalidate_project_index(project_id)
             os.remove(filepath)
             return jsonify({
                 'success': True,
@@ -894,6 +1300,7 @@ def upload_excel():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/upload-csv', methods=['POST'])
+@db_pool.statement_timeout('long')
 @login_required
 def upload_csv():
     """Upload and process CSV file (M2M parent-child)"""
@@ -916,8 +1323,7 @@ def upload_csv():
             return jsonify({'success': False, 'error': 'Group ID is required'}), 400
         
         # Check if user has access to this project
-        has_access, user, project = check_project_access(session['user_id'], project_id)
-        if not has_access:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Verify group belongs to this project
@@ -931,65 +1337,13 @@ def upload_csv():
         file.save(filepath)
         
         current_user = get_current_user()
+        changesets.begin(project_id, 'upload_csv', current_user, description=filename)
         try:
             # Read CSV file
             df = pd.read_csv(filepath, encoding='utf-8')
-            required_columns = ['Requirement ID', 'Title']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Missing required columns: {missing_columns}")
-            records_processed = 0
-            records_skipped = 0
-            req_obj_by_csv_id = {}
-            # First pass: Create all requirements (ignore parent-child for now)
-            for _, row in df.iterrows():
-                req_id = str(row.get('Requirement ID', f'REQ_{uuid.uuid4().hex[:8]}'))
-                
-                # Check if requirement already exists in this project
-                existing_requirement = Requirement.query.filter_by(
-                    requirement_id=req_id, 
-                    project_id=project_id
-                ).first()
-                
-                if existing_requirement:
-                    # Skip this requirement and use the existing one
-                    req_obj_by_csv_id[row.get('Requirement ID')] = existing_requirement
-                    records_skipped += 1
-                    continue
-                
-                requirement = Requirement(
-                    requirement_id=req_id,
-                    title=str(row.get('Title', '')),
-                    description=str(row.get('Description', '')),
-                    status=str(row.get('Status', 'Draft')),
-                    group_id=group.id,
-                    project_id=project_id,
-                    created_by=current_user,
-                    updated_by=current_user
-                )
-                db.session.add(requirement)
-                db.session.flush()
-                history = CellHistory(
-                    requirement_id=requirement.id,
-                    field_name='created',
-                    old_value=None,
-                    new_value=requirement.requirement_id,
-                    changed_by=current_user
-                )
-                db.session.add(history)
-                req_obj_by_csv_id[row.get('Requirement ID')] = requirement
-                records_processed += 1
-            db.session.flush()
-            # Second pass: Create M2M parent-child links
-            for _, row in df.iterrows():
-                parent_csv_id = row.get('Parent ID')
-                child_csv_id = row.get('Requirement ID')
-                if parent_csv_id and parent_csv_id in req_obj_by_csv_id and child_csv_id in req_obj_by_csv_id:
-                    child = req_obj_by_csv_id[child_csv_id]
-                    parent = req_obj_by_csv_id[parent_csv_id]
-                    if parent not in child.parents:
-                        child.parents.append(parent)
+            records_processed, records_skipped = import_requirements_frame(df, project_id, group, current_user)
             db.session.commit()
+            graph_index.invalidate_project_index(project_id)
             os.remove(filepath)
             return jsonify({
                 'success': True,
@@ -1007,93 +1361,253 @@ def upload_csv():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/upload-columnar', methods=['POST'])
+@db_pool.statement_timeout('long')
+@login_required
+def upload_columnar():
+    """Upload a Parquet or Arrow IPC requirements dataset through the bulk import path"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'success': False, 'error': 'No file provided'}), 400
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'success': False, 'error': 'No file selected'}), 400
+        if file.filename.endswith('.parquet'):
+            columnar_format = 'parquet'
+        elif file.filename.endswith(('.arrow', '.arrows')):
+            columnar_format = 'arrow'
+        else:
+            return jsonify({'success': False, 'error': 'Invalid file format. Please upload a Parquet or Arrow file.'}), 400
+        
+        # Get project_id and group_id from form
+        project_id = request.form.get('project_id')
+        group_id = request.form.get('group_id')
+        
+        if not project_id:
+            return jsonify({'success': False, 'error': 'Project ID is required'}), 400
+        if not group_id:
+            return jsonify({'success': False, 'error': 'Group ID is required'}), 400
+        
+        # Check if user has access to this project
+        if not access.has_project_access(project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        # Verify group belongs to this project
+        group = db.session.get(Group, group_id)
+        if not group or group.project_id != project_id:
+            return jsonify({'success': False, 'error': 'Group not found or does not belong to this project'}), 400
+        
+        # Columnar files are read straight from the upload stream, no copy in UPLOAD_FOLDER
+        current_user = get_current_user()
+        changesets.begin(project_id, 'upload_columnar', current_user, description=secure_filename(file.filename))
+        df = columnar.read_requirements_frame(file.stream, columnar_format)
+        records_processed, records_skipped = import_requirements_frame(df, project_id, group, current_user)
+        db.session.commit()
+        graph_index.invalidate_project_index(project_id)
+        return jsonify({
+            'success': True,
+            'message': f'Successfully processed {records_processed} requirements, skipped {records_skipped} duplicates',
+            'data': {
+                'records_processed': records_processed,
+                'records_skipped': records_skipped
+            }
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/export-excel', methods=['GET'])
+@replica.read_replica
+@db_pool.statement_timeout('long')
 @login_required
 def export_excel():
-    """Export requirements to Excel for a specific project"""
+    """Export requirements to Excel for a specific project using a constant-memory writer"""
     try:
         project_id = request.args.get('project_id')
         if not project_id:
             return jsonify({'success': False, 'error': 'Project ID is required'}), 400
         
         # Check if user has access to this project
-        has_access, user, project = check_project_access(session['user_id'], project_id)
-        if not has_access:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
-        requirements = Requirement.query.filter_by(project_id=project_id).all()
+        project = db.session.get(Project, project_id)
         
-        # Prepare data for export
-        data = []
-        for req in requirements:
-            data.append({
-                'Requirement ID': req.requirement_id,
-                'Title': req.title,
-                'Description': req.description,
-                'Status': req.status,
-                'Group': req.group_obj.name if req.group_obj else 'Default',
-                'Project': req.project.name if req.project else 'Default',
-                'Parent IDs': ', '.join([p.requirement_id for p in req.parents]),
-                'Created At': req.created_at,
-                'Updated At': req.updated_at,
-                'Created By': req.created_by,
-                'Updated By': req.updated_by
-            })
+        # Optional extra sheets, e.g. ?include=groups,links
+        include = {part.strip() for part in request.args.get('include', '').split(',') if part.strip()}
+        invalid = include - {'groups', 'links'}
+        if invalid:
+            return jsonify({'success': False, 'error': f'Invalid sheets: {", ".join(sorted(invalid))}'}), 400
         
-        # Create DataFrame and export
-        df = pd.DataFrame(data)
         filename = f'{project.name}_requirements_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
-        df.to_excel(filepath, index=False, engine='openpyxl')
-        
-        return send_file(filepath, as_attachment=True, download_name=filename)
+        cache_key = None
+        if export_cache:
+            cache_key = export_cache.key(project_id, project.data_version, 'xlsx', exports.EXPORT_COLUMNS + sorted(include))
+            cached_path = export_cache.lookup(cache_key, 'xlsx')
+            if cached_path:
+                return send_file(cached_path, as_attachment=True, download_name=filename)
+        
+        sheets = [('Requirements', exports.EXPORT_COLUMNS, exports.requirement_rows(project_id))]
+        if 'groups' in include:
+            sheets.append(('Groups', exports.GROUP_COLUMNS, exports.group_rows(project_id)))
+        if 'links' in include:
+            sheets.append(('Links', exports.LINK_COLUMNS, exports.link_rows(project_id)))
+        
+        if cache_key:
+            temp = export_cache.open_temp('xlsx')
+            try:
+                with temp:
+                    exports.write_xlsx(sheets, temp)
+            except Exception:
+                export_cache.discard(temp.name)
+                raise
+            cached_path = export_cache.commit(temp.name, cache_key, 'xlsx')
+            return send_file(cached_path, as_attachment=True, download_name=filename)
+        
+        output = exports.write_xlsx(sheets)
+        response = send_file(output, as_attachment=True, download_name=filename)
+        # The spooled file is removed as soon as it is closed
+        response.call_on_close(output.close)
+        return response
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _as_attachment(response, filename):
+    """Set a download ``Content-Disposition`` on a streamed response, quoted like ``send_file``"""
+    try:
+        filename.encode('ascii')
+    except UnicodeEncodeError:
+        # ASCII fallback plus the RFC 5987 UTF-8 name
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': simple, 'filename*': f"UTF-8''{quote(filename, safe='!#$&+-.^_`|~')}"}
+    else:
+        names = {'filename': filename}
+    response.headers.set('Content-Disposition', 'attachment', **names)
+    return response
+
 @app.route('/api/export-csv', methods=['GET'])
+@replica.read_replica
+@db_pool.statement_timeout('long')
 @login_required
 def export_csv():
-    """Export requirements to CSV for a specific project"""
+    """Export requirements to CSV for a specific project, streamed straight into the response"""
     try:
         project_id = request.args.get('project_id')
         if not project_id:
             return jsonify({'success': False, 'error': 'Project ID is required'}), 400
         
         # Check if user has access to this project
-        has_access, user, project = check_project_access(session['user_id'], project_id)
-        if not has_access:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
-        requirements = Requirement.query.filter_by(project_id=project_id).all()
-        
-        # Prepare data for export
-        data = []
-        for req in requirements:
-            data.append({
-                'Requirement ID': req.requirement_id,
-                'Title': req.title,
-                'Description': req.description,
-                'Status': req.status,
-                'Group': req.group_obj.name if req.group_obj else 'Default',
-                'Project': req.project.name if req.project else 'Default',
-                'Parent IDs': ', '.join([p.requirement_id for p in req.parents]),
-                'Created At': req.created_at,
-                'Updated At': req.updated_at,
-                'Created By': req.created_by,
-                'Updated By': req.updated_by
-            })
+        project = db.session.get(Project, project_id)
         
-        # Create DataFrame and export
-        df = pd.DataFrame(data)
         filename = f'{project.name}_requirements_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        chunks = exports.iter_csv(exports.EXPORT_COLUMNS, exports.requirement_rows(project_id))
+        if export_cache:
+            cache_key = export_cache.key(project_id, project.data_version, 'csv', exports.EXPORT_COLUMNS)
+            cached_path = export_cache.lookup(cache_key, 'csv')
+            if cached_path:
+                return send_file(cached_path, as_attachment=True, download_name=filename, mimetype='text/csv')
+            # Stream to the client and into the cache in one pass
+            chunks = export_cache.tee(chunks, cache_key, 'csv')
+        
+        return _as_attachment(Response(stream_with_context(chunks), mimetype='text/csv'), filename)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/export-columnar', methods=['GET'])
+@replica.read_replica
+@db_pool.statement_timeout('long')
+@login_required
+def export_columnar():
+    """Export requirements, links or history as typed Parquet or an Arrow IPC stream"""
+    try:
+        project_id = request.args.get('project_id')
+        if not project_id:
+            return jsonify({'success': False, 'error': 'Project ID is required'}), 400
+        
+        dataset = request.args.get('dataset', 'requirements')
+        if dataset not in columnar.SCHEMAS:
+            return jsonify({'success': False, 'error': 'Invalid dataset. Use requirements, links or history.'}), 400
+        columnar_format = request.args.get('format', 'parquet')
+        if columnar_format not in columnar.COLUMNAR_FORMATS:
+            return jsonify({'success': False, 'error': 'Invalid format. Use parquet or arrow.'}), 400
+        
+        # Check if user has access to this project
+        if not access.has_project_access(project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        project = db.session.get(Project, project_id)
+        
+        extension, mimetype = columnar.COLUMNAR_FORMATS[columnar_format]
+        filename = f'{project.name}_{dataset}_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+        if export_cache:
+            cache_key = export_cache.key(project_id, project.data_version, extension, [dataset])
+            cached_path = export_cache.lookup(cache_key, extension)
+            if not cached_path:
+                temp = export_cache.open_temp(extension)
+                try:
+                    with temp:
+                        columnar.write_dataset(project_id, dataset, columnar_format, temp)
+                except Exception:
+                    export_cache.discard(temp.name)
+                    raise
+                cached_path = export_cache.commit(temp.name, cache_key, extension)
+            return send_file(cached_path, as_attachment=True, download_name=filename, mimetype=mimetype)
+        
+        output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        columnar.write_dataset(project_id, dataset, columnar_format, output)
+        output.seek(0)
+        response = send_file(output, as_attachment=True, download_name=filename, mimetype=mimetype)
+        response.call_on_close(output.close)
+        return response
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/export-traceability-matrix', methods=['GET'])
+@replica.read_replica
+@db_pool.statement_timeout('long')
+@login_required
+def export_traceability_matrix():
+    """Export a parent x child or requirement x verification method matrix as CSV or Excel"""
+    try:
+        project_id = request.args.get('project_id')
+        if not project_id:
+            return jsonify({'success': False, 'error': 'Project ID is required'}), 400
+        
+        kind = request.args.get('kind', 'links')
+        if kind not in ('links', 'verification'):
+            return jsonify({'success': False, 'error': 'Invalid matrix kind. Use links or verification.'}), 400
+        export_format = request.args.get('format', 'csv')
+        if export_format not in ('csv', 'xlsx'):
+            return jsonify({'success': False, 'error': 'Invalid format. Use csv or xlsx.'}), 400
         
-        df.to_csv(filepath, index=False, encoding='utf-8')
+        # Check if user has access to this project
+        if not access.has_project_access(project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
         
-        return send_file(filepath, as_attachment=True, download_name=filename)
+        project = db.session.get(Project, project_id)
         
+        row_group_ids = request.args.getlist('row_group_id')
+        col_group_ids = request.args.getlist('col_group_id')
+        if kind == 'links':
+            matrix = exports.link_matrix(project_id, row_group_ids, col_group_ids)
+            header = ['Parent ID', 'Title'] + matrix.col_labels
+        else:
+            matrix = exports.verification_matrix(project_id, row_group_ids)
+            header = ['Requirement ID', 'Title'] + matrix.col_labels
+        
+        filename = f'{project.name}_traceability_{kind}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{export_format}'
+        if export_format == 'xlsx':
+            output = exports.write_xlsx([('Traceability', header, matrix.iter_dense_rows())])
+            response = send_file(output, as_attachment=True, download_name=filename)
+            response.call_on_close(output.close)
+            return response
+        
+        return _as_attachment(Response(exports.iter_csv(header, matrix.iter_dense_rows()), mimetype='text/csv'), filename)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -1106,18 +1620,38 @@ def health_check():
         'timestamp': datetime.utcnow().isoformat()
     })
 
+@app.route('/api/health/pool', methods=['GET'])
+@login_required
+def pool_health():
+    """Connection pool statistics of the serving process (checked out, overflow, checkout wait)"""
+    data = db_pool.pool_stats(db.engine)
+    replica_engine = db.engines.get(replica.REPLICA_BIND)
+    if replica_engine is not None:
+        data['replica'] = db_pool.pool_stats(replica_engine)
+        data['replica'].update(replica.replica_status(db))
+    return jsonify({
+        'success': True,
+        'data': data
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request latency, SQL, response size and row metrics in Prometheus text format"""
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'success': False, 'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(app.config['METRICS_DIR']), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/requirements/<requirement_id>/move', methods=['POST'])
 @login_required
 def move_requirement(requirement_id):
     """Move a requirement to a different group within the same project"""
     try:
-        requirement = Requirement.query.filter_by(requirement_id=requirement_id).first()
+        requirement = _find_requirement(requirement_id)
         if not requirement:
             return jsonify({'success': False, 'error': 'Requirement not found'}), 404
         
         # Check if user has access to the project this requirement belongs to
-        has_access, user, project = check_project_access(session['user_id'], requirement.project_id)
-        if not has_access:
+        if not access.has_project_access(requirement.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         data = request.json
@@ -1134,6 +1668,10 @@ def move_requirement(requirement_id):
         if new_group.project_id != requirement.project_id:
             return jsonify({'success': False, 'error': 'Cannot move requirement to a group in a different project'}), 400
         
+        current_user = get_current_user()
+        changesets.begin(requirement.project_id, 'move', current_user)
+        old_group_id = requirement.group_id
+        
         # Update requirement
         requirement.group_id = new_group_id
         requirement.updated_at = datetime.utcnow()
@@ -1141,10 +1679,11 @@ def move_requirement(requirement_id):
         # Add to history
         history = CellHistory(
             requirement_id=requirement.id,
+            project_id=requirement.project_id,
             field_name='group_id',
-            old_value=str(requirement.group_id) if requirement.group_id else None,
+            old_value=str(old_group_id) if old_group_id else None,
             new_value=str(new_group_id),
-            changed_by=get_current_user()
+            changed_by=current_user
         )
         db.session.add(history)
         
@@ -1179,8 +1718,7 @@ def batch_update_requirements():
             return jsonify({'success': False, 'error': 'No updates provided'}), 400
         
         # Check if user has access to this project
-        has_access, user, project = check_project_access(session['user_id'], project_id)
-        if not has_access:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Validate updates
@@ -1210,6 +1748,7 @@ def batch_update_requirements():
             elif group.project_id != project_id:
                 return jsonify({'success': False, 'error': 'Group does not belong to this project'}), 400
         
+        changesets.begin(project_id, 'batch_update', current_user)
         for req_id in requirement_ids:
             requirement = Requirement.query.filter_by(requirement_id=req_id, project_id=project_id).first()
             if requirement:
@@ -1244,6 +1783,7 @@ def batch_update_requirements():
                 for field_name, old_value, new_value in changes:
                     history = CellHistory(
                         requirement_id=requirement.id,
+                        project_id=requirement.project_id,
                         field_name=field_name,
                         old_value=old_value,
                         new_value=new_value,
@@ -1264,7 +1804,38 @@ def batch_update_requirements():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def group_graph_node_id(group_id):
+    """Node ID of a collapsed group in the aggregated graph"""
+    return f'group:{group_id}'
+
+def requirement_graph_node(req):
+    """Build a vis.js node for a requirement"""
+    node = {
+        'id': req.id,
+        'label': f"{req.requirement_id}\n{req.title[:50]}{'...' if len(req.title) > 50 else ''}",
+        'title': req.title,
+        'requirement_id': req.requirement_id,
+        'status': req.status,
+        'group_name': req.group_obj.name if req.group_obj else 'Unknown',
+        'description': req.description,
+        'created_at': req.created_at.isoformat() if req.created_at else None,
+        'updated_at': req.updated_at.isoformat() if req.updated_at else None,
+        'x': req.graph_x,
+        'y': req.graph_y
+    }
+    # Set node color based on status
+    if req.status == 'Completed':
+        node['color'] = '#28a745'
+    elif req.status == 'In Progress':
+        node['color'] = '#007bff'
+    elif req.status == 'Review':
+        node['color'] = '#ffc107'
+    else:
+        node['color'] = '#6c757d'
+    return node
+
 @app.route('/api/requirements/graph', methods=['GET'])
+@replica.read_replica
 @login_required
 def get_requirements_graph():
     """Get requirements data formatted for graph visualization (many-to-many) for a specific project"""
@@ -1274,8 +1845,7 @@ def get_requirements_graph():
             return jsonify({'success': False, 'error': 'Project ID is required'}), 400
         
         # Check if user has access to this project
-        has_access, user, project = check_project_access(session['user_id'], project_id)
-        if not has_access:
+        if not access.has_project_access(project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         # Exclude deleted requirements from graph view
@@ -1283,29 +1853,7 @@ def get_requirements_graph():
         nodes = []
         edges = []
         for req in requirements:
-            node = {
-                'id': req.id,
-                'label': f"{req.requirement_id}\n{req.title[:50]}{'...' if len(req.title) > 50 else ''}",
-                'title': req.title,
-                'requirement_id': req.requirement_id,
-                'status': req.status,
-                'group_name': req.group_obj.name if req.group_obj else 'Unknown',
-                'description': req.description,
-                'created_at': req.created_at.isoformat() if req.created_at else None,
-                'updated_at': req.updated_at.isoformat() if req.updated_at else None,
-                'x': req.graph_x,
-                'y': req.graph_y
-            }
-            # Set node color based on status
-            if req.status == 'Completed':
-                node['color'] = '#28a745'
-            elif req.status == 'In Progress':
-                node['color'] = '#007bff'
-            elif req.status == 'Review':
-                node['color'] = '#ffc107'
-            else:
-                node['color'] = '#6c757d'
-            nodes.append(node)
+            nodes.append(requirement_graph_node(req))
             # Add edges for all parent links
             for parent in req.parents:
                 edges.append({
@@ -1323,7 +1871,151 @@ def get_requirements_graph():
             }
         })
     except Exception as e:
-        print(f"[DEBUG] Exception in get_requirements_graph: {e}")
+        app.logger.exception('Building the requirements graph failed')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/requirements/graph/groups', methods=['GET'])
+@replica.read_replica
+@login_required
+def get_group_graph():
+    """Get the requirements graph collapsed to one node per group with weighted edges"""
+    try:
+        project_id = request.args.get('project_id')
+        if not project_id:
+            return jsonify({'success': False, 'error': 'Project ID is required'}), 400
+        
+        # Check if user has access to this project
+        if not access.has_project_access(project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        counts = db.session.query(
+            Group.id, Group.name, Group.parent_id, func.count(Requirement.id)
+        ).outerjoin(
+            Requirement,
+            and_(Requirement.group_id == Group.id, Requirement.status != 'deleted')
+        ).filter(Group.project_id == project_id).group_by(Group.id, Group.name, Group.parent_id).all()
+        
+        # One GROUP BY over the link table gives the weight of every group pair
+        parent = aliased(Requirement)
+        child = aliased(Requirement)
+        links = db.session.query(
+            parent.group_id, child.group_id, func.count()
+        ).select_from(requirement_links).join(
+            parent, parent.id == requirement_links.c.parent_id
+        ).join(
+            child, child.id == requirement_links.c.child_id
+        ).filter(
+            parent.project_id == project_id,
+            parent.status != 'deleted',
+            child.status != 'deleted'
+        ).group_by(parent.group_id, child.group_id).all()
+        
+        internal_links = {}
+        edges = []
+        for from_group, to_group, weight in links:
+            if from_group == to_group:
+                internal_links[from_group] = weight
+                continue
+            edges.append({
+                'from': group_graph_node_id(from_group),
+                'to': group_graph_node_id(to_group),
+                'arrows': 'to',
+                'weight': weight,
+                'label': str(weight),
+                'width': min(1 + weight, 10)
+            })
+        
+        nodes = [{
+            'id': group_graph_node_id(group_id),
+            'group_id': group_id,
+            'label': f"{name}\n({count})",
+            'title': name,
+            'parent_id': parent_id,
+            'requirements_count': count,
+            'internal_links': internal_links.get(group_id, 0),
+            'shape': 'ellipse'
+        } for group_id, name, parent_id, count in counts]
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'nodes': nodes,
+                'edges': edges
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/requirements/graph/groups/<group_id>', methods=['GET'])
+@replica.read_replica
+@login_required
+def expand_group_graph(group_id):
+    """Expand one group of the aggregated graph into its requirements and boundary edges"""
+    try:
+        group = db.session.get(Group, group_id)
+        if not group:
+            return jsonify({'success': False, 'error': 'Group not found'}), 404
+        
+        # Check if user has access to the project this group belongs to
+        if not access.has_project_access(group.project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        requirements = Requirement.query.filter_by(group_id=group_id).filter(Requirement.status != 'deleted').all()
+        nodes = [requirement_graph_node(req) for req in requirements]
+        
+        parent = aliased(Requirement)
+        child = aliased(Requirement)
+        
+        def link_query(*columns):
+            return db.session.query(*columns).select_from(requirement_links).join(
+                parent, parent.id == requirement_links.c.parent_id
+            ).join(
+                child, child.id == requirement_links.c.child_id
+            ).filter(parent.status != 'deleted', child.status != 'deleted')
+        
+        edges = [{
+            'from': parent_id,
+            'to': child_id,
+            'arrows': 'to',
+            'color': '#666',
+            'width': 2
+        } for parent_id, child_id in link_query(parent.id, child.id).filter(
+            parent.group_id == group_id, child.group_id == group_id
+        )]
+        
+        # Links leaving the group are collapsed onto the neighbouring group node
+        outgoing = link_query(parent.id, child.group_id, func.count()).filter(
+            parent.group_id == group_id, child.group_id != group_id
+        ).group_by(parent.id, child.group_id)
+        incoming = link_query(parent.group_id, child.id, func.count()).filter(
+            child.group_id == group_id, parent.group_id != group_id
+        ).group_by(parent.group_id, child.id)
+        for member_id, other_group, weight in outgoing:
+            edges.append({
+                'from': member_id,
+                'to': group_graph_node_id(other_group),
+                'arrows': 'to',
+                'weight': weight,
+                'dashes': True
+            })
+        for other_group, member_id, weight in incoming:
+            edges.append({
+                'from': group_graph_node_id(other_group),
+                'to': member_id,
+                'arrows': 'to',
+                'weight': weight,
+                'dashes': True
+            })
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'group_id': group_id,
+                'nodes': nodes,
+                'edges': edges
+            }
+        })
+    except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/requirements/<requirement_id>/parent', methods=['POST'])
@@ -1334,63 +2026,199 @@ def set_requirement_parent(requirement_id):
         data = request.json
         parent_id = data.get('parent_id')
         remove_only = data.get('remove_only', False)
-        print(f"[DEBUG] Received parent-child update: child requirement_id={requirement_id}, parent_id={parent_id}, remove_only={remove_only}")
+        app.logger.debug('Parent update for %s: parent_id=%s, remove_only=%s', requirement_id, parent_id, remove_only)
         
-        child = Requirement.query.filter_by(requirement_id=requirement_id).first()
-        print(f"[DEBUG] Resolved child requirement: {child}")
+        child = _find_requirement(requirement_id)
         if not child:
-            print("[DEBUG] Child requirement not found")
+            app.logger.debug('Parent update rejected: requirement %s not found', requirement_id)
             return jsonify({'success': False, 'error': 'Requirement not found'}), 404
         
         # Check if user has access to the project this requirement belongs to
-        has_access, user, project = check_project_access(session['user_id'], child.project_id)
-        if not has_access:
+        if not access.has_project_access(child.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         if parent_id:
-            parent = Requirement.query.filter_by(requirement_id=parent_id).first()
-            print(f"[DEBUG] Resolved parent requirement: {parent}")
+            # Parents always belong to the child's project
+            parent = Requirement.query.filter_by(requirement_id=parent_id, project_id=child.project_id).first()
             if not parent:
-                print("[DEBUG] Parent requirement not found")
+                app.logger.debug('Parent update rejected: parent %s not found', parent_id)
                 return jsonify({'success': False, 'error': 'Parent requirement not found'}), 404
-            
-            # Check if parent belongs to the same project
-            if parent.project_id != child.project_id:
-                print("[DEBUG] Parent requirement belongs to different project")
-                return jsonify({'success': False, 'error': 'Parent requirement must belong to the same project'}), 400
             if remove_only:
                 # Remove only this parent-child link
-                print(f"[DEBUG] Current parents of child before removal: {[p.requirement_id for p in child.parents]}")
                 if parent in child.parents:
                     child.parents.remove(parent)
                     db.session.commit()
-                    print(f"[DEBUG] Removed parent-child link: {parent_id} -> {requirement_id}")
+                    graph_index.on_link_removed(child.project_id, parent.id, child.id)
+                    app.logger.info('Removed link %s -> %s', parent_id, requirement_id)
                     return jsonify({'success': True, 'message': 'Parent relationship deleted'})
                 else:
-                    print(f"[DEBUG] Link does not exist: {parent_id} -> {requirement_id} (idempotent delete)")
+                    app.logger.debug('Link %s -> %s does not exist; nothing to remove', parent_id, requirement_id)
                     # Always return success for idempotent delete
                     return jsonify({'success': True, 'message': 'Parent relationship already deleted'})
             # Prevent self-link
             if parent.id == child.id:
-                print("[DEBUG] Attempted to set requirement as its own parent")
+                app.logger.debug('Parent update rejected: %s cannot be its own parent', requirement_id)
                 return jsonify({'success': False, 'error': 'Cannot set requirement as its own parent'}), 400
             # Prevent duplicate link
             if parent not in child.parents:
                 child.parents.append(parent)
                 db.session.commit()
-                print(f"[DEBUG] Added parent-child link: {parent_id} -> {requirement_id}")
+                graph_index.on_link_added(child.project_id, parent.id, child.id)
+                app.logger.info('Added link %s -> %s', parent_id, requirement_id)
                 return jsonify({'success': True, 'message': 'Parent relationship added'})
             else:
-                print(f"[DEBUG] Link already exists: {parent_id} -> {requirement_id}")
+                app.logger.debug('Link %s -> %s already exists', parent_id, requirement_id)
                 return jsonify({'success': True, 'message': 'Link already exists'})
         else:
             # Remove all parent links for this child
             child.parents = []
             db.session.commit()
-            print(f"[DEBUG] Removed all parent links for child: {requirement_id}")
+            graph_index.on_parents_cleared(child.project_id, child.id)
+            app.logger.info('Removed all parent links of %s', requirement_id)
             return jsonify({'success': True, 'message': 'All parent relationships removed'})
     except Exception as e:
         db.session.rollback()
-        print(f"[DEBUG] Exception in set_requirement_parent: {e}")
+        app.logger.exception('Updating the parents of %s failed', requirement_id)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/requirements/<requirement_id>/ancestors', methods=['GET'])
+@replica.read_replica
+@login_required
+def get_requirement_ancestors(requirement_id):
+    """Get all transitive parents of a requirement from the project graph index"""
+    return _requirement_closure(requirement_id, descendants=False)
+
+@app.route('/api/requirements/<requirement_id>/descendants', methods=['GET'])
+@replica.read_replica
+@login_required
+def get_requirement_descendants(requirement_id):
+    """Get all transitive children of a requirement (impact analysis)"""
+    return _requirement_closure(requirement_id, descendants=True)
+
+def _requirement_closure(requirement_id, descendants):
+    try:
+        requirement = _find_requirement(requirement_id)
+        if not requirement:
+            return jsonify({'success': False, 'error': 'Requirement not found'}), 404
+        
+        # Check if user has access to the project this requirement belongs to
+        if not access.has_project_access(requirement.project_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        index = graph_index.get_project_index(requirement.project_id)
+        if descendants:
+            found = index.descendants(requirement.id)
+        else:
+            found = index.ancestors(requirement.id)
+        
+        return jsonify({
+            'success': True,
+            'data': index.describe(found)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/graph/cycles', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_project_graph_cycles(project_id):
+    """Detect cycles in the parent-child graph of a project"""
+    try:
+        index = graph_index.get_project_index(project_id)
+        cycle = index.find_cycle()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'has_cycle': bool(cycle),
+                'cycle': index.describe(cycle)
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/graph/topological-order', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_project_topological_order(project_id):
+    """Get the requirements of a project ordered parents-before-children"""
+    try:
+        index = graph_index.get_project_index(project_id)
+        order, remaining = index.topological_order()
+        if remaining:
+            return jsonify({
+                'success': False,
+                'error': 'Requirement graph contains cycles',
+                'data': {'unordered': index.describe(remaining)}
+            }), 409
+        
+        return jsonify({
+            'success': True,
+            'data': index.describe(order)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/suspects', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_suspect_links(project_id):
+    """List links flagged suspect after an upstream requirement changed"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': traceability.project_suspect_links(project_id)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/suspects/clear', methods=['POST'])
+@login_required
+@access.project_access_required
+def clear_suspect_links(project_id):
+    """Clear suspect flags after review, optionally only for one child and/or parent requirement"""
+    try:
+        data = request.json or {}
+        child_id = data.get('child_id')
+        parent_id = data.get('parent_id')
+        if not child_id and not parent_id and not data.get('all'):
+            return jsonify({'success': False, 'error': 'Provide child_id, parent_id or all=true'}), 400
+        
+        cleared = traceability.clear_suspect_links(project_id, child_id=child_id, parent_id=parent_id)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Cleared {cleared} suspect links',
+            'cleared_count': cleared
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/coverage', methods=['GET'])
+@replica.read_replica
+@login_required
+@access.project_access_required
+def get_project_coverage(project_id):
+    """Get traceability coverage metrics for a project (cached until the next write)"""
+    try:
+        # Keyed by the data version read alongside, so coverage computed on a
+        # lagging replica are replaced once it catches up
+        version = db.session.query(Project.data_version).filter(Project.id == project_id).scalar()
+        coverage = coverage_cache.get(project_id, key=version)
+        cached = coverage is not None
+        if not cached:
+            coverage = coverage_cache.set(project_id, traceability.coverage_metrics(project_id), key=version)
+        
+        return jsonify({
+            'success': True,
+            'cached': cached,
+            'data': coverage
+        })
+    except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/requirements/<requirement_id>/position', methods=['POST'])
@@ -1402,13 +2230,12 @@ def update_requirement_position(requirement_id):
         x = data.get('x')
         y = data.get('y')
         
-        requirement = Requirement.query.filter_by(requirement_id=requirement_id).first()
+        requirement = _find_requirement(requirement_id)
         if not requirement:
             return jsonify({'success': False, 'error': 'Requirement not found'}), 404
         
         # Check if user has access to the project this requirement belongs to
-        has_access, user, project = check_project_access(session['user_id'], requirement.project_id)
-        if not has_access:
+        if not access.has_project_access(requirement.project_id):
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
         requirement.graph_x = x
@@ -1432,6 +2259,8 @@ if __name__ == '__main__':
     port = int(os.environ.get('FLASK_PORT', 5000))
     debug = os.environ.get('FLASK_DEBUG', '1').lower() == '1'
     
-    with app.app_context():
-        db.create_all()
+    # With the reloader, only its child serves requests
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        schema.upgrade(app)
+        start_background_workers()
     app.run(debug=debug, host=host, port=port) 
@@ -0,0 +1,221 @@
+"""Whole-project archives dumped and restored with PostgreSQL COPY.
+
+An archive is a gzip-compressed tarball holding one CSV member per table
+(written by ``COPY ... TO STDOUT``) plus a ``manifest.json`` describing the
+columns of every member. Restoring stages each member with ``COPY FROM``
+into a temporary table and inserts the rows with freshly generated IDs, so
+an archive can be restored next to the project it was taken from.
+"""
+
+from datetime import datetime
+import io
+import json
+import tarfile
+import tempfile
+
+from flask import current_app
+
+from app import db
+
+ARCHIVE_FORMAT_VERSION = 1
+
+# Tables in dependency order with the rows belonging to one project
+ARCHIVE_TABLES = [
+    ('projects', 'id = %(project_id)s'),
+    ('groups', 'project_id = %(project_id)s'),
+    ('requirements', 'project_id = %(project_id)s'),
+    ('requirement_links', 'parent_id IN (SELECT id FROM requirements WHERE project_id = %(project_id)s)'),
+    ('changesets', 'project_id = %(project_id)s'),
+    ('cell_history', 'project_id = %(project_id)s'),
+]
+
+# Tables whose IDs get new values on restore
+ID_TABLES = ['projects', 'groups', 'requirements', 'changesets']
+
+# Columns holding project, group, requirement or changeset IDs, rewritten on
+# restore; IDs missing from the archive become NULL
+REMAPPED_COLUMNS = {
+    'projects': {'id'},
+    'groups': {'id', 'parent_id', 'project_id'},
+    'requirements': {'id', 'group_id', 'project_id'},
+    'requirement_links': {'parent_id', 'child_id'},
+    'changesets': {'id', 'project_id', 'revert_changeset_id'},
+    'cell_history': {'requirement_id', 'project_id', 'changeset_id'},
+}
+
+# Columns regenerated by the target database instead of being restored
+GENERATED_COLUMNS = {
+    'cell_history': {'id'},
+}
+
+# Rows are dumped and restored in this order, so regenerated IDs keep the
+# original sequence (reverts and as-of replays order history by ID)
+ROW_ORDER = {
+    'cell_history': 'id',
+}
+
+
+def _table_columns(table_name):
+    return [column.name for column in db.metadata.tables[table_name].columns]
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def dump_project(project_id, path):
+    """Write a project archive to ``path``; returns the manifest"""
+    manifest = {
+        'format_version': ARCHIVE_FORMAT_VERSION,
+        'project_id': project_id,
+        'created_at': datetime.utcnow().isoformat(),
+        'tables': {}
+    }
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        # One snapshot for all tables so links and history match the requirements
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        cursor.execute('SET LOCAL statement_timeout = %s', (current_app.config['DB_LONG_STATEMENT_TIMEOUT'],))
+        cursor.execute('SELECT 1 FROM projects WHERE id = %s', (project_id,))
+        if cursor.fetchone() is None:
+            raise ValueError(f'Project {project_id} not found')
+        with tarfile.open(path, 'w:gz') as archive:
+            for table_name, condition in ARCHIVE_TABLES:
+                columns = _table_columns(table_name)
+                column_list = ', '.join(_quote(c) for c in columns)
+                order = f' ORDER BY {_quote(ROW_ORDER[table_name])}' if table_name in ROW_ORDER else ''
+                select_sql = cursor.mogrify(
+                    f'SELECT {column_list} FROM {_quote(table_name)} WHERE {condition}{order}',
+                    {'project_id': project_id}
+                ).decode('utf-8')
+                with tempfile.TemporaryFile() as buffer:
+                    cursor.copy_expert(f'COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER true)', buffer)
+                    info = tarfile.TarInfo(f'{table_name}.csv')
+                    info.size = buffer.tell()
+                    buffer.seek(0)
+                    archive.addfile(info, buffer)
+                manifest['tables'][table_name] = {'columns': columns, 'rows': cursor.rowcount}
+            payload = json.dumps(manifest, indent=2).encode('utf-8')
+            info = tarfile.TarInfo('manifest.json')
+            info.size = len(payload)
+            archive.addfile(info, io.BytesIO(payload))
+        connection.rollback()
+    finally:
+        connection.close()
+    return manifest
+
+
+def _restored_name(cursor, name):
+    """``name`` if unused, else ``name (restored)``, ``name (restored 2)``, ..."""
+    max_length = db.metadata.tables['projects'].c.name.type.length
+    candidate = name
+    attempt = 1
+    while True:
+        cursor.execute('SELECT 1 FROM projects WHERE name = %s', (candidate,))
+        if cursor.fetchone() is None:
+            return candidate
+        suffix = ' (restored)' if attempt == 1 else f' (restored {attempt})'
+        candidate = name[:max_length - len(suffix)] + suffix
+        attempt += 1
+
+
+def restore_project(path, name=None, grant_user_ids=()):
+    """Restore a project archive under new IDs in one transaction; returns the new project ID.
+
+    Without ``name`` the archived name is kept, with a ``(restored)`` suffix
+    when a project of that name exists; an explicit ``name`` must be unused.
+    """
+    with tarfile.open(path, 'r:gz') as archive:
+        manifest = json.load(archive.extractfile('manifest.json'))
+        if manifest.get('format_version') != ARCHIVE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported archive format version: {manifest.get('format_version')}")
+
+        connection = db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SET LOCAL statement_timeout = %s', (current_app.config['DB_LONG_STATEMENT_TIMEOUT'],))
+            # Archives written before changesets existed have no changesets member
+            tables = [table_name for table_name, _ in ARCHIVE_TABLES if table_name in manifest['tables']]
+            # Stage every member with COPY FROM
+            staged_columns = {}
+            for table_name in tables:
+                archived = manifest['tables'][table_name]['columns']
+                current = set(_table_columns(table_name))
+                stage = _quote(f'restore_{table_name}')
+                # Stage with the target column types; columns dropped since the dump stay text
+                stage_columns = ', '.join(
+                    f't.{_quote(c)}' if c in current else f'NULL::text AS {_quote(c)}'
+                    for c in archived
+                )
+                cursor.execute(
+                    f'CREATE TEMP TABLE {stage} ON COMMIT DROP AS '
+                    f'SELECT {stage_columns} FROM {_quote(table_name)} t WITH NO DATA'
+                )
+                cursor.copy_expert(
+                    f'COPY {stage} FROM STDIN WITH (FORMAT csv, HEADER true)',
+                    archive.extractfile(f'{table_name}.csv')
+                )
+                staged_columns[table_name] = [
+                    c for c in archived
+                    if c in current and c not in GENERATED_COLUMNS.get(table_name, set())
+                ]
+
+            if name:
+                cursor.execute('SELECT 1 FROM projects WHERE name = %s', (name,))
+                if cursor.fetchone() is not None:
+                    raise ValueError(f'A project named {name!r} already exists')
+            else:
+                cursor.execute('SELECT name FROM restore_projects')
+                name = _restored_name(cursor, cursor.fetchone()[0])
+
+            # One old -> new UUID map for every remapped ID
+            cursor.execute(
+                'CREATE TEMP TABLE restore_id_map (old_id text PRIMARY KEY, new_id text NOT NULL) ON COMMIT DROP'
+            )
+            cursor.execute(
+                'INSERT INTO restore_id_map (old_id, new_id) '
+                'SELECT id, gen_random_uuid()::text FROM ('
+                + ' UNION ALL '.join(f'SELECT id FROM {_quote(f"restore_{t}")}' for t in ID_TABLES if t in tables)
+                + ') ids'
+            )
+
+            for table_name in tables:
+                columns = staged_columns[table_name]
+                remapped = REMAPPED_COLUMNS.get(table_name, set())
+                expressions = []
+                for column in columns:
+                    if column in remapped:
+                        expressions.append(
+                            f'(SELECT new_id FROM restore_id_map WHERE old_id = s.{_quote(column)})'
+                        )
+                    elif table_name == 'projects' and column == 'name':
+                        expressions.append('%(name)s')
+                    else:
+                        expressions.append(f's.{_quote(column)}')
+                order_column = ROW_ORDER.get(table_name)
+                order = ''
+                if order_column in manifest['tables'][table_name]['columns']:
+                    order = f' ORDER BY s.{_quote(order_column)}'
+                cursor.execute(
+                    f'INSERT INTO {_quote(table_name)} ({", ".join(_quote(c) for c in columns)}) '
+                    f'SELECT {", ".join(expressions)} FROM {_quote(f"restore_{table_name}")} s{order}',
+                    {'name': name}
+                )
+
+            cursor.execute(
+                'SELECT new_id FROM restore_id_map m JOIN restore_projects p ON p.id = m.old_id'
+            )
+            new_project_id = cursor.fetchone()[0]
+            for user_id in grant_user_ids:
+                cursor.execute(
+                    'INSERT INTO user_projects (user_id, project_id) VALUES (%s, %s) ON CONFLICT DO NOTHING',
+                    (user_id, new_project_id)
+                )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+    return new_project_id
@@ -0,0 +1,96 @@
+"""Keyset-paginated reads of the ``cell_history`` audit trail.
+
+Pages are ordered newest first by ``(changed_at, id)``. A cursor encodes
+the sort key of the last row on a page, so the next page is an index range
+scan that starts right after it instead of an ``OFFSET`` that re-reads
+every skipped row.
+"""
+
+import base64
+from datetime import datetime
+import json
+
+from sqlalchemy import select, tuple_
+
+from app import db
+from app.models import CellHistory, Requirement
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_key(timestamp, key):
+    """Cursor for the keyset position ``(timestamp, key)``"""
+    raw = json.dumps([timestamp.isoformat(), key])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_key(cursor, key_type=int):
+    try:
+        timestamp, key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(timestamp), key_type(key)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def encode_cursor(entry):
+    return encode_key(entry.changed_at, entry.id)
+
+
+def decode_cursor(cursor):
+    return decode_key(cursor)
+
+
+def page_size(value, default):
+    """Parse a ``limit`` query argument, clamped to ``1..MAX_PAGE_SIZE``"""
+    if value is None:
+        return default
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('Invalid limit')
+
+
+def history_page(conditions, limit, cursor=None):
+    """Return ``(entries, next_cursor)`` for history rows matching ``conditions``, newest first"""
+    query = select(CellHistory).where(*conditions)
+    if cursor:
+        query = query.where(tuple_(CellHistory.changed_at, CellHistory.id) < decode_cursor(cursor))
+    query = query.order_by(CellHistory.changed_at.desc(), CellHistory.id.desc()).limit(limit + 1)
+    entries = db.session.execute(query).scalars().all()
+    if len(entries) <= limit:
+        return entries, None
+    entries = entries[:limit]
+    return entries, encode_cursor(entries[-1])
+
+
+def requirement_history_page(requirement_id, limit, cursor=None):
+    """One page of a requirement's history (``requirement_id`` is the requirement UUID)"""
+    return history_page([CellHistory.requirement_id == requirement_id], limit, cursor)
+
+
+def project_feed_page(project_id, limit, cursor=None, changed_by=None, field_name=None,
+                      since=None, until=None, requirement_id=None):
+    """One page of a project's audit feed, optionally filtered by user, field, time range or requirement"""
+    conditions = [CellHistory.project_id == project_id]
+    if changed_by:
+        conditions.append(CellHistory.changed_by == changed_by)
+    if field_name:
+        conditions.append(CellHistory.field_name == field_name)
+    if since:
+        conditions.append(CellHistory.changed_at >= since)
+    if until:
+        conditions.append(CellHistory.changed_at < until)
+    if requirement_id:
+        conditions.append(CellHistory.requirement_id == requirement_id)
+    return history_page(conditions, limit, cursor)
+
+
+def requirement_labels(entries):
+    """Map the requirement UUIDs of a page of entries to their display IDs"""
+    ids = {entry.requirement_id for entry in entries}
+    if not ids:
+        return {}
+    rows = db.session.execute(
+        select(Requirement.id, Requirement.requirement_id).where(Requirement.id.in_(ids))
+    )
+    return dict(rows.all())
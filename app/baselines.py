@@ -0,0 +1,165 @@
+"""Named project baselines and baseline diffs.
+
+A baseline stores the project's requirements and links as two Parquet
+files. Every requirement row carries a 64-bit hash of its content columns,
+so a diff joins two baselines (or a baseline and the live project) on the
+requirement ID and compares one integer per row; only rows whose hash
+differs are inspected column by column.
+"""
+
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app import columnar
+from app.models import Baseline
+
+# Requirement columns whose change makes a requirement "changed" in a diff
+# (requirement_id and title first; diff entries read them by position)
+HASHED_COLUMNS = ['requirement_id', 'title', 'description', 'status', 'chapter', 'verification_method', 'group_id']
+
+REQUIREMENT_COLUMNS = ['id'] + HASHED_COLUMNS + ['group_name']
+
+LINK_COLUMNS = ['parent_id', 'child_id', 'parent_requirement_id', 'child_requirement_id']
+
+
+def _dataset_table(project_id, dataset):
+    return pa.Table.from_batches(
+        list(columnar.iter_record_batches(project_id, dataset)), schema=columnar.SCHEMAS[dataset]
+    )
+
+
+def _content_frame(table, columns):
+    # Dictionary-encoded columns become categoricals; compare and hash plain values
+    frame = table.select(columns).to_pandas().astype(object)
+    return frame.where(frame.notna(), None)
+
+
+def capture(project_id):
+    """Current requirements (with row hashes) and links of a project as Arrow tables"""
+    requirements = _dataset_table(project_id, 'requirements').select(REQUIREMENT_COLUMNS)
+    row_hash = pd.util.hash_pandas_object(_content_frame(requirements, HASHED_COLUMNS), index=False)
+    requirements = requirements.append_column('row_hash', pa.array(row_hash.to_numpy(), type=pa.uint64()))
+    links = _dataset_table(project_id, 'links').select(LINK_COLUMNS)
+    return requirements, links
+
+
+def _to_parquet(table):
+    output = io.BytesIO()
+    pq.write_table(table, output, compression='zstd')
+    return output.getvalue()
+
+
+def _from_parquet(payload):
+    return pq.read_table(pa.BufferReader(payload))
+
+
+def create_baseline(project_id, name, description, created_by):
+    """Freeze the project's current state as a new baseline; the caller adds and commits it"""
+    requirements, links = capture(project_id)
+    return Baseline(
+        project_id=project_id,
+        name=name,
+        description=description,
+        created_by=created_by,
+        requirements_count=requirements.num_rows,
+        links_count=links.num_rows,
+        requirements_payload=_to_parquet(requirements),
+        links_payload=_to_parquet(links)
+    )
+
+
+def load(baseline):
+    """Requirements and links tables of a stored baseline"""
+    return _from_parquet(baseline.requirements_payload), _from_parquet(baseline.links_payload)
+
+
+def _rows_with_ids(table, ids):
+    """Content frame of only the listed requirements, indexed by ID"""
+    subset = table.filter(pc.is_in(table['id'], value_set=pa.array(list(ids), type=pa.string())))
+    return _content_frame(subset, REQUIREMENT_COLUMNS).set_index('id', drop=False)
+
+
+def _requirement_refs(frame):
+    return [
+        {'id': row.id, 'requirement_id': row.requirement_id, 'title': row.title}
+        for row in frame.sort_values('requirement_id').itertuples()
+    ]
+
+
+def diff(old, new):
+    """Compare two ``(requirements, links)`` captures; returns added/removed/changed rows"""
+    old_requirements, old_links = old
+    new_requirements, new_links = new
+
+    keys = ['id', 'row_hash']
+    merged = old_requirements.select(keys).to_pandas().merge(
+        new_requirements.select(keys).to_pandas(), on='id', how='outer', suffixes=('_old', '_new'), indicator=True
+    )
+    added_ids = merged.loc[merged['_merge'] == 'right_only', 'id']
+    removed_ids = merged.loc[merged['_merge'] == 'left_only', 'id']
+    changed_ids = merged.loc[
+        (merged['_merge'] == 'both') & (merged['row_hash_old'] != merged['row_hash_new']), 'id'
+    ]
+
+    # Only rows that differ are converted for column-by-column comparison
+    old_frame = _rows_with_ids(old_requirements, pd.concat([removed_ids, changed_ids]))
+    new_frame = _rows_with_ids(new_requirements, pd.concat([added_ids, changed_ids]))
+    before = old_frame.loc[changed_ids, HASHED_COLUMNS]
+    after = new_frame.loc[changed_ids, HASHED_COLUMNS]
+    differs = (before != after) & ~(before.isna() & after.isna())
+    changed = []
+    for requirement_id, old_row, new_row, flags in zip(
+        after.index, before.to_numpy(), after.to_numpy(), differs.to_numpy()
+    ):
+        changes = {
+            column: {'old': old_value, 'new': new_value}
+            for column, old_value, new_value, flag in zip(HASHED_COLUMNS, old_row, new_row, flags)
+            if flag
+        }
+        # Equal compared values despite a different hash: nothing to report
+        if not changes:
+            continue
+        changed.append({
+            'id': requirement_id,
+            'requirement_id': new_row[0],
+            'title': new_row[1],
+            'changes': changes
+        })
+    changed.sort(key=lambda change: change['requirement_id'])
+
+    link_keys = ['parent_id', 'child_id']
+    links = old_links.to_pandas().merge(
+        new_links.to_pandas(), on=link_keys, how='outer', suffixes=('_old', '_new'), indicator=True
+    )
+
+    def link_refs(side, suffix):
+        rows = links[links['_merge'] == side].sort_values([f'parent_requirement_id{suffix}', f'child_requirement_id{suffix}'])
+        return [
+            {'parent': parent, 'child': child}
+            for parent, child in zip(rows[f'parent_requirement_id{suffix}'], rows[f'child_requirement_id{suffix}'])
+        ]
+
+    added_links = link_refs('right_only', '_new')
+    removed_links = link_refs('left_only', '_old')
+    return {
+        'summary': {
+            'requirements_added': len(added_ids),
+            'requirements_removed': len(removed_ids),
+            'requirements_changed': len(changed),
+            'links_added': len(added_links),
+            'links_removed': len(removed_links)
+        },
+        'requirements': {
+            'added': _requirement_refs(new_frame.loc[added_ids]),
+            'removed': _requirement_refs(old_frame.loc[removed_ids]),
+            'changed': changed
+        },
+        'links': {
+            'added': added_links,
+            'removed': removed_links
+        }
+    }
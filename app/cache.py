@@ -0,0 +1,128 @@
+"""Per-project in-process caches that are invalidated when a write commits.
+
+Session hooks collect the project IDs touched by each flush, bump the
+projects' ``data_version`` inside the same transaction and invalidate every
+registered cache once the transaction commits. Code that writes with Core
+statements (bypassing the unit of work) calls ``mark_project_changed``.
+"""
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import CellHistory, Group, Project, Requirement
+
+_listeners = []
+_caches = []
+
+# Models whose rows are project data; others (snapshots, baselines) carry a
+# project_id without changing the project
+_PROJECT_DATA_MODELS = (Group, Requirement, CellHistory)
+
+
+def on_project_change(callback):
+    """Register ``callback(project_id)`` to run after a commit touching the project"""
+    _listeners.append(callback)
+    return callback
+
+
+def mark_project_changed(project_id, session=None):
+    """Record a project as changed in the current transaction"""
+    session = session or db.session()
+    session.info.setdefault('changed_projects', set()).add(project_id)
+
+
+def _project_of(obj):
+    # Project rows carry their own ID; data rows point at one
+    if isinstance(obj, Project):
+        return obj.id
+    if isinstance(obj, _PROJECT_DATA_MODELS):
+        return obj.project_id
+    return None
+
+
+def invalidate_project(project_id):
+    """Run the change callbacks for a project, e.g. one changed by another process"""
+    for callback in _listeners:
+        callback(project_id)
+
+
+def clear_all():
+    """Drop every ``ProjectCache`` entry of this process"""
+    for project_cache in _caches:
+        project_cache.clear()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_projects(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        project_id = _project_of(obj)
+        if project_id:
+            mark_project_changed(project_id, session)
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_data_versions(session):
+    # Flush first so the after_flush hook has seen every pending change
+    session.flush()
+    changed = session.info.get('changed_projects')
+    if not changed:
+        return
+    projects = Project.__table__
+    result = session.connection().execute(
+        projects.update()
+        .where(projects.c.id.in_(sorted(changed)))
+        # Keep updated_at untouched; it tracks edits to the project itself
+        .values(data_version=projects.c.data_version + 1, updated_at=projects.c.updated_at)
+        .returning(projects.c.id, projects.c.data_version)
+    )
+    # The versions this commit creates, e.g. for change notifications
+    session.info['data_versions'] = dict(result.all())
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_changed_projects(session):
+    session.info.pop('data_versions', None)
+    for project_id in session.info.pop('changed_projects', ()):
+        invalidate_project(project_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_projects(session):
+    session.info.pop('changed_projects', None)
+    session.info.pop('data_versions', None)
+
+
+class ProjectCache:
+    """Thread-safe cache of computed values per project with a TTL safety net"""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        on_project_change(self.invalidate)
+        _caches.append(self)
+
+    def get(self, project_id, key=None):
+        with self._lock:
+            entry = self._entries.get((project_id, key))
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def set(self, project_id, value, key=None):
+        with self._lock:
+            self._entries[(project_id, key)] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, project_id):
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == project_id]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
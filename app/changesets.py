@@ -0,0 +1,241 @@
+"""Change-sets: history entries grouped by the operation that wrote them.
+
+A route declares its operation with ``begin``; the first flush that writes
+history rows inserts the change-set row and stamps every new ``CellHistory``
+with its ID. Reverting a change-set restores the values it overwrote with a
+couple of set-based statements per field instead of replaying entries.
+"""
+
+from datetime import datetime
+import uuid
+
+from sqlalchemy import event, func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import Session, aliased
+
+from app import audit, db, history_codec
+from app.cache import mark_project_changed
+from app.models import CellHistory, Changeset, Requirement
+
+# History fields that map onto requirement columns and can be restored
+REVERTIBLE_FIELDS = ['title', 'description', 'status', 'chapter', 'verification_method', 'group_id']
+
+# Single edits historically recorded empty values as the string 'None'
+NULLABLE_FIELDS = {'description', 'chapter', 'verification_method'}
+
+
+class ChangesetConflict(Exception):
+    """Raised when later edits touched values a revert would overwrite"""
+
+    def __init__(self, conflicts):
+        super().__init__(f'{conflicts} changed values were edited again after this changeset')
+        self.conflicts = conflicts
+
+
+def begin(project_id, operation, created_by, description=None, session=None):
+    """Group the history written by the current transaction under a new changeset; returns its ID"""
+    session = session or db.session()
+    changeset_id = str(uuid.uuid4())
+    session.info['changeset'] = {
+        'id': changeset_id,
+        'project_id': project_id,
+        'operation': operation,
+        'description': description,
+        'created_by': created_by,
+        'written': False,
+    }
+    return changeset_id
+
+
+def _write_changeset(session):
+    pending = session.info['changeset']
+    if not pending['written']:
+        # Core insert, so the row exists before the history rows that reference it
+        session.connection().execute(insert(Changeset).values(
+            id=pending['id'],
+            project_id=pending['project_id'],
+            operation=pending['operation'],
+            description=pending['description'],
+            created_at=datetime.utcnow(),
+            created_by=pending['created_by'],
+        ))
+        pending['written'] = True
+    return pending['id']
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_history(session, flush_context, instances):
+    if 'changeset' not in session.info:
+        return
+    entries = [obj for obj in session.new if isinstance(obj, CellHistory) and obj.changeset_id is None]
+    if entries:
+        changeset_id = _write_changeset(session)
+        for entry in entries:
+            entry.changeset_id = changeset_id
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _end_changeset(session):
+    session.info.pop('changeset', None)
+
+
+def list_changesets(project_id, limit, cursor=None):
+    """Return ``(changesets, next_cursor)``: newest changesets of a project with their entry counts"""
+    counts = (
+        select(CellHistory.changeset_id, func.count().label('entries'))
+        .where(CellHistory.project_id == project_id, CellHistory.changeset_id.isnot(None))
+        .group_by(CellHistory.changeset_id)
+        .subquery()
+    )
+    query = (
+        select(Changeset, func.coalesce(counts.c.entries, 0))
+        .outerjoin(counts, counts.c.changeset_id == Changeset.id)
+        .where(Changeset.project_id == project_id)
+    )
+    if cursor:
+        # Keyset on (created_at, id), so changesets sharing a timestamp are not skipped
+        query = query.where(tuple_(Changeset.created_at, Changeset.id) < audit.decode_key(cursor, str))
+    rows = db.session.execute(
+        query.order_by(Changeset.created_at.desc(), Changeset.id.desc()).limit(limit + 1)
+    ).all()
+    changesets = []
+    for changeset, entries in rows[:limit]:
+        data = changeset.to_dict()
+        data['entries_count'] = entries
+        changesets.append(data)
+    if len(rows) <= limit:
+        return changesets, None
+    last = rows[limit - 1][0]
+    return changesets, audit.encode_key(last.created_at, last.id)
+
+
+def revert(changeset, reverted_by, force=False):
+    """Undo a changeset; returns the revert changeset ID and restored values per field.
+
+    Each field is restored to the old value of the changeset's first entry
+    for it. Requirements the changeset created are soft-deleted. Unless
+    ``force`` is set, a ``ChangesetConflict`` is raised when any of the
+    values was changed again afterwards. The caller commits.
+    """
+    if changeset.reverted_at:
+        raise ValueError('Changeset has already been reverted')
+
+    history = CellHistory.__table__
+    requirements = Requirement.__table__
+    connection = db.session.connection()
+
+    touched = (
+        select(
+            history.c.requirement_id, history.c.field_name,
+            func.min(history.c.id).label('first_id'), func.max(history.c.id).label('last_id')
+        )
+        .where(history.c.changeset_id == changeset.id)
+        .group_by(history.c.requirement_id, history.c.field_name)
+        .subquery()
+    )
+    later = history.alias('later')
+    conflicts = connection.execute(
+        select(func.count()).select_from(touched).where(
+            select(later.c.id).where(
+                later.c.requirement_id == touched.c.requirement_id,
+                later.c.field_name == touched.c.field_name,
+                later.c.id > touched.c.last_id
+            ).exists()
+        )
+    ).scalar()
+    if conflicts and not force:
+        raise ChangesetConflict(conflicts)
+
+    begin(changeset.project_id, 'revert', reverted_by, description=f'Revert of {changeset.operation} changeset {changeset.id}')
+    revert_id = _write_changeset(db.session())
+    now = datetime.utcnow()
+    history_columns = [
+        'requirement_id', 'project_id', 'field_name', 'old_value', 'new_value', 'changed_at', 'changed_by', 'changeset_id'
+    ]
+    restored = {}
+
+    # Requirements created by the changeset are soft-deleted like a manual delete
+    created = select(history.c.requirement_id).where(
+        history.c.changeset_id == changeset.id, history.c.field_name == 'created'
+    )
+    live_created = (requirements.c.id.in_(created), requirements.c.status != 'deleted')
+    connection.execute(history.insert().from_select(history_columns, select(
+        requirements.c.id, requirements.c.project_id, literal('status'), requirements.c.status,
+        literal('deleted'), literal(now), literal(reverted_by), literal(revert_id)
+    ).where(*live_created)))
+    restored['created'] = connection.execute(
+        update(requirements).where(*live_created).values(status='deleted', updated_at=now, updated_by=reverted_by)
+    ).rowcount
+
+    for field in REVERTIBLE_FIELDS:
+        first = (
+            select(history.c.requirement_id, history.c.old_value)
+            .where(
+                history.c.id.in_(select(touched.c.first_id).where(touched.c.field_name == field)),
+                history.c.value_encoding.is_(None)
+            )
+            .subquery()
+        )
+        value = func.nullif(first.c.old_value, 'None') if field in NULLABLE_FIELDS else first.c.old_value
+        differs = requirements.c[field].is_distinct_from(value)
+        small = func.coalesce(func.length(requirements.c[field]), 0) + func.coalesce(func.length(value), 0) \
+            <= history_codec.COMPRESS_THRESHOLD
+        # Record the revert before the values change, so old_value is the current value
+        connection.execute(history.insert().from_select(history_columns, select(
+            requirements.c.id, requirements.c.project_id, literal(field), requirements.c[field],
+            value, literal(now), literal(reverted_by), literal(revert_id)
+        ).join(first, first.c.requirement_id == requirements.c.id).where(differs, small)))
+        # Large values are written through the ORM, which stores them compactly
+        large = connection.execute(select(
+            requirements.c.id, requirements.c.project_id, requirements.c[field], value
+        ).join(first, first.c.requirement_id == requirements.c.id).where(differs, ~small)).all()
+        for requirement_id, project_id, current, old_value in large:
+            db.session.add(CellHistory(
+                requirement_id=requirement_id,
+                project_id=project_id,
+                field_name=field,
+                old_value=current,
+                new_value=old_value,
+                changed_at=now,
+                changed_by=reverted_by
+            ))
+        restored[field] = connection.execute(
+            update(requirements)
+            .where(requirements.c.id == first.c.requirement_id, differs)
+            .values({field: value, 'updated_at': now, 'updated_by': reverted_by})
+        ).rowcount
+
+    # Compactly stored (large) old values are decoded and restored one by one
+    first_entry = aliased(CellHistory)
+    encoded = db.session.execute(
+        select(first_entry).where(
+            first_entry.id.in_(select(touched.c.first_id)),
+            first_entry.value_encoding.isnot(None),
+            first_entry.field_name.in_(REVERTIBLE_FIELDS)
+        )
+    ).scalars().all()
+    for entry in encoded:
+        old_value, _ = entry.values()
+        requirement = db.session.get(Requirement, entry.requirement_id)
+        current = getattr(requirement, entry.field_name)
+        if current == old_value:
+            continue
+        db.session.add(CellHistory(
+            requirement_id=requirement.id,
+            project_id=requirement.project_id,
+            field_name=entry.field_name,
+            old_value=current,
+            new_value=old_value,
+            changed_at=now,
+            changed_by=reverted_by
+        ))
+        setattr(requirement, entry.field_name, old_value)
+        requirement.updated_at = now
+        requirement.updated_by = reverted_by
+        restored[entry.field_name] = restored.get(entry.field_name, 0) + 1
+
+    changeset.reverted_at = now
+    changeset.reverted_by = reverted_by
+    changeset.revert_changeset_id = revert_id
+    mark_project_changed(changeset.project_id)
+    return revert_id, restored
@@ -0,0 +1,115 @@
+"""Set-based project cloning.
+
+Every table is copied with a single ``INSERT ... SELECT`` that translates
+IDs through a temporary old -> new UUID table, so cloning costs a handful
+of statements regardless of project size.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, MetaData, String, Table, func, literal, select, union_all
+
+from app import db
+from app.models import CellHistory, Group, Requirement, requirement_links
+
+_groups = Group.__table__
+_requirements = Requirement.__table__
+_history = CellHistory.__table__
+
+
+def clone_project_data(source_id, target_id, current_user, include_positions=True, include_history=False):
+    """Copy groups, requirements, links (and optionally history) of one project into another.
+
+    The target project row must already be flushed. Runs in the caller's
+    transaction; returns the number of rows copied per table.
+    """
+    connection = db.session.connection()
+    now = datetime.utcnow()
+    id_map = Table(
+        'clone_id_map', MetaData(),
+        Column('old_id', String(36), primary_key=True),
+        Column('new_id', String(36), nullable=False),
+        prefixes=['TEMPORARY'],
+        postgresql_on_commit='DROP'
+    )
+    id_map.create(connection)
+    connection.execute(id_map.insert().from_select(
+        ['old_id', 'new_id'],
+        union_all(
+            select(_groups.c.id, func.gen_random_uuid().cast(String))
+            .where(_groups.c.project_id == source_id),
+            select(_requirements.c.id, func.gen_random_uuid().cast(String))
+            .where(_requirements.c.project_id == source_id),
+        )
+    ))
+    counts = {}
+
+    parent_map = id_map.alias('parent_map')
+    new_group = id_map.alias('new_group')
+    counts['groups'] = connection.execute(_groups.insert().from_select(
+        ['id', 'name', 'description', 'parent_id', 'project_id', 'created_at', 'updated_at'],
+        select(
+            new_group.c.new_id, _groups.c.name, _groups.c.description, parent_map.c.new_id,
+            literal(target_id), literal(now), literal(now)
+        )
+        .join(new_group, new_group.c.old_id == _groups.c.id)
+        .outerjoin(parent_map, parent_map.c.old_id == _groups.c.parent_id)
+        .where(_groups.c.project_id == source_id)
+    )).rowcount
+
+    new_req = id_map.alias('new_req')
+    group_map = id_map.alias('group_map')
+    position_x = _requirements.c.graph_x if include_positions else literal(None)
+    position_y = _requirements.c.graph_y if include_positions else literal(None)
+    counts['requirements'] = connection.execute(_requirements.insert().from_select(
+        [
+            'id', 'requirement_id', 'title', 'description', 'status', 'group_id', 'project_id',
+            'created_at', 'updated_at', 'created_by', 'updated_by', 'chapter',
+            'verification_method', 'graph_x', 'graph_y'
+        ],
+        select(
+            new_req.c.new_id, _requirements.c.requirement_id, _requirements.c.title,
+            _requirements.c.description, _requirements.c.status, group_map.c.new_id,
+            literal(target_id), literal(now), literal(now), literal(current_user),
+            literal(current_user), _requirements.c.chapter,
+            _requirements.c.verification_method, position_x, position_y
+        )
+        .join(new_req, new_req.c.old_id == _requirements.c.id)
+        .join(group_map, group_map.c.old_id == _requirements.c.group_id)
+        .where(_requirements.c.project_id == source_id)
+    )).rowcount
+
+    parent_req = id_map.alias('parent_req')
+    child_req = id_map.alias('child_req')
+    counts['requirement_links'] = connection.execute(requirement_links.insert().from_select(
+        ['parent_id', 'child_id', 'suspect', 'suspect_since'],
+        select(
+            parent_req.c.new_id, child_req.c.new_id,
+            requirement_links.c.suspect, requirement_links.c.suspect_since
+        )
+        .join(parent_req, parent_req.c.old_id == requirement_links.c.parent_id)
+        .join(child_req, child_req.c.old_id == requirement_links.c.child_id)
+    )).rowcount
+
+    if include_history:
+        history_req = id_map.alias('history_req')
+        counts['cell_history'] = connection.execute(_history.insert().from_select(
+            [
+                'requirement_id', 'project_id', 'field_name', 'old_value', 'new_value',
+                'value_encoding', 'old_value_blob', 'new_value_blob', 'changed_at', 'changed_by'
+            ],
+            select(
+                history_req.c.new_id, literal(target_id), _history.c.field_name,
+                _history.c.old_value, _history.c.new_value, _history.c.value_encoding,
+                _history.c.old_value_blob, _history.c.new_value_blob,
+                _history.c.changed_at, _history.c.changed_by
+            )
+            .join(history_req, history_req.c.old_id == _history.c.requirement_id)
+            .where(_history.c.project_id == source_id)
+            # New IDs keep the entries' order (revert and as-of replay rely on it)
+            .order_by(_history.c.id)
+        )).rowcount
+
+    # Dropped now so the transaction can clone again; on failure the rollback removes it
+    id_map.drop(connection)
+    return counts
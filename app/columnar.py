@@ -0,0 +1,199 @@
+"""Typed columnar (Parquet / Arrow IPC) export and import.
+
+Datasets are read in batches from a server-side cursor and converted to
+Arrow record batches with explicit types; low-cardinality text columns
+(status, group, field name, ...) are dictionary-encoded.
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app import db, history_codec
+from app.models import CellHistory, Group, Requirement, requirement_links
+from app.exports import EXPORT_BATCH_SIZE
+
+COLUMNAR_FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrows', 'application/vnd.apache.arrow.stream'),
+}
+
+_dict_string = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMAS = {
+    'requirements': pa.schema([
+        ('id', pa.string()),
+        ('requirement_id', pa.string()),
+        ('title', pa.string()),
+        ('description', pa.large_string()),
+        ('status', _dict_string),
+        ('chapter', _dict_string),
+        ('verification_method', _dict_string),
+        ('group_id', pa.string()),
+        ('group_name', _dict_string),
+        ('parent_ids', pa.list_(pa.string())),
+        ('graph_x', pa.float64()),
+        ('graph_y', pa.float64()),
+        ('created_at', pa.timestamp('us')),
+        ('updated_at', pa.timestamp('us')),
+        ('created_by', _dict_string),
+        ('updated_by', _dict_string),
+    ]),
+    'links': pa.schema([
+        ('parent_id', pa.string()),
+        ('child_id', pa.string()),
+        ('parent_requirement_id', pa.string()),
+        ('child_requirement_id', pa.string()),
+        ('suspect', pa.bool_()),
+        ('suspect_since', pa.timestamp('us')),
+    ]),
+    'history': pa.schema([
+        ('id', pa.int64()),
+        ('requirement_uuid', pa.string()),
+        ('requirement_id', pa.string()),
+        ('field_name', _dict_string),
+        ('old_value', pa.large_string()),
+        ('new_value', pa.large_string()),
+        ('changed_at', pa.timestamp('us')),
+        ('changed_by', _dict_string),
+    ]),
+}
+
+
+def _requirements_query(project_id):
+    parent = Requirement.__table__.alias('parent')
+    parent_ids = (
+        select(
+            requirement_links.c.child_id,
+            func.array_agg(
+                aggregate_order_by(parent.c.requirement_id, parent.c.requirement_id)
+            ).label('parent_ids')
+        )
+        .join(parent, parent.c.id == requirement_links.c.parent_id)
+        .where(parent.c.project_id == project_id)
+        .group_by(requirement_links.c.child_id)
+        .subquery()
+    )
+    return (
+        select(
+            Requirement.id, Requirement.requirement_id, Requirement.title, Requirement.description,
+            Requirement.status, Requirement.chapter, Requirement.verification_method,
+            Requirement.group_id, Group.name, parent_ids.c.parent_ids,
+            Requirement.graph_x, Requirement.graph_y,
+            Requirement.created_at, Requirement.updated_at,
+            Requirement.created_by, Requirement.updated_by,
+        )
+        .outerjoin(Group, Group.id == Requirement.group_id)
+        .outerjoin(parent_ids, parent_ids.c.child_id == Requirement.id)
+        .where(Requirement.project_id == project_id)
+        .order_by(Requirement.requirement_id)
+    )
+
+
+def _links_query(project_id):
+    parent = Requirement.__table__.alias('parent')
+    child = Requirement.__table__.alias('child')
+    return (
+        select(
+            requirement_links.c.parent_id, requirement_links.c.child_id,
+            parent.c.requirement_id, child.c.requirement_id,
+            requirement_links.c.suspect, requirement_links.c.suspect_since,
+        )
+        .select_from(requirement_links)
+        .join(parent, parent.c.id == requirement_links.c.parent_id)
+        .join(child, child.c.id == requirement_links.c.child_id)
+        .where(parent.c.project_id == project_id)
+        .order_by(parent.c.requirement_id, child.c.requirement_id)
+    )
+
+
+def _history_query(project_id):
+    return (
+        select(
+            CellHistory.id, CellHistory.requirement_id, Requirement.requirement_id,
+            CellHistory.field_name, CellHistory.old_value, CellHistory.new_value,
+            CellHistory.changed_at, CellHistory.changed_by,
+            CellHistory.value_encoding, CellHistory.old_value_blob, CellHistory.new_value_blob,
+        )
+        .join(Requirement, Requirement.id == CellHistory.requirement_id)
+        .where(CellHistory.project_id == project_id)
+        .order_by(CellHistory.id)
+    )
+
+
+def _decode_history_row(row):
+    old_value, new_value = history_codec.decode(row[8], row[4], row[5], row[9], row[10])
+    return row[:4] + (old_value, new_value) + row[6:8]
+
+
+_QUERIES = {
+    'requirements': _requirements_query,
+    'links': _links_query,
+    'history': _history_query,
+}
+
+# Per-dataset row rewrites applied before conversion to Arrow
+_ROW_DECODERS = {
+    'history': _decode_history_row,
+}
+
+
+def iter_record_batches(project_id, dataset, *conditions):
+    """Yield typed Arrow record batches for one dataset of a project, optionally narrowed by ``conditions``"""
+    schema = SCHEMAS[dataset]
+    query = _QUERIES[dataset](project_id)
+    if conditions:
+        query = query.where(*conditions)
+    query = query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+    result = db.session.execute(query)
+    decode = _ROW_DECODERS.get(dataset)
+    for rows in result.partitions():
+        if decode:
+            rows = [decode(tuple(row)) for row in rows]
+        columns = list(zip(*rows))
+        arrays = []
+        for field, values in zip(schema, columns):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_dataset(project_id, dataset, columnar_format, output):
+    """Write a dataset as Parquet or as an Arrow IPC stream into ``output``"""
+    schema = SCHEMAS[dataset]
+    sink = pa.PythonFile(output, mode='w')
+    if columnar_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    with writer:
+        for batch in iter_record_batches(project_id, dataset):
+            writer.write_batch(batch)
+    return output
+
+
+def read_requirements_frame(stream, columnar_format):
+    """Read an uploaded requirements dataset into a DataFrame for the bulk import path"""
+    if columnar_format == 'parquet':
+        table = pq.read_table(stream)
+    else:
+        table = pa.ipc.open_stream(stream).read_all()
+    missing = {'requirement_id', 'title'} - set(table.column_names)
+    if missing:
+        raise ValueError(f"Missing required columns: {sorted(missing)}")
+    frame = table.to_pandas()
+    frame['description'] = frame['description'].fillna('') if 'description' in frame else ''
+    frame['status'] = frame['status'].astype(object).fillna('Draft') if 'status' in frame else 'Draft'
+    # Map the columnar field names onto the spreadsheet import headers
+    return frame.rename(columns={
+        'requirement_id': 'Requirement ID',
+        'title': 'Title',
+        'description': 'Description',
+        'status': 'Status',
+        'chapter': 'Chapter',
+        'verification_method': 'Verification Method',
+        'parent_ids': 'Parent IDs',
+    })
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 class Config:
     """Base configuration class"""
@@ -11,9 +12,74 @@ class Config:
         raise RuntimeError('DATABASE_URL environment variable must be set to a valid PostgreSQL URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool per server process (see app.db_pool)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 30 * 60))  # seconds
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1').lower() == '1'
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))  # seconds
+    # Statement timeouts in milliseconds: CRUD routes, and exports/imports/background jobs
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 15 * 1000))
+    DB_LONG_STATEMENT_TIMEOUT = int(os.environ.get('DB_LONG_STATEMENT_TIMEOUT', 10 * 60 * 1000))
+    
+    # Optional streaming replica for read-only routes (see app.replica)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL') or None
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))  # seconds
+    REPLICA_READ_YOUR_WRITES = int(os.environ.get('REPLICA_READ_YOUR_WRITES', 10))  # seconds after a user's write
+    REPLICA_CHECK_INTERVAL = int(os.environ.get('REPLICA_CHECK_INTERVAL', 5))  # seconds between lag probes
+    
     # File upload configuration
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB default
+    
+    # Seconds a cached per-project result (e.g. coverage metrics) may be served
+    # before it is recomputed even without a local write
+    METRICS_CACHE_TTL = int(os.environ.get('METRICS_CACHE_TTL', 60))
+    
+    # Generated export files, reused while the project is unchanged
+    EXPORT_CACHE_ENABLED = os.environ.get('EXPORT_CACHE_ENABLED', '1').lower() == '1'
+    EXPORT_CACHE_FOLDER = os.environ.get('EXPORT_CACHE_FOLDER', os.path.join(UPLOAD_FOLDER, 'export_cache'))
+    EXPORT_CACHE_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # 512MB default
+    EXPORT_CACHE_MAX_AGE = int(os.environ.get('EXPORT_CACHE_MAX_AGE', 24 * 60 * 60))  # seconds
+    
+    # History entries returned with a requirement and per history page by default
+    HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE', 50))
+    
+    # Seconds between background snapshots of changed projects for as-of reads (0 disables)
+    SNAPSHOT_INTERVAL = int(os.environ.get('SNAPSHOT_INTERVAL', 60 * 60))
+    # Newest snapshots kept per project; older ones are thinned to one per day
+    SNAPSHOT_KEEP_RECENT = int(os.environ.get('SNAPSHOT_KEEP_RECENT', 48))
+    
+    # Rows removed per transaction when a deleted project is purged in the background
+    PROJECT_DELETE_BATCH_SIZE = int(os.environ.get('PROJECT_DELETE_BATCH_SIZE', 1000))
+    
+    # Committed changes are broadcast to other server processes (PostgreSQL
+    # LISTEN/NOTIFY) and streamed to open browsers; each open stream holds one
+    # server thread, so size GUNICORN_THREADS for the expected viewers
+    LIVE_UPDATES_ENABLED = os.environ.get('LIVE_UPDATES_ENABLED', '1').lower() == '1'
+    LIVE_UPDATES_KEEPALIVE = int(os.environ.get('LIVE_UPDATES_KEEPALIVE', 15))  # seconds between keepalive comments
+    # Each open stream holds a server thread: cap them per process and recycle them
+    LIVE_UPDATES_MAX_STREAMS = int(os.environ.get('LIVE_UPDATES_MAX_STREAMS', 2))
+    LIVE_UPDATES_MAX_DURATION = int(os.environ.get('LIVE_UPDATES_MAX_DURATION', 300))  # seconds
+    
+    # Request metrics (Server-Timing header and /metrics); with METRICS_DIR set,
+    # server processes share their totals through files in that directory
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() == '1'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or None
+    METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 5))  # seconds
+    
+    # Level of the application's own log messages
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    
+    # Sessions are signed cookies carrying the user ID and session version, so any
+    # worker or node can verify them; cookies older than the lifetime are rejected
+    SESSION_TYPE = os.environ.get('SESSION_TYPE') or None
+    PERMANENT_SESSION_LIFETIME = timedelta(seconds=int(os.environ.get('SESSION_LIFETIME', 12 * 60 * 60)))
+    SESSION_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_SAMESITE = 'Lax'
+    SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', '0').lower() == '1'
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -0,0 +1,144 @@
+"""Connection pool settings, statement timeouts and pool telemetry.
+
+Engine options come from the ``DB_*`` configuration values. On
+PostgreSQL every connection starts with the short ``DB_STATEMENT_TIMEOUT``;
+routes marked ``@statement_timeout('long')`` (exports, imports, clones) and
+background jobs raise it for their transactions with ``SET LOCAL``, so a
+runaway query cannot hold a pooled connection indefinitely.
+"""
+
+from functools import wraps
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+
+class _PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited, failed=False):
+        with self._lock:
+            self.checkouts += 1
+            self.failures += failed
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkout_failures': self.failures,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = _PoolStats()
+        # Per thread: time spent opening new connections during the current checkout
+        self._connecting = threading.local()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            self._connecting.elapsed = getattr(self._connecting, 'elapsed', 0.0) + time.perf_counter() - started
+
+    def _waited(self, started):
+        # Opening an overflow connection is not waiting for a free one
+        return time.perf_counter() - started - self._connecting.elapsed
+
+    def _do_get(self):
+        self._connecting.elapsed = 0.0
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.stats.record(self._waited(started), failed=True)
+            raise
+        self.stats.record(self._waited(started))
+        return connection
+
+
+def engine_options(config, url=None):
+    """Engine options for ``url`` (default: ``SQLALCHEMY_DATABASE_URI``)"""
+    url = url or config['SQLALCHEMY_DATABASE_URI']
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if url.startswith('postgresql'):
+        options['connect_args'] = {
+            'connect_timeout': config['DB_CONNECT_TIMEOUT'],
+            'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}",
+        }
+    return options
+
+
+def statement_timeout(kind):
+    """Route decorator selecting a statement timeout class (``'default'`` or ``'long'``).
+
+    Place it directly under ``@app.route``, so it runs before the first query
+    of the request opens the transaction.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.statement_timeout = kind
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+@event.listens_for(Session, 'after_begin')
+def _apply_statement_timeout(session, transaction, connection):
+    if connection.dialect.name != 'postgresql':
+        return
+    # Requests use their route's class; background jobs always get the long timeout
+    kind = g.get('statement_timeout', 'default') if has_request_context() else 'long'
+    if kind == 'long':
+        timeout = current_app.config['DB_LONG_STATEMENT_TIMEOUT']
+        connection.execute(text(f'SET LOCAL statement_timeout = {int(timeout)}'))
+
+
+def pool_stats(engine):
+    """Live statistics of this process's connection pool"""
+    pool = engine.pool
+    stats = {
+        'pid': os.getpid(),
+        'pool_class': type(pool).__name__,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.stats.snapshot())
+    return stats
@@ -0,0 +1,104 @@
+"""On-disk cache of generated export files.
+
+Artifacts are keyed by project, project ``data_version``, format and the
+column/sheet set, so an unchanged project is exported once and then served
+from disk. The cache directory is bounded by total size and artifact age;
+the oldest artifacts are garbage-collected after every store.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+
+class ExportCache:
+    """Size- and age-bounded directory of export artifacts"""
+
+    def __init__(self, folder, max_bytes, max_age):
+        # Absolute, because send_file resolves relative paths against the app root
+        self.folder = os.path.abspath(folder)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def key(project_id, data_version, export_format, columns):
+        raw = '|'.join([project_id, str(data_version), export_format] + list(columns))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def path(self, key, export_format):
+        return os.path.join(self.folder, f'{key}.{export_format}')
+
+    def lookup(self, key, export_format):
+        """Return the artifact path if cached and fresh, else None"""
+        path = self.path(key, export_format)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            # Touch on hit so eviction is least-recently-used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def open_temp(self, export_format):
+        """Open a temporary file in the cache folder for an artifact being built"""
+        return tempfile.NamedTemporaryFile(
+            dir=self.folder, prefix='.building-', suffix=f'.{export_format}', delete=False
+        )
+
+    def commit(self, temp_path, key, export_format):
+        """Atomically publish a finished artifact and garbage-collect the folder"""
+        path = self.path(key, export_format)
+        os.replace(temp_path, path)
+        self.collect_garbage(keep=path)
+        return path
+
+    @staticmethod
+    def discard(temp_path):
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def tee(self, chunks, key, export_format):
+        """Pass streamed text chunks through while writing them into the cache"""
+        temp = self.open_temp(export_format)
+        try:
+            with temp:
+                for chunk in chunks:
+                    temp.write(chunk.encode('utf-8'))
+                    yield chunk
+        except BaseException:
+            # Client went away or the query failed: never publish a partial file
+            self.discard(temp.name)
+            raise
+        self.commit(temp.name, key, export_format)
+
+    def collect_garbage(self, keep=None):
+        """Remove expired artifacts, then the least recently used ones above the size limit"""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.folder):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            # Builds in progress get a generous grace period before being treated as abandoned
+            limit = self.max_age * 2 if entry.name.startswith('.building-') else self.max_age
+            if now - stat.st_mtime > limit:
+                self.discard(entry.path)
+            elif not entry.name.startswith('.building-'):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self.discard(path)
+            total -= size
@@ -0,0 +1,232 @@
+"""Export builders that stream their output instead of materialising tables."""
+
+import csv
+import io
+import tempfile
+
+import numpy as np
+from openpyxl import Workbook
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app import db
+from app.models import Group, Project, Requirement, requirement_links
+
+VERIFICATION_METHODS = ['A', 'RoD', 'I', 'T']
+
+EXPORT_COLUMNS = [
+    'Requirement ID', 'Title', 'Description', 'Status', 'Group', 'Project',
+    'Parent IDs', 'Created At', 'Updated At', 'Created By', 'Updated By'
+]
+
+# Rows fetched per round trip when streaming from a server-side cursor
+EXPORT_BATCH_SIZE = 2000
+
+
+class SparseMatrix:
+    """Boolean matrix kept as sorted COO coordinates with CSR row offsets"""
+
+    def __init__(self, row_labels, col_labels, rows, cols):
+        self.row_labels = row_labels
+        self.col_labels = col_labels
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        order = np.lexsort((cols, rows))
+        self.rows = rows[order]
+        self.cols = cols[order]
+        self.row_offsets = np.searchsorted(self.rows, np.arange(len(row_labels) + 1))
+
+    def row(self, i):
+        """Column indices set in row ``i``"""
+        return self.cols[self.row_offsets[i]:self.row_offsets[i + 1]]
+
+    def iter_dense_rows(self, mark='X'):
+        """Yield each row as label cells followed by one cell per column"""
+        width = len(self.col_labels)
+        for i, label in enumerate(self.row_labels):
+            cells = [''] * width
+            for j in self.row(i).tolist():
+                cells[j] = mark
+            yield list(label) + cells
+
+
+def requirement_rows(project_id):
+    """Yield export rows for a project in ``EXPORT_COLUMNS`` order.
+
+    Parent IDs are pre-aggregated with one ``string_agg`` and the result is
+    read through a server-side cursor, so no ORM objects or lazy loads are
+    involved. Must be consumed inside an app context.
+    """
+    parent = Requirement.__table__.alias('parent')
+    parent_ids = (
+        select(
+            requirement_links.c.child_id,
+            func.string_agg(
+                parent.c.requirement_id,
+                aggregate_order_by(literal(', '), parent.c.requirement_id)
+            ).label('parent_ids')
+        )
+        .join(parent, parent.c.id == requirement_links.c.parent_id)
+        .where(parent.c.project_id == project_id)
+        .group_by(requirement_links.c.child_id)
+        .subquery()
+    )
+    query = (
+        select(
+            Requirement.requirement_id,
+            Requirement.title,
+            Requirement.description,
+            Requirement.status,
+            func.coalesce(Group.name, 'Default'),
+            func.coalesce(Project.name, 'Default'),
+            func.coalesce(parent_ids.c.parent_ids, ''),
+            Requirement.created_at,
+            Requirement.updated_at,
+            Requirement.created_by,
+            Requirement.updated_by,
+        )
+        .outerjoin(Group, Group.id == Requirement.group_id)
+        .outerjoin(Project, Project.id == Requirement.project_id)
+        .outerjoin(parent_ids, parent_ids.c.child_id == Requirement.id)
+        .where(Requirement.project_id == project_id)
+        .order_by(Requirement.requirement_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for row in db.session.execute(query):
+        yield tuple(row)
+
+
+GROUP_COLUMNS = ['Group', 'Description', 'Parent Group', 'Created At', 'Updated At']
+
+LINK_COLUMNS = ['Parent ID', 'Child ID', 'Suspect', 'Suspect Since']
+
+
+def group_rows(project_id):
+    """Yield group export rows for a project"""
+    parent = Group.__table__.alias('parent_group')
+    query = (
+        select(Group.name, Group.description, parent.c.name, Group.created_at, Group.updated_at)
+        .outerjoin(parent, parent.c.id == Group.parent_id)
+        .where(Group.project_id == project_id)
+        .order_by(Group.name)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for row in db.session.execute(query):
+        yield tuple(row)
+
+
+def link_rows(project_id):
+    """Yield parent/child link export rows for a project"""
+    parent = Requirement.__table__.alias('parent')
+    child = Requirement.__table__.alias('child')
+    query = (
+        select(
+            parent.c.requirement_id, child.c.requirement_id,
+            requirement_links.c.suspect, requirement_links.c.suspect_since
+        )
+        .select_from(requirement_links)
+        .join(parent, parent.c.id == requirement_links.c.parent_id)
+        .join(child, child.c.id == requirement_links.c.child_id)
+        .where(parent.c.project_id == project_id)
+        .order_by(parent.c.requirement_id, child.c.requirement_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for row in db.session.execute(query):
+        yield tuple(row)
+
+
+def _requirement_labels(project_id, group_ids):
+    query = (
+        select(Requirement.id, Requirement.requirement_id, Requirement.title)
+        .where(Requirement.project_id == project_id, Requirement.status != 'deleted')
+        .order_by(Requirement.requirement_id)
+    )
+    if group_ids:
+        query = query.where(Requirement.group_id.in_(group_ids))
+    return db.session.execute(query).all()
+
+
+def link_matrix(project_id, row_group_ids=None, col_group_ids=None):
+    """Parent x child matrix built straight from requirement_links"""
+    parents = _requirement_labels(project_id, row_group_ids)
+    children = _requirement_labels(project_id, col_group_ids)
+    row_of = {r.id: i for i, r in enumerate(parents)}
+    col_of = {r.id: j for j, r in enumerate(children)}
+
+    parent = Requirement.__table__.alias('parent')
+    links = db.session.execute(
+        select(requirement_links.c.parent_id, requirement_links.c.child_id)
+        .join(parent, parent.c.id == requirement_links.c.parent_id)
+        .where(parent.c.project_id == project_id)
+    )
+    rows, cols = [], []
+    for parent_id, child_id in links:
+        if parent_id in row_of and child_id in col_of:
+            rows.append(row_of[parent_id])
+            cols.append(col_of[child_id])
+
+    return SparseMatrix(
+        [(r.requirement_id, r.title) for r in parents],
+        [r.requirement_id for r in children],
+        rows, cols
+    )
+
+
+def verification_matrix(project_id, row_group_ids=None):
+    """Requirement x verification method matrix"""
+    query = (
+        select(Requirement.requirement_id, Requirement.title, Requirement.verification_method)
+        .where(Requirement.project_id == project_id, Requirement.status != 'deleted')
+        .order_by(Requirement.requirement_id)
+    )
+    if row_group_ids:
+        query = query.where(Requirement.group_id.in_(row_group_ids))
+    records = db.session.execute(query).all()
+
+    methods = list(VERIFICATION_METHODS)
+    rows, cols = [], []
+    for i, record in enumerate(records):
+        method = record.verification_method
+        if not method:
+            continue
+        if method not in methods:
+            methods.append(method)
+        rows.append(i)
+        cols.append(methods.index(method))
+
+    return SparseMatrix([(r.requirement_id, r.title) for r in records], methods, rows, cols)
+
+
+def iter_csv(header, rows):
+    """Encode rows as CSV one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+        yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+
+def write_xlsx(sheets, output=None):
+    """Write ``[(title, header, rows), ...]`` into a write-only workbook.
+
+    Rows are appended as they are produced so the workbook never holds the
+    sheet in memory. Writes into ``output`` if given, otherwise into a
+    spooled temporary file; returns the file rewound.
+    """
+    workbook = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        sheet = workbook.create_sheet(title=title)
+        if header:
+            sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,310 @@
+"""In-memory adjacency index over requirement links, one per project.
+
+The index keeps the project's requirement graph as CSR-style integer arrays
+(offsets + targets, in both directions) plus an ID <-> index map, so
+traversal queries never touch the ORM relationships. Link edits land in a
+small overlay of added and removed links that is merged into the arrays
+once it grows, so a single edit does not rebuild the index.
+"""
+
+from collections import deque, namedtuple
+import threading
+
+import numpy as np
+from sqlalchemy import select
+
+from app import db
+from app.models import Requirement, requirement_links
+
+
+_State = namedtuple('_State', 'arrays size added_children added_parents removed')
+
+
+class ProjectGraphIndex:
+    """Compact parent/child adjacency for a single project"""
+
+    # Edits are kept in a small overlay on top of the CSR arrays until it
+    # holds this many links (or this share of all links), then merged
+    COMPACT_MIN = 64
+    COMPACT_RATIO = 0.05
+
+    def __init__(self, project_id, nodes, edges):
+        self.project_id = project_id
+        # nodes: list of (uuid, requirement_id); edges: set of (parent_uuid, child_uuid)
+        self.ids = [node_id for node_id, _ in nodes]
+        self.labels = [label for _, label in nodes]
+        self.index_of = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.edges = set(edges)
+        self._build()
+
+    @classmethod
+    def load(cls, project_id):
+        """Build the index for a project with two queries on the primary"""
+        # Cached until the next write, so never built from a lagging replica
+        primary = {'bind': db.engine}
+        nodes = db.session.execute(
+            select(Requirement.id, Requirement.requirement_id)
+            .where(Requirement.project_id == project_id)
+            .order_by(Requirement.requirement_id),
+            bind_arguments=primary
+        ).all()
+        parent = Requirement.__table__.alias('parent')
+        edges = db.session.execute(
+            select(requirement_links.c.parent_id, requirement_links.c.child_id)
+            .join(parent, parent.c.id == requirement_links.c.parent_id)
+            .where(parent.c.project_id == project_id),
+            bind_arguments=primary
+        ).all()
+        return cls(project_id, [tuple(n) for n in nodes], [tuple(e) for e in edges])
+
+    def _build(self):
+        """(Re)build the CSR arrays from the edge set and clear the overlay"""
+        n = len(self.ids)
+        pairs = [
+            (self.index_of[p], self.index_of[c])
+            for p, c in self.edges
+            if p in self.index_of and c in self.index_of
+        ]
+        src = np.fromiter((p for p, _ in pairs), dtype=np.int32, count=len(pairs))
+        dst = np.fromiter((c for _, c in pairs), dtype=np.int32, count=len(pairs))
+        # Readers take the whole state in one attribute read, so they never
+        # combine arrays and overlay from different versions
+        self.state = _State(self._csr(src, dst, n) + self._csr(dst, src, n), n, {}, {}, frozenset())
+        self._pending = 0
+
+    @staticmethod
+    def _csr(src, dst, n):
+        order = np.argsort(src, kind='stable')
+        offsets = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+        return offsets, dst[order]
+
+    # Mutations (applied after the corresponding DB commit, under the module lock).
+    # Each one replaces the state with a copy of the overlay holding the edit.
+    def _edited(self, **changes):
+        self._pending += 1
+        if self._pending > max(self.COMPACT_MIN, self.COMPACT_RATIO * len(self.edges)):
+            self._build()
+        else:
+            self.state = self.state._replace(**changes)
+
+    def add_node(self, node_id, label):
+        if node_id in self.index_of:
+            return
+        self.index_of[node_id] = len(self.ids)
+        self.ids.append(node_id)
+        self.labels.append(label)
+        self.state = self.state._replace(size=len(self.ids))
+
+    def add_link(self, parent_id, child_id):
+        if (parent_id, child_id) in self.edges:
+            return
+        self.edges.add((parent_id, child_id))
+        if parent_id not in self.index_of or child_id not in self.index_of:
+            return
+        p, c = self.index_of[parent_id], self.index_of[child_id]
+        state = self.state
+        if (p, c) in state.removed:
+            # Restores a link of the CSR arrays
+            self._edited(removed=state.removed - {(p, c)})
+        else:
+            self._edited(
+                added_children=_appended(state.added_children, p, c),
+                added_parents=_appended(state.added_parents, c, p)
+            )
+
+    def remove_link(self, parent_id, child_id):
+        if (parent_id, child_id) not in self.edges:
+            return
+        self.edges.discard((parent_id, child_id))
+        if parent_id not in self.index_of or child_id not in self.index_of:
+            return
+        p, c = self.index_of[parent_id], self.index_of[child_id]
+        state = self.state
+        if c in state.added_children.get(p, ()):
+            self._edited(
+                added_children=_removed(state.added_children, p, c),
+                added_parents=_removed(state.added_parents, c, p)
+            )
+        else:
+            self._edited(removed=state.removed | {(p, c)})
+
+    def remove_parents(self, child_id):
+        child = self.index_of.get(child_id)
+        if child is None:
+            return
+        for parent in _neighbors(self.state, child, children=False):
+            self.remove_link(self.ids[parent], child_id)
+
+    # Queries
+    def _walk(self, node_id, children):
+        state = self.state
+        start = self.index_of.get(node_id)
+        if start is None or start >= state.size:
+            return []
+        seen = bytearray(state.size)
+        seen[start] = 1
+        queue = deque([start])
+        found = []
+        while queue:
+            i = queue.popleft()
+            for j in _neighbors(state, i, children):
+                if not seen[j]:
+                    seen[j] = 1
+                    found.append(j)
+                    queue.append(j)
+        return found
+
+    def ancestors(self, node_id):
+        """Indices of all transitive parents of a requirement"""
+        return self._walk(node_id, children=False)
+
+    def descendants(self, node_id):
+        """Indices of all transitive children of a requirement"""
+        return self._walk(node_id, children=True)
+
+    def topological_order(self):
+        """Return (order, remaining) using Kahn's algorithm; remaining nodes lie on or behind cycles"""
+        return self._topological_order(self.state)
+
+    @staticmethod
+    def _topological_order(state):
+        parent_offsets = state.arrays[2]
+        n = state.size
+        indegree = np.diff(parent_offsets).tolist() + [0] * (n - (len(parent_offsets) - 1))
+        for _, c in state.removed:
+            indegree[c] -= 1
+        for c, parents in state.added_parents.items():
+            indegree[c] += len(parents)
+        queue = deque(i for i in range(n) if indegree[i] == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in _neighbors(state, i, children=True):
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    queue.append(j)
+        remaining = [i for i in range(n) if indegree[i] > 0]
+        return order, remaining
+
+    def find_cycle(self):
+        """Return one cycle as a list of indices (first node repeated at the end), or []"""
+        state = self.state
+        _, remaining = self._topological_order(state)
+        if not remaining:
+            return []
+        candidates = set(remaining)
+        # Every remaining node has a remaining parent, so walking parents must loop
+        position = {}
+        path = []
+        i = remaining[0]
+        while i not in position:
+            position[i] = len(path)
+            path.append(i)
+            parents = _neighbors(state, i, children=False)
+            i = next(p for p in parents if p in candidates)
+        cycle = path[position[i]:] + [i]
+        cycle.reverse()
+        return cycle
+
+    def describe(self, indices):
+        """Map node indices to API-friendly dicts"""
+        return [{'id': self.ids[i], 'requirement_id': self.labels[i]} for i in indices]
+
+
+def _neighbors(state, i, children):
+    """Children (or parents) of node ``i``: the CSR slice adjusted by the overlay"""
+    offsets, targets = state.arrays[0:2] if children else state.arrays[2:4]
+    found = targets[offsets[i]:offsets[i + 1]].tolist() if i < len(offsets) - 1 else []
+    if state.removed:
+        found = [j for j in found if ((i, j) if children else (j, i)) not in state.removed]
+    added = (state.added_children if children else state.added_parents).get(i)
+    if added:
+        found.extend(added)
+    return found
+
+
+def _appended(adjacency, key, value):
+    copy = dict(adjacency)
+    copy[key] = adjacency.get(key, ()) + (value,)
+    return copy
+
+
+def _removed(adjacency, key, value):
+    copy = dict(adjacency)
+    remaining = tuple(v for v in adjacency[key] if v != value)
+    if remaining:
+        copy[key] = remaining
+    else:
+        del copy[key]
+    return copy
+
+
+_indexes = {}
+# Bumped by invalidations (per project, or all at once), so an index loaded
+# before a write is not cached after it
+_generations = {}
+_epoch = 0
+_lock = threading.Lock()
+
+
+def get_project_index(project_id):
+    """Return the cached index for a project, building it on first use"""
+    with _lock:
+        index = _indexes.get(project_id)
+        generation = (_epoch, _generations.get(project_id, 0))
+    if index is None:
+        index = ProjectGraphIndex.load(project_id)
+        with _lock:
+            if (_epoch, _generations.get(project_id, 0)) == generation:
+                index = _indexes.setdefault(project_id, index)
+    return index
+
+
+def invalidate_project_index(project_id):
+    """Drop the cached index so the next query rebuilds it"""
+    with _lock:
+        _indexes.pop(project_id, None)
+        _generations[project_id] = _generations.get(project_id, 0) + 1
+
+
+def invalidate_all():
+    """Drop every cached index of this process"""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        _indexes.clear()
+
+
+def _cached(project_id):
+    with _lock:
+        return _indexes.get(project_id)
+
+
+def on_requirement_created(project_id, node_id, label):
+    index = _cached(project_id)
+    if index is not None:
+        with _lock:
+            index.add_node(node_id, label)
+
+
+def on_link_added(project_id, parent_id, child_id):
+    index = _cached(project_id)
+    if index is not None:
+        with _lock:
+            index.add_link(parent_id, child_id)
+
+
+def on_link_removed(project_id, parent_id, child_id):
+    index = _cached(project_id)
+    if index is not None:
+        with _lock:
+            index.remove_link(parent_id, child_id)
+
+
+def on_parents_cleared(project_id, child_id):
+    index = _cached(project_id)
+    if index is not None:
+        with _lock:
+            index.remove_parents(child_id)
@@ -0,0 +1,82 @@
+"""Compact storage for large ``cell_history`` values.
+
+Small values stay in the plain ``old_value``/``new_value`` text columns.
+When an entry's values together exceed ``COMPRESS_THRESHOLD`` characters
+(long Markdown descriptions), the new value is stored zlib-compressed and
+the old value as a compressed line diff against it, or compressed as a
+whole if that is smaller. Every entry decodes on its own, without reading
+any other history row.
+"""
+
+import difflib
+import json
+import zlib
+
+COMPRESS_THRESHOLD = 1024
+
+PLAIN = None
+# Both values compressed independently
+COMPRESSED = 'z'
+# New value compressed, old value stored as a compressed diff against it
+DELTA = 'zd'
+
+
+def _compress(text):
+    return zlib.compress(text.encode('utf-8'), 9)
+
+
+def _decompress(blob):
+    return zlib.decompress(blob).decode('utf-8')
+
+
+def make_delta(base, target):
+    """Encode ``target`` as copies of ``base`` line ranges plus literal text"""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(target_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base, ops):
+    base_lines = base.splitlines(keepends=True)
+    return ''.join(
+        op if isinstance(op, str) else ''.join(base_lines[op[0]:op[1]])
+        for op in ops
+    )
+
+
+def encode(old_value, new_value):
+    """Return ``(encoding, old_value, new_value, old_blob, new_blob)`` for storage"""
+    size = len(old_value or '') + len(new_value or '')
+    if size <= COMPRESS_THRESHOLD:
+        return PLAIN, old_value, new_value, None, None
+
+    new_blob = _compress(new_value) if new_value is not None else None
+    old_blob = _compress(old_value) if old_value is not None else None
+    if old_value is None or new_value is None:
+        return COMPRESSED, None, None, old_blob, new_blob
+
+    delta_blob = zlib.compress(
+        json.dumps(make_delta(new_value, old_value), separators=(',', ':')).encode('utf-8'), 9
+    )
+    if len(delta_blob) < len(old_blob):
+        return DELTA, None, None, delta_blob, new_blob
+    return COMPRESSED, None, None, old_blob, new_blob
+
+
+def decode(encoding, old_value, new_value, old_blob, new_blob):
+    """Rebuild the full ``(old_value, new_value)`` of a stored entry"""
+    if encoding == PLAIN:
+        return old_value, new_value
+    new_value = _decompress(new_blob) if new_blob is not None else None
+    if old_blob is None:
+        return None, new_value
+    if encoding == DELTA:
+        return apply_delta(new_value, json.loads(zlib.decompress(old_blob))), new_value
+    return _decompress(old_blob), new_value
@@ -0,0 +1,331 @@
+"""Per-request performance metrics in Prometheus text format.
+
+Every request records, per route, its latency, the number of SQL statements
+and the time spent in them (SQLAlchemy cursor events), the response size
+and the number of rows serialized into its JSON body. The same request's
+figures are returned in a ``Server-Timing`` header for browser dev tools.
+With ``METRICS_DIR`` set (the Gunicorn config sets it), each server process
+writes its totals there every ``METRICS_FLUSH_INTERVAL`` seconds and
+``/metrics`` reports the sum over all processes; otherwise it reports the
+serving process only. When a worker exits, Gunicorn's ``child_exit`` hook
+folds its file into ``ARCHIVE_FILE``, so totals never go backwards and the
+directory does not grow with every recycled worker.
+"""
+
+from contextlib import contextmanager
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+COUNTERS = {
+    'http_requests_total': 'Requests by route and response status',
+}
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Time until the response is returned (excludes streamed bodies)', LATENCY_BUCKETS),
+    'http_request_sql_statements': ('SQL statements executed per request', STATEMENT_BUCKETS),
+    'http_request_sql_duration_seconds': ('Time spent executing SQL per request', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('Response body size, when known up front', SIZE_BUCKETS),
+    'http_response_rows': ('Rows serialized into the JSON response', ROW_BUCKETS),
+}
+
+
+class _Registry:
+    """Counters and histograms keyed by metric name and label tuple"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                histogram = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, labels, list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self.histograms.items()
+                ],
+            }
+
+
+registry = _Registry()
+
+_write_lock = threading.Lock()
+# (pid, start time) of the process owning the snapshot file
+_process_key = None
+
+ARCHIVE_FILE = 'archived.json'
+LOCK_FILE = '.lock'
+
+
+class _RequestMetrics:
+    __slots__ = ('started', 'sql_statements', 'sql_time', 'rows', 'serialize_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_statements = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.serialize_time = 0.0
+
+
+def _current():
+    return g.get('request_metrics') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current()
+    started = conn.info.pop('query_started', None)
+    if metrics is not None and started is not None:
+        metrics.sql_statements += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+def _count_rows(payload):
+    # API responses wrap their result as {'success': ..., 'data': ...}
+    data = payload.get('data') if isinstance(payload, dict) else payload
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        # e.g. graph responses: {'nodes': [...], 'edges': [...]}
+        nested = [len(value) for value in data.values() if isinstance(value, list)]
+        return sum(nested) if nested else 1
+    return 0 if data is None else 1
+
+
+class CountingJSONProvider(DefaultJSONProvider):
+    """JSON provider that records serialization time and rows for ``jsonify`` responses"""
+
+    def response(self, *args, **kwargs):
+        started = time.perf_counter()
+        response = super().response(*args, **kwargs)
+        metrics = _current()
+        if metrics is not None:
+            metrics.serialize_time += time.perf_counter() - started
+            metrics.rows += _count_rows(args[0] if len(args) == 1 else args or kwargs)
+        return response
+
+
+def _start_request():
+    g.request_metrics = _RequestMetrics()
+
+
+def _finish_request(response):
+    metrics = g.pop('request_metrics', None)
+    if metrics is None:
+        return response
+    duration = time.perf_counter() - metrics.started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    labels = (('method', request.method), ('route', route))
+    registry.inc('http_requests_total', labels + (('status', str(response.status_code)),))
+    registry.observe('http_request_duration_seconds', labels, duration)
+    registry.observe('http_request_sql_statements', labels, metrics.sql_statements)
+    registry.observe('http_request_sql_duration_seconds', labels, metrics.sql_time)
+    registry.observe('http_response_rows', labels, metrics.rows)
+    if response.content_length is not None:
+        registry.observe('http_response_size_bytes', labels, response.content_length)
+    response.headers.add('Server-Timing', ', '.join([
+        f'db;desc="SQL ({metrics.sql_statements} statements)";dur={metrics.sql_time * 1000:.1f}',
+        f'serialize;dur={metrics.serialize_time * 1000:.1f}',
+        f'app;dur={duration * 1000:.1f}',
+    ]))
+    return response
+
+
+def init_app(app):
+    """Record metrics for every request unless ``METRICS_ENABLED`` is off"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.json = CountingJSONProvider(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _snapshot_path(directory):
+    global _process_key
+    pid = os.getpid()
+    if _process_key is None or _process_key[0] != pid:
+        # The start time keeps a reused PID from overwriting an exited worker's file
+        _process_key = (pid, time.time_ns())
+    return os.path.join(directory, f'metrics-{pid}-{_process_key[1]}.json')
+
+
+def _write_json(path, data):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def write_snapshot(directory):
+    """Store this process's totals for the other processes' ``/metrics``"""
+    os.makedirs(directory, exist_ok=True)
+    with _write_lock:
+        _write_json(_snapshot_path(directory), registry.snapshot())
+
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    # Imported here: only Gunicorn deployments (POSIX) set METRICS_DIR
+    import fcntl
+
+    with open(os.path.join(directory, LOCK_FILE), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _read_snapshots(paths):
+    snapshots = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def archive_process(directory, pid):
+    """Fold an exited process's totals into the archive and remove its file (Gunicorn ``child_exit``)"""
+    paths = glob.glob(os.path.join(directory, f'metrics-{pid}-*.json'))
+    if not paths:
+        return False
+    archive = os.path.join(directory, ARCHIVE_FILE)
+    # Exclusive: a reader must not see the totals both archived and in the worker's file
+    with _directory_lock(directory, exclusive=True):
+        counters, histograms = _merge(_read_snapshots([archive] + paths))
+        _write_json(archive, {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [
+                [name, labels, counts, total, count]
+                for (name, labels), (counts, total, count) in histograms.items()
+            ],
+        })
+        for path in paths + glob.glob(os.path.join(directory, f'metrics-{pid}-*.json.tmp')):
+            os.remove(path)
+    return True
+
+
+def _merge(snapshots):
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total, count in snapshot['histograms']:
+            key = (name, tuple(tuple(label) for label in labels))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def _collect(directory):
+    if not directory:
+        return [registry.snapshot()]
+    write_snapshot(directory)
+    with _directory_lock(directory, exclusive=False):
+        paths = glob.glob(os.path.join(directory, 'metrics-*.json'))
+        return _read_snapshots(paths + [os.path.join(directory, ARCHIVE_FILE)])
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def render(directory=None):
+    """All metrics in the Prometheus text exposition format"""
+    counters, histograms = _merge(_collect(directory))
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def _flush(app, directory, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_snapshot(directory)
+        except OSError:
+            app.logger.exception('Writing metrics snapshot failed')
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher(app):
+    """Start the thread writing this process's totals to ``METRICS_DIR`` (once per process)"""
+    global _flusher
+    directory = app.config['METRICS_DIR']
+    if not app.config['METRICS_ENABLED'] or not directory:
+        return False
+    with _flusher_lock:
+        if _flusher is not None and _flusher.is_alive():
+            return False
+        _flusher = threading.Thread(
+            target=_flush, args=(app, directory, app.config['METRICS_FLUSH_INTERVAL']),
+            name='metrics-flusher', daemon=True
+        )
+        _flusher.start()
+    return True
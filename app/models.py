@@ -2,15 +2,16 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import uuid
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
 from sqlalchemy.orm import relationship
 
-from app import db
+from app import db, history_codec
 
 # Association table for user-project access (many-to-many)
 user_projects = db.Table(
     'user_projects',
     db.Column('user_id', db.String(36), db.ForeignKey('users.id'), primary_key=True),
-    db.Column('project_id', db.String(36), db.ForeignKey('projects.id'), primary_key=True)
+    db.Column('project_id', db.String(36), db.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
 )
 
 class Project(db.Model):
@@ -23,10 +24,14 @@ class Project(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = db.Column(db.String(100))
+    # Bumped on every commit that touches the project's data (see app.cache)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Set when the project is queued for background deletion (see app.project_deletion)
+    deleted_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
-    groups = db.relationship('Group', backref='project', lazy='dynamic', cascade='all, delete-orphan')
-    requirements = db.relationship('Requirement', backref='project', lazy='dynamic', cascade='all, delete-orphan')
+    groups = db.relationship('Group', backref='project', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    requirements = db.relationship('Requirement', backref='project', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
     users = db.relationship('User', secondary=user_projects, backref='projects')
     
     def __repr__(self):
@@ -55,6 +60,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=True)
     is_active = db.Column(db.Boolean, default=True)
+    # Stored in the session cookie; bumping it revokes every session of the user (see app.access)
+    session_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -85,8 +92,8 @@ class Group(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False, index=True)
     description = db.Column(db.Text)
-    parent_id = db.Column(db.String(36), db.ForeignKey('groups.id'), index=True)
-    project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False, index=True)
+    parent_id = db.Column(db.String(36), db.ForeignKey('groups.id', ondelete='CASCADE'), index=True)
+    project_id = db.Column(db.String(36), db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -122,8 +129,12 @@ class Group(db.Model):
 # Association table for many-to-many parent-child links
 requirement_links = db.Table(
     'requirement_links',
-    db.Column('parent_id', db.String(36), db.ForeignKey('requirements.id'), primary_key=True),
-    db.Column('child_id', db.String(36), db.ForeignKey('requirements.id'), primary_key=True)
+    db.Column('parent_id', db.String(36), db.ForeignKey('requirements.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('child_id', db.String(36), db.ForeignKey('requirements.id', ondelete='CASCADE'), primary_key=True),
+    # Set when an upstream requirement changed and the link needs re-review
+    db.Column('suspect', db.Boolean, nullable=False, default=False, server_default=db.false()),
+    db.Column('suspect_since', db.DateTime, nullable=True),
+    db.Index('ix_requirement_links_suspect', 'child_id', postgresql_where=db.text('suspect'))
 )
 
 class Requirement(db.Model):
@@ -136,7 +147,7 @@ class Requirement(db.Model):
     description = db.Column(db.Text)
     status = db.Column(db.String(50), default='Draft')
     group_id = db.Column(db.String(36), db.ForeignKey('groups.id'), nullable=False, index=True)
-    project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False, index=True)
+    project_id = db.Column(db.String(36), db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = db.Column(db.String(100))
@@ -193,32 +204,176 @@ class Requirement(db.Model):
             data['children'] = [c.to_dict(shallow=True) for c in self.children_m2m]
         return data
 
+class Changeset(db.Model):
+    """One user operation whose history entries can be listed and reverted together"""
+    __tablename__ = 'changesets'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = db.Column(db.String(36), db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    operation = db.Column(db.String(50), nullable=False)  # edit, delete, move, upload_csv, batch_update, revert, ...
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_by = db.Column(db.String(100))
+    reverted_at = db.Column(db.DateTime, nullable=True)
+    reverted_by = db.Column(db.String(100), nullable=True)
+    # Changeset written by the revert of this one
+    revert_changeset_id = db.Column(db.String(36), db.ForeignKey('changesets.id'), nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_changesets_project_created_at', 'project_id', db.text('created_at DESC')),
+    )
+    
+    def __repr__(self):
+        return f'<Changeset {self.operation} {self.id}>'
+    
+    def to_dict(self):
+        """Convert changeset to dictionary"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'operation': self.operation,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_by': self.created_by,
+            'reverted_at': self.reverted_at.isoformat() if self.reverted_at else None,
+            'reverted_by': self.reverted_by,
+            'revert_changeset_id': self.revert_changeset_id
+        }
+
 class CellHistory(db.Model):
     """Model to track changes to requirement fields"""
     __tablename__ = 'cell_history'
     
     id = db.Column(db.Integer, primary_key=True)
-    requirement_id = db.Column(db.String(36), db.ForeignKey('requirements.id'), nullable=False, index=True)
+    requirement_id = db.Column(db.String(36), db.ForeignKey('requirements.id', ondelete='CASCADE'), nullable=False)
+    # Denormalized from the requirement so project-wide audit queries need no join
+    project_id = db.Column(db.String(36), db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
     field_name = db.Column(db.String(100), nullable=False)
     old_value = db.Column(db.Text)
     new_value = db.Column(db.Text)
-    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Large values are stored compressed / delta-encoded instead (see app.history_codec)
+    value_encoding = db.Column(db.String(2), nullable=True)
+    old_value_blob = db.Column(db.LargeBinary, nullable=True)
+    new_value_blob = db.Column(db.LargeBinary, nullable=True)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     changed_by = db.Column(db.String(100), nullable=False)
+    # Operation (edit, upload, batch update, revert) that wrote this entry (see app.changesets)
+    changeset_id = db.Column(db.String(36), db.ForeignKey('changesets.id', ondelete='SET NULL'), nullable=True, index=True)
     
     # Relationship to requirement
-    requirement = db.relationship('Requirement', backref='history')
+    requirement = db.relationship('Requirement', backref=db.backref('history', passive_deletes=True))
+    
+    __table_args__ = (
+        # Newest-first history of one requirement, read with keyset pagination (see app.audit)
+        db.Index(
+            'ix_cell_history_requirement_changed_at',
+            'requirement_id', db.text('changed_at DESC'), db.text('id DESC')
+        ),
+        # Project audit feed, unfiltered and filtered by user or field
+        db.Index(
+            'ix_cell_history_project_changed_at',
+            'project_id', db.text('changed_at DESC'), db.text('id DESC')
+        ),
+        db.Index(
+            'ix_cell_history_project_user_changed_at',
+            'project_id', 'changed_by', db.text('changed_at DESC'), db.text('id DESC')
+        ),
+        db.Index(
+            'ix_cell_history_project_field_changed_at',
+            'project_id', 'field_name', db.text('changed_at DESC'), db.text('id DESC')
+        ),
+    )
     
     def __repr__(self):
         return f'<CellHistory {self.field_name}: {self.old_value} -> {self.new_value}>'
     
+    def values(self):
+        """Full (old_value, new_value), decoded if stored compactly"""
+        return history_codec.decode(
+            self.value_encoding, self.old_value, self.new_value, self.old_value_blob, self.new_value_blob
+        )
+    
     def to_dict(self):
         """Convert history record to dictionary"""
+        old_value, new_value = self.values()
         return {
             'id': self.id,
             'requirement_id': self.requirement_id,
             'field_name': self.field_name,
-            'old_value': self.old_value,
-            'new_value': self.new_value,
+            'old_value': old_value,
+            'new_value': new_value,
             'changed_at': self.changed_at.isoformat() if self.changed_at else None,
-            'changed_by': self.changed_by
+            'changed_by': self.changed_by,
+            'changeset_id': self.changeset_id
         } 
+
+class ProjectSnapshot(db.Model):
+    """Compact copy of a project's requirements taken at one point in time"""
+    __tablename__ = 'project_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.String(36), db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    taken_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    data_version = db.Column(db.Integer, nullable=False)
+    requirements_count = db.Column(db.Integer, nullable=False)
+    # Parquet file of the columnar 'requirements' dataset (see app.snapshots)
+    payload = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    
+    __table_args__ = (
+        db.Index('ix_project_snapshots_project_taken_at', 'project_id', 'taken_at'),
+    )
+    
+    def __repr__(self):
+        return f'<ProjectSnapshot {self.project_id} @ {self.taken_at}>'
+    
+    def to_dict(self):
+        """Convert snapshot metadata to dictionary (without payload)"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'taken_at': self.taken_at.isoformat() if self.taken_at else None,
+            'data_version': self.data_version,
+            'requirements_count': self.requirements_count
+        }
+
+class Baseline(db.Model):
+    """Named, immutable copy of a project's requirements and links"""
+    __tablename__ = 'baselines'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = db.Column(db.String(36), db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_by = db.Column(db.String(100))
+    requirements_count = db.Column(db.Integer, nullable=False)
+    links_count = db.Column(db.Integer, nullable=False)
+    # Parquet files with a per-row content hash (see app.baselines)
+    requirements_payload = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    links_payload = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'name', name='uq_baselines_project_name'),
+    )
+    
+    def __repr__(self):
+        return f'<Baseline {self.name}>'
+    
+    def to_dict(self):
+        """Convert baseline metadata to dictionary (without payloads)"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'name': self.name,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_by': self.created_by,
+            'requirements_count': self.requirements_count,
+            'links_count': self.links_count
+        }
+
+@event.listens_for(CellHistory, 'before_insert')
+def _encode_history_values(mapper, connection, target):
+    if target.value_encoding is None:
+        (target.value_encoding, target.old_value, target.new_value,
+         target.old_value_blob, target.new_value_blob) = history_codec.encode(target.old_value, target.new_value)
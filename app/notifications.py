@@ -0,0 +1,306 @@
+"""Change notifications across server processes and to open browsers.
+
+Every commit that changes project data sends a PostgreSQL ``NOTIFY`` on
+``CHANNEL`` inside the same transaction, so listeners only hear about
+committed changes. The payload carries the project ID, the kinds of data
+that changed, the project's new ``data_version`` and, for small edits, the
+changed requirement IDs (``null`` means "reload"). Clients pass the version
+back as ``min_version`` so their follow-up reads skip a lagging replica.
+Each server process runs one listener thread that drops its local caches
+for changes made by other processes, and every event, local or remote, is
+forwarded to the process's Server-Sent Events subscribers of that project.
+
+Every stream holds a server thread, so a process serves a limited number
+of them and ends each after a while; the browser reconnects with the last
+``data_version`` it saw as ``Last-Event-ID`` and is told to reload if it
+missed a change in between.
+"""
+
+import json
+import os
+import queue
+import select
+import socket
+import threading
+import time
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from app import cache, db, graph_index
+from app.models import Group, Project, Requirement
+
+CHANNEL = 'project_changes'
+
+# Larger edits (imports, batch updates) tell clients to reload instead
+MAX_REQUIREMENT_IDS = 50
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7000
+
+_KINDS = ((Project, 'project'), (Group, 'groups'), (Requirement, 'requirements'))
+
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+_streams = 0
+_streams_lock = threading.Lock()
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _origin():
+    # Per call: gunicorn forks workers after import
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _changes(session):
+    return session.info.setdefault('project_events', {})
+
+
+def _record(session, project_id, kind, requirement_id=None, reload=False):
+    change = _changes(session).setdefault(project_id, {'kinds': set(), 'requirements': set()})
+    change['kinds'].add(kind)
+    if reload:
+        change['requirements'] = None
+    elif requirement_id and change['requirements'] is not None:
+        change['requirements'].add(requirement_id)
+        if len(change['requirements']) > MAX_REQUIREMENT_IDS:
+            change['requirements'] = None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    deleted = set(session.deleted)
+    for obj in list(session.new) + list(session.dirty) + list(deleted):
+        for model, kind in _KINDS:
+            if not isinstance(obj, model):
+                continue
+            project_id = obj.id if model is Project else obj.project_id
+            if model is Requirement:
+                # Deleted or renamed rows cannot be patched by their ID
+                renamed = inspect(obj).attrs.requirement_id.history.deleted
+                _record(session, project_id, kind, obj.requirement_id, reload=obj in deleted or bool(renamed))
+            elif project_id:
+                _record(session, project_id, kind)
+
+
+def _payloads(session):
+    events = _changes(session)
+    # Core writes only mark the project as changed; clients reload it
+    for project_id in session.info.get('changed_projects', ()):
+        if project_id not in events:
+            _record(session, project_id, 'data', reload=True)
+    origin = _origin()
+    versions = session.info.get('data_versions', {})
+    payloads = []
+    for project_id, change in events.items():
+        requirements = change['requirements']
+        payload = {
+            'project_id': project_id,
+            'kinds': sorted(change['kinds']),
+            'requirements': sorted(requirements) if requirements is not None else None,
+            'data_version': versions.get(project_id),
+            'origin': origin,
+        }
+        encoded = json.dumps(payload)
+        if len(encoded.encode()) > MAX_PAYLOAD_BYTES:
+            payload['requirements'] = None
+            encoded = json.dumps(payload)
+        payloads.append((payload, encoded))
+    return payloads
+
+
+@event.listens_for(Session, 'before_commit')
+def _send_notifications(session):
+    # A no-op when the cache hook has already flushed
+    session.flush()
+    payloads = _payloads(session)
+    if not payloads:
+        return
+    session.info['project_payloads'] = [payload for payload, _ in payloads]
+    connection = session.connection()
+    if connection.dialect.name == 'postgresql':
+        for _, encoded in payloads:
+            connection.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': CHANNEL, 'payload': encoded})
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed(session):
+    session.info.pop('project_events', None)
+    for payload in session.info.pop('project_payloads', ()):
+        publish(payload)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('project_events', None)
+    session.info.pop('project_payloads', None)
+
+
+def subscribe(project_id):
+    """Register a bounded event queue for a project's changes in this process"""
+    events = queue.Queue(maxsize=100)
+    with _subscribers_lock:
+        _subscribers.setdefault(project_id, set()).add(events)
+    return events
+
+
+def unsubscribe(project_id, events):
+    with _subscribers_lock:
+        project_subscribers = _subscribers.get(project_id)
+        if project_subscribers is not None:
+            project_subscribers.discard(events)
+            if not project_subscribers:
+                del _subscribers[project_id]
+
+
+def publish(payload):
+    """Hand a change event to this process's subscribers of its project"""
+    with _subscribers_lock:
+        targets = list(_subscribers.get(payload['project_id'], ()))
+    for events in targets:
+        try:
+            events.put_nowait(payload)
+        except queue.Full:
+            # A client this far behind reloads instead of replaying the backlog
+            with events.mutex:
+                events.queue.clear()
+            events.put_nowait(dict(payload, kinds=['data'], requirements=None))
+
+
+class EventStream:
+    """Server-Sent Events for a project: change events and periodic keepalive comments.
+
+    Ends after ``max_duration`` seconds; the stream slot is released when the
+    server closes the response.
+    """
+
+    def __init__(self, project_id, keepalive, max_duration, data_version=None, missed=False):
+        self.project_id = project_id
+        self.keepalive = keepalive
+        self.max_duration = max_duration
+        self.data_version = data_version
+        self.missed = missed
+        self._events = subscribe(project_id)
+        self._closed = False
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.max_duration
+        opening = 'retry: 5000\n'
+        if self.data_version is not None:
+            opening += f'id: {self.data_version}\n'
+        yield opening + '\n'
+        if self.missed:
+            # Changed while the client was reconnecting
+            yield _format_event({
+                'project_id': self.project_id, 'kinds': ['data'], 'requirements': None,
+                'data_version': self.data_version,
+            })
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                payload = self._events.get(timeout=min(self.keepalive, remaining))
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            yield _format_event({key: value for key, value in payload.items() if key != 'origin'})
+
+    def close(self):
+        global _streams
+        with _streams_lock:
+            if self._closed:
+                return
+            self._closed = True
+            _streams -= 1
+        unsubscribe(self.project_id, self._events)
+
+
+def _format_event(data):
+    message = 'event: change\n'
+    if data.get('data_version') is not None:
+        message += f'id: {data["data_version"]}\n'
+    return message + f'data: {json.dumps(data)}\n\n'
+
+
+def open_stream(project_id, keepalive, max_duration, max_streams, data_version=None, last_version=None):
+    """An event stream for the project, or None when this process already serves ``max_streams``"""
+    global _streams
+    with _streams_lock:
+        if _streams >= max_streams:
+            return None
+        _streams += 1
+    missed = last_version is not None and data_version is not None and data_version > last_version
+    return EventStream(project_id, keepalive, max_duration, data_version, missed)
+
+
+def _handle_remote(payload):
+    project_id = payload['project_id']
+    cache.invalidate_project(project_id)
+    graph_index.invalidate_project_index(project_id)
+    publish(payload)
+
+
+def _listen(app):
+    # Dedicated autocommit connection outside the pool; it stays idle in LISTEN
+    connection = db.engine.raw_connection()
+    connection.detach()
+    dbapi_connection = connection.driver_connection
+    try:
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        app.logger.info('Listening for project changes on %s', CHANNEL)
+        origin = _origin()
+        while True:
+            if select.select([dbapi_connection], [], [], 60) == ([], [], []):
+                # Idle: make sure the connection is still alive
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                continue
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                notify = dbapi_connection.notifies.pop(0)
+                try:
+                    payload = json.loads(notify.payload)
+                except ValueError:
+                    app.logger.warning('Ignoring malformed change notification: %r', notify.payload)
+                    continue
+                if payload.get('origin') != origin:
+                    _handle_remote(payload)
+    finally:
+        dbapi_connection.close()
+
+
+def _run(app):
+    delay = 1
+    while True:
+        started = time.monotonic()
+        try:
+            with app.app_context():
+                _listen(app)
+        except Exception:
+            app.logger.exception('Project change listener failed; reconnecting in %ds', delay)
+        # Changes sent while disconnected were missed; drop everything cached locally
+        graph_index.invalidate_all()
+        cache.clear_all()
+        delay = 1 if time.monotonic() - started > 60 else min(delay * 2, 60)
+        time.sleep(delay)
+
+
+def start_listener(app):
+    """Start the change listener thread once per process (PostgreSQL only)"""
+    global _listener
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    if dialect != 'postgresql' or not app.config['LIVE_UPDATES_ENABLED']:
+        return False
+    with _listener_lock:
+        if _listener is not None and _listener.is_alive():
+            return False
+        _listener = threading.Thread(target=_run, args=(app,), name='project-change-listener', daemon=True)
+        _listener.start()
+    return True
@@ -0,0 +1,204 @@
+"""Chunked background deletion of projects.
+
+Deleting a project through the ORM loads every group, requirement and
+history row into memory first. Instead the project is only flagged
+(``deleted_at``) inside the request, and a background thread removes its
+rows in bounded batches, committing after each one so no transaction holds
+locks for long. Projects whose deletion was interrupted (e.g. by a restart)
+are picked up again by the next deletion job. Every server process runs
+its own worker; on PostgreSQL each project is claimed with an advisory
+lock, so concurrent workers delete different projects.
+"""
+
+from datetime import datetime
+import threading
+
+from sqlalchemy import delete, func, or_, select
+
+from app import db
+from app.models import Baseline, CellHistory, Changeset, Group, Project, ProjectSnapshot, Requirement, requirement_links, user_projects
+
+# Snapshot and baseline rows carry whole Parquet copies of a project
+PAYLOAD_BATCH_SIZE = 20
+
+# PostgreSQL advisory lock class for claiming a project; the second key is a hash of its ID
+DELETION_LOCK_KEY = 0x64656c
+
+_lock = threading.Lock()
+_running = False
+# Set when a deletion is requested while the worker is already running
+_requested = False
+
+
+def schedule_project_deletion(project):
+    """Hide a project from everyone; its rows are removed later by ``start_deletion_worker``"""
+    project.deleted_at = datetime.utcnow()
+    project.users = []
+
+
+def _delete_batches(statement_for_batch):
+    deleted = 0
+    while True:
+        count = db.session.execute(statement_for_batch()).rowcount
+        db.session.commit()
+        if not count:
+            return deleted
+        deleted += count
+
+
+def delete_project_rows(project_id, batch_size):
+    """Delete a flagged project and all of its rows in batches; returns rows deleted per table"""
+    history = CellHistory.__table__
+    requirements = Requirement.__table__
+    groups = Group.__table__
+    project_requirements = select(requirements.c.id).where(requirements.c.project_id == project_id)
+    counts = {}
+
+    counts['cell_history'] = _delete_batches(lambda: delete(history).where(history.c.id.in_(
+        select(history.c.id)
+        .where(history.c.project_id == project_id)
+        .limit(batch_size)
+    )))
+
+    def requirement_batch():
+        return project_requirements.limit(batch_size).scalar_subquery()
+
+    def link_batch():
+        batch = requirement_batch()
+        return delete(requirement_links).where(or_(
+            requirement_links.c.parent_id.in_(batch),
+            requirement_links.c.child_id.in_(batch)
+        ))
+
+    # Links first: removing a requirement chunk must not cascade into an unbounded link delete
+    counts['requirement_links'] = 0
+    counts['requirements'] = 0
+    while True:
+        counts['requirement_links'] += db.session.execute(link_batch()).rowcount
+        count = db.session.execute(
+            delete(requirements).where(requirements.c.id.in_(requirement_batch()))
+        ).rowcount
+        db.session.commit()
+        if not count:
+            break
+        counts['requirements'] += count
+
+    # Leaf groups first so the parent_id self-reference is never violated
+    parent_ids = select(groups.c.parent_id).where(
+        groups.c.project_id == project_id, groups.c.parent_id.isnot(None)
+    )
+    counts['groups'] = _delete_batches(lambda: delete(groups).where(groups.c.id.in_(
+        select(groups.c.id)
+        .where(groups.c.project_id == project_id, groups.c.id.notin_(parent_ids))
+        .limit(batch_size)
+    )))
+
+    # Changesets nobody's revert_changeset_id points at first, like leaf groups
+    changesets = Changeset.__table__
+    revert_ids = select(changesets.c.revert_changeset_id).where(
+        changesets.c.project_id == project_id, changesets.c.revert_changeset_id.isnot(None)
+    )
+    counts['changesets'] = _delete_batches(lambda: delete(changesets).where(changesets.c.id.in_(
+        select(changesets.c.id)
+        .where(changesets.c.project_id == project_id, changesets.c.id.notin_(revert_ids))
+        .limit(batch_size)
+    )))
+
+    payload_batch_size = min(batch_size, PAYLOAD_BATCH_SIZE)
+    for table in (ProjectSnapshot.__table__, Baseline.__table__):
+        counts[table.name] = _delete_batches(lambda table=table: delete(table).where(table.c.id.in_(
+            select(table.c.id).where(table.c.project_id == project_id).limit(payload_batch_size)
+        )))
+
+    db.session.execute(delete(user_projects).where(user_projects.c.project_id == project_id))
+    db.session.execute(delete(Project.__table__).where(Project.__table__.c.id == project_id))
+    db.session.commit()
+    return counts
+
+
+def _claim(lock_connection, project_id):
+    if lock_connection is None:
+        return True
+    claimed = lock_connection.execute(
+        select(func.pg_try_advisory_lock(DELETION_LOCK_KEY, func.hashtext(project_id)))
+    ).scalar()
+    # Session-level lock: it outlives the transaction, which must not stay open
+    lock_connection.commit()
+    return claimed
+
+
+def _release(lock_connection, project_id):
+    if lock_connection is not None:
+        lock_connection.execute(select(func.pg_advisory_unlock(DELETION_LOCK_KEY, func.hashtext(project_id))))
+        lock_connection.commit()
+
+
+def _next_project_id(lock_connection):
+    global _running, _requested
+    while True:
+        with _lock:
+            _requested = False
+        candidates = db.session.execute(
+            select(Project.id).where(Project.deleted_at.isnot(None)).order_by(Project.deleted_at)
+        ).scalars().all()
+        db.session.commit()
+        for project_id in candidates:
+            # Projects claimed by another process are skipped
+            if not _claim(lock_connection, project_id):
+                continue
+            # Another process may have finished it between the query and the claim
+            flagged = db.session.execute(
+                select(Project.id).where(Project.id == project_id, Project.deleted_at.isnot(None))
+            ).scalar()
+            db.session.commit()
+            if flagged is not None:
+                return project_id
+            _release(lock_connection, project_id)
+        with _lock:
+            # Look again if a deletion was flagged after the query above
+            if not _requested:
+                _running = False
+                return None
+
+
+def _run(app):
+    global _running
+    batch_size = app.config['PROJECT_DELETE_BATCH_SIZE']
+    with app.app_context():
+        lock_connection = None
+        try:
+            if db.engine.dialect.name == 'postgresql':
+                lock_connection = db.engine.connect()
+            while True:
+                project_id = _next_project_id(lock_connection)
+                if project_id is None:
+                    return
+                try:
+                    counts = delete_project_rows(project_id, batch_size)
+                finally:
+                    _release(lock_connection, project_id)
+                app.logger.info('Deleted project %s: %s', project_id, counts)
+        except Exception:
+            db.session.rollback()
+            if lock_connection is not None:
+                # Drops the connection and any lock it still holds
+                lock_connection.invalidate()
+            app.logger.exception('Background project deletion failed')
+            with _lock:
+                _running = False
+        finally:
+            if lock_connection is not None:
+                lock_connection.close()
+            db.session.remove()
+
+
+def start_deletion_worker(app):
+    """Start the background thread deleting flagged projects unless one is already running"""
+    global _running, _requested
+    with _lock:
+        _requested = True
+        if _running:
+            return False
+        _running = True
+    threading.Thread(target=_run, args=(app,), name='project-deletion', daemon=True).start()
+    return True
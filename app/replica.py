@@ -0,0 +1,161 @@
+"""Optional read-replica routing.
+
+When ``REPLICA_DATABASE_URL`` is set, routes marked ``@read_replica``
+(lists, graphs, exports, history) run their queries on the ``replica``
+bind; everything else, and every flush, uses the primary. A user's reads
+stay on the primary for ``REPLICA_READ_YOUR_WRITES`` seconds after their
+last successful write (tracked in the session cookie, so it holds across
+workers and nodes). Requests carrying ``project_id`` and ``min_version``
+(clients reacting to a change notification) use the primary unless the
+replica already has that project ``data_version``. The replica's lag is probed at most every
+``REPLICA_CHECK_INTERVAL`` seconds; while it lags more than
+``REPLICA_MAX_LAG`` seconds or is unreachable, reads fall back to the
+primary.
+"""
+
+from functools import wraps
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+REPLICA_BIND = 'replica'
+
+_VERSION_SQL = text('SELECT data_version FROM projects WHERE id = :project_id')
+
+# Replay lag in seconds; 0 when everything received has been replayed
+_LAG_SQL = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+class _ReplicaState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_at = None
+        self.healthy = False
+        self.lag = None
+        self.error = None
+
+    def mark_down(self, error):
+        self.healthy = False
+        self.lag = None
+        self.error = error
+        self.checked_at = time.monotonic()
+
+    def _probe(self, engine, max_lag):
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    lag = connection.execute(_LAG_SQL).scalar()
+                else:
+                    connection.execute(text('SELECT 1'))
+                    lag = 0
+            self.lag = float(lag or 0)
+            self.healthy = self.lag <= max_lag
+            self.error = None if self.healthy else f'Replica lag {self.lag:.1f}s exceeds {max_lag}s'
+        except Exception as e:
+            self.mark_down(str(e))
+        self.checked_at = time.monotonic()
+
+    def usable(self, engine, config):
+        """Last known health, re-probed by one thread once ``REPLICA_CHECK_INTERVAL`` has passed"""
+        stale = self.checked_at is None or time.monotonic() - self.checked_at >= config['REPLICA_CHECK_INTERVAL']
+        # Only the first check blocks every thread; later ones keep serving the last result
+        if stale and self._lock.acquire(blocking=self.checked_at is None):
+            try:
+                if self.checked_at is None or time.monotonic() - self.checked_at >= config['REPLICA_CHECK_INTERVAL']:
+                    self._probe(engine, config['REPLICA_MAX_LAG'])
+            finally:
+                self._lock.release()
+        return self.healthy
+
+    def to_dict(self):
+        return {
+            'healthy': self.healthy,
+            'lag_seconds': self.lag,
+            'error': self.error,
+        }
+
+
+_state = _ReplicaState()
+
+
+def read_replica(f):
+    """Route decorator allowing the request's queries to run on the replica.
+
+    Place it directly under ``@app.route``, before the first query of the request.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_replica = True
+        project_id = request.args.get('project_id')
+        min_version = request.args.get('min_version', type=int)
+        if project_id and min_version is not None:
+            g.read_replica = _replica_has_version(project_id, min_version)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _replica_has_version(project_id, min_version):
+    db = current_app.extensions['sqlalchemy']
+    if _replica_engine(db.engines) is None:
+        # Reads go to the primary anyway
+        return True
+    version = db.session.execute(_VERSION_SQL, {'project_id': project_id}).scalar()
+    return version is not None and version >= min_version
+
+
+def _recently_wrote():
+    last_write_at = session.get('last_write_at')
+    return last_write_at is not None and time.time() - last_write_at < current_app.config['REPLICA_READ_YOUR_WRITES']
+
+
+def _replica_engine(engines):
+    if not has_request_context() or not g.get('read_replica'):
+        return None
+    engine = engines.get(REPLICA_BIND)
+    if engine is None or _recently_wrote():
+        return None
+    return engine if _state.usable(engine, current_app.config) else None
+
+
+class RoutingSession(Session):
+    """Session sending the queries of ``@read_replica`` requests to the replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            engine = _replica_engine(self._db.engines)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _record_write(response):
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 and 'user_id' in session:
+        session['last_write_at'] = time.time()
+    return response
+
+
+def init_app(app, db):
+    """Track users' writes and mark the replica down when its connections fail"""
+    app.after_request(_record_write)
+    with app.app_context():
+        engine = db.engines.get(REPLICA_BIND)
+    if engine is not None:
+        @event.listens_for(engine, 'handle_error')
+        def _replica_error(context):
+            if context.is_disconnect:
+                _state.mark_down(str(context.original_exception))
+
+
+def replica_status(db):
+    """Health of the replica bind, or None when no replica is configured"""
+    engine = db.engines.get(REPLICA_BIND)
+    if engine is None:
+        return None
+    _state.usable(engine, current_app.config)
+    return _state.to_dict()
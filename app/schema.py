@@ -0,0 +1,78 @@
+"""Database schema setup and upgrades.
+
+The migration chain starts from the schema that ``db.create_all()`` built
+before migrations were introduced, so it cannot create tables on its own.
+An empty database is therefore created from the models and stamped with
+the head revision; an existing one is brought up to date with the
+migrations.
+
+    python -m app.schema upgrade   # create or upgrade
+    python -m app.schema check     # exit 1 unless the schema is at head
+"""
+
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+from app import db
+from app.models import Project
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'alembic.ini')
+
+
+def _alembic_config():
+    return Config(ALEMBIC_INI)
+
+
+def current_revision():
+    """The database's Alembic revision (None for an unversioned database)"""
+    with db.engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def head_revision():
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def upgrade(app):
+    """Create the schema in an empty database, otherwise apply pending migrations; returns what was done"""
+    with app.app_context():
+        empty = not inspect(db.engine).has_table(Project.__tablename__)
+        if empty:
+            db.create_all()
+            command.stamp(_alembic_config(), 'head')
+            return 'created'
+    command.upgrade(_alembic_config(), 'head')
+    return 'upgraded'
+
+
+def is_current(app):
+    """Whether the database schema is at the head revision"""
+    with app.app_context():
+        return current_revision() == head_revision()
+
+
+def main(argv):
+    from app import create_app
+
+    app = create_app(os.environ.get('APP_CONFIG', 'development'))
+    action = argv[1] if len(argv) > 1 else 'upgrade'
+    if action == 'upgrade':
+        print(f'Database schema {upgrade(app)}')
+        return 0
+    if action == 'check':
+        if is_current(app):
+            return 0
+        print('Database schema is not at the head revision; run "python -m app.schema upgrade"', file=sys.stderr)
+        return 1
+    print(f'Unknown action: {action} (expected upgrade or check)', file=sys.stderr)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
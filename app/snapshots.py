@@ -0,0 +1,273 @@
+"""Point-in-time ("as of") reads of a project's requirements.
+
+A background worker periodically stores a compact Parquet snapshot of every
+project that changed since its last snapshot. Reading a project as of a
+past moment loads the nearest snapshot taken before it and replays only the
+history entries written between the snapshot and that moment, so the cost
+is bounded by the snapshot interval instead of the project's whole history.
+Moments before a project's oldest snapshot are rewound from the earliest
+snapshot taken after them; only projects without any snapshot are rewound
+from their current state.
+
+Each pass also prunes old snapshots: the newest ``SNAPSHOT_KEEP_RECENT`` of
+a project are kept, older ones are thinned to the last one of each day.
+
+Parent links are not recorded in ``cell_history``; as-of reads return the
+links of the snapshot used (or the current links when none applies).
+"""
+
+from datetime import datetime, timezone
+import io
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import delete, func, insert, select
+
+from app import columnar, db
+from app.models import CellHistory, Group, Project, ProjectSnapshot, Requirement
+
+# History fields that map onto requirement attributes when replayed
+REPLAYED_FIELDS = ['title', 'description', 'status', 'chapter', 'verification_method', 'group_id']
+
+# PostgreSQL advisory lock held by the one process running a snapshot pass
+SNAPSHOT_LOCK_KEY = 0x736e6170
+
+_worker_lock = threading.Lock()
+_worker = None
+
+
+def naive_utc(at):
+    """``at`` as a naive UTC datetime, the form timestamps are stored in"""
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def _current_rows(project_id, *conditions):
+    rows = []
+    for batch in columnar.iter_record_batches(project_id, 'requirements', *conditions):
+        rows.extend(batch.to_pylist())
+    return rows
+
+
+def take_snapshot(project_id):
+    """Store a snapshot of the project's current requirements; the caller commits"""
+    taken_at = datetime.utcnow()
+    data_version = db.session.execute(
+        select(Project.data_version).where(Project.id == project_id)
+    ).scalar_one()
+    output = io.BytesIO()
+    columnar.write_dataset(project_id, 'requirements', 'parquet', output)
+    payload = output.getvalue()
+    # Core insert: a snapshot is not a change to the project and must not bump data_version
+    snapshot_id = db.session.execute(
+        insert(ProjectSnapshot).values(
+            project_id=project_id,
+            taken_at=taken_at,
+            data_version=data_version,
+            requirements_count=pq.read_metadata(pa.BufferReader(payload)).num_rows,
+            payload=payload
+        ).returning(ProjectSnapshot.id)
+    ).scalar_one()
+    return db.session.get(ProjectSnapshot, snapshot_id)
+
+
+def load_snapshot_rows(snapshot):
+    return pq.read_table(pa.BufferReader(snapshot.payload)).to_pylist()
+
+
+def nearest_snapshot(project_id, at):
+    """Latest snapshot taken at or before ``at``, or None"""
+    return db.session.execute(
+        select(ProjectSnapshot)
+        .where(ProjectSnapshot.project_id == project_id, ProjectSnapshot.taken_at <= at)
+        .order_by(ProjectSnapshot.taken_at.desc())
+        .limit(1)
+    ).scalar()
+
+
+def next_snapshot(project_id, at):
+    """Earliest snapshot taken after ``at``, or None"""
+    return db.session.execute(
+        select(ProjectSnapshot)
+        .where(ProjectSnapshot.project_id == project_id, ProjectSnapshot.taken_at > at)
+        .order_by(ProjectSnapshot.taken_at)
+        .limit(1)
+    ).scalar()
+
+
+def _history_entries(conditions, newest_first):
+    order = (CellHistory.changed_at.desc(), CellHistory.id.desc()) if newest_first else \
+        (CellHistory.changed_at, CellHistory.id)
+    query = (
+        select(CellHistory)
+        .where(CellHistory.field_name.in_(REPLAYED_FIELDS), *conditions)
+        .order_by(*order)
+        .execution_options(yield_per=columnar.EXPORT_BATCH_SIZE)
+    )
+    return db.session.execute(query).scalars()
+
+
+def _replay(rows_by_id, entries, use_old_value):
+    for entry in entries:
+        row = rows_by_id.get(entry.requirement_id)
+        if row is None:
+            continue
+        old_value, new_value = entry.values()
+        row[entry.field_name] = old_value if use_old_value else new_value
+        if not use_old_value:
+            row['updated_at'] = entry.changed_at
+            row['updated_by'] = entry.changed_by
+
+
+def _rewind(project_id, rows_by_id, at, until=None, only_listed=False):
+    """Undo every change made after ``at`` (and up to ``until``, when the rows are that old) to ``rows_by_id``"""
+    conditions = [CellHistory.project_id == project_id, CellHistory.changed_at > at]
+    if until is not None:
+        conditions.append(CellHistory.changed_at <= until)
+    if only_listed:
+        conditions.append(CellHistory.requirement_id.in_(list(rows_by_id)))
+    _replay(rows_by_id, _history_entries(conditions, newest_first=True), use_old_value=True)
+
+
+def requirements_as_of(project_id, at):
+    """Rebuild the project's requirements as they were at ``at``"""
+    at = naive_utc(at)
+    snapshot = nearest_snapshot(project_id, at)
+    if snapshot is None:
+        # Rewind from the first later snapshot, or from the current state if there is none
+        snapshot = next_snapshot(project_id, at)
+        if snapshot is None:
+            rows_by_id = {row['id']: row for row in _current_rows(project_id)}
+            _rewind(project_id, rows_by_id, at)
+        else:
+            rows_by_id = {row['id']: row for row in load_snapshot_rows(snapshot)}
+            _rewind(project_id, rows_by_id, at, until=snapshot.taken_at)
+    else:
+        rows_by_id = {row['id']: row for row in load_snapshot_rows(snapshot)}
+        _replay(rows_by_id, _history_entries([
+            CellHistory.project_id == project_id,
+            CellHistory.changed_at > snapshot.taken_at,
+            CellHistory.changed_at <= at,
+        ], newest_first=False), use_old_value=False)
+        # Requirements created after the snapshot are rewound from their current state
+        created_since = {
+            row['id']: row for row in _current_rows(
+                project_id, Requirement.created_at > snapshot.taken_at, Requirement.created_at <= at
+            )
+            if row['id'] not in rows_by_id
+        }
+        if created_since:
+            _rewind(project_id, created_since, at, only_listed=True)
+            rows_by_id.update(created_since)
+
+    group_names = dict(db.session.execute(
+        select(Group.id, Group.name).where(Group.project_id == project_id)
+    ).all())
+    requirements = []
+    for row in rows_by_id.values():
+        if row['created_at'] and row['created_at'] > at:
+            continue
+        requirements.append({
+            'id': row['id'],
+            'requirement_id': row['requirement_id'],
+            'title': row['title'],
+            'description': row['description'],
+            'status': row['status'],
+            'chapter': row['chapter'],
+            'verification_method': row['verification_method'],
+            'group_id': row['group_id'],
+            'group_name': group_names.get(row['group_id'], row['group_name']),
+            'project_id': project_id,
+            'parents': list(row['parent_ids'] or []),
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None,
+            'created_by': row['created_by'],
+            'updated_by': row['updated_by']
+        })
+    requirements.sort(key=lambda r: r['requirement_id'])
+    return requirements, snapshot
+
+
+def snapshot_changed_projects(min_age):
+    """Snapshot every project changed since its last snapshot, if that is at least ``min_age`` seconds old"""
+    latest = (
+        select(
+            ProjectSnapshot.project_id,
+            func.max(ProjectSnapshot.taken_at).label('taken_at'),
+            func.max(ProjectSnapshot.data_version).label('data_version')
+        )
+        .group_by(ProjectSnapshot.project_id)
+        .subquery()
+    )
+    cutoff = datetime.utcfromtimestamp(time.time() - min_age)
+    project_ids = db.session.execute(
+        select(Project.id)
+        .outerjoin(latest, latest.c.project_id == Project.id)
+        .where(
+            Project.deleted_at.is_(None),
+            (latest.c.project_id.is_(None)) |
+            ((latest.c.data_version != Project.data_version) & (latest.c.taken_at <= cutoff))
+        )
+    ).scalars().all()
+    for project_id in project_ids:
+        take_snapshot(project_id)
+        db.session.commit()
+    return len(project_ids)
+
+
+def prune_snapshots(keep_recent):
+    """Delete snapshots beyond each project's newest ``keep_recent``, except the last of each day; the caller commits"""
+    snapshots = ProjectSnapshot.__table__
+    ranked = select(
+        snapshots.c.id,
+        func.row_number().over(
+            partition_by=snapshots.c.project_id, order_by=snapshots.c.taken_at.desc()
+        ).label('recent_rank'),
+        func.row_number().over(
+            partition_by=(snapshots.c.project_id, func.date(snapshots.c.taken_at)),
+            order_by=snapshots.c.taken_at.desc()
+        ).label('day_rank'),
+    ).subquery()
+    # Core delete: pruning does not change the project and must not bump data_version
+    return db.session.execute(delete(snapshots).where(snapshots.c.id.in_(
+        select(ranked.c.id).where(ranked.c.recent_rank > keep_recent, ranked.c.day_rank > 1)
+    ))).rowcount
+
+
+def _run(app, interval):
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                # Every server process runs this thread; only one of them takes each pass
+                with db.engine.connect() as lock_connection:
+                    if not lock_connection.execute(select(func.pg_try_advisory_lock(SNAPSHOT_LOCK_KEY))).scalar():
+                        continue
+                    try:
+                        count = snapshot_changed_projects(interval)
+                        pruned = prune_snapshots(app.config['SNAPSHOT_KEEP_RECENT'])
+                        db.session.commit()
+                    finally:
+                        lock_connection.execute(select(func.pg_advisory_unlock(SNAPSHOT_LOCK_KEY)))
+                if count or pruned:
+                    app.logger.info('Stored %d project snapshots, pruned %d', count, pruned)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Project snapshot run failed')
+            finally:
+                db.session.remove()
+
+
+def start_snapshot_worker(app):
+    """Start the periodic snapshot thread once per process (``SNAPSHOT_INTERVAL`` 0 disables it)"""
+    global _worker
+    interval = app.config['SNAPSHOT_INTERVAL']
+    with _worker_lock:
+        if interval <= 0 or (_worker is not None and _worker.is_alive()):
+            return False
+        _worker = threading.Thread(target=_run, args=(app, interval), name='project-snapshots', daemon=True)
+        _worker.start()
+    return True
@@ -5,6 +5,9 @@ let groupsData = [];
 let selectedRequirements = new Set(); // Track selected requirements for batch editing
 let currentProject = null; // Currently selected project
 let projectsData = []; // All projects accessible to current user
+let projectEvents = null; // Live change stream of the current project
+let projectEventsRetry = null; // Pending reconnect after the server refused the stream
+let projectDataVersion = null; // Latest data version announced on that stream
 
 // EasyMDE instance for requirement modal
 let reqDescriptionMDE = null;
@@ -118,6 +121,7 @@ function populateProjectSelector() {
 function selectProject(projectId) {
     if (!projectId) {
         currentProject = null;
+        disconnectProjectEvents();
         hideProjectInfo();
         clearProjectData();
         return;
@@ -132,8 +136,94 @@ function selectProject(projectId) {
     // Show project info
     showProjectInfo();
     
-    // Load project data
+    // Load project data and follow its changes
     loadProjectData();
+    connectProjectEvents();
+}
+
+// Live updates: changes committed by anyone arrive on the project's event stream
+function connectProjectEvents() {
+    disconnectProjectEvents();
+    projectDataVersion = null;
+    if (!currentProject || !window.EventSource) return;
+    
+    projectEvents = new EventSource(`/api/projects/${currentProject.id}/events`);
+    projectEvents.addEventListener('change', event => handleProjectChange(JSON.parse(event.data)));
+    projectEvents.onerror = () => {
+        // Refused (e.g. the server is at its stream limit): try again later, saves refetch meanwhile
+        if (projectEvents && projectEvents.readyState === EventSource.CLOSED) {
+            const project = currentProject;
+            disconnectProjectEvents();
+            projectEventsRetry = setTimeout(() => {
+                if (currentProject === project) connectProjectEvents();
+            }, 60000);
+        }
+    };
+}
+
+function disconnectProjectEvents() {
+    clearTimeout(projectEventsRetry);
+    projectEventsRetry = null;
+    if (projectEvents) {
+        projectEvents.close();
+        projectEvents = null;
+    }
+}
+
+async function handleProjectChange(change) {
+    if (!currentProject || change.project_id !== currentProject.id) return;
+    if (change.data_version !== null && change.data_version !== undefined) {
+        projectDataVersion = Math.max(projectDataVersion || 0, change.data_version);
+    }
+    
+    // Group renames show up in every row; unknown or large changes need a full reload
+    const groupsChanged = change.kinds.includes('groups');
+    if (groupsChanged) {
+        await loadGroups();
+    }
+    if (groupsChanged || change.requirements === null) {
+        await loadRequirements();
+    } else if (change.requirements.length > 0) {
+        await refreshRequirementRows(change.requirements);
+    }
+}
+
+// Requirement display IDs are unique per project only, so lookups name the current project
+function requirementUrl(requirementId, path = '') {
+    return `/api/requirements/${requirementId}${path}?project_id=${currentProject.id}`;
+}
+
+// Query parameter making the server read from the primary until a replica has the announced version
+function freshnessParams() {
+    if (!currentProject || projectDataVersion === null) return '';
+    return `min_version=${projectDataVersion}`;
+}
+
+// Patch single rows in place; falls back to a reload for rows not in the current list
+async function refreshRequirementRows(requirementIds) {
+    try {
+        const requirements = await Promise.all(requirementIds.map(async requirementId => {
+            const freshness = freshnessParams();
+            const response = await fetch(requirementUrl(requirementId) + (freshness ? `&${freshness}` : ''));
+            const data = await response.json();
+            return data.success ? data.data : null;
+        }));
+        
+        for (const req of requirements) {
+            const index = req ? requirementsData.findIndex(r => r.id === req.id) : -1;
+            if (index === -1) {
+                await loadRequirements();
+                return;
+            }
+            delete req.history;
+            delete req.history_cursor;
+            requirementsData[index] = req;
+        }
+        filterRequirements();
+    } catch (error) {
+        console.error('Error refreshing requirements:', error);
+        loadRequirements();
+    }
 }
 
 function showProjectInfo() {
@@ -411,6 +501,7 @@ async function loadCurrentUser() {
 }
 
 async function logout() {
+    disconnectProjectEvents();
     try {
         const response = await fetch('/api/logout', {
             method: 'POST'
@@ -607,7 +698,11 @@ async function loadGroups() {
     if (!currentProject) return;
     
     try {
-        const response = await fetch(`/api/groups?project_id=${currentProject.id}`);
+        let url = `/api/groups?project_id=${currentProject.id}`;
+        if (projectDataVersion !== null) {
+            url += `&min_version=${projectDataVersion}`;
+        }
+        const response = await fetch(url);
         const data = await response.json();
         
         if (data.success) {
@@ -780,6 +875,9 @@ async function loadRequirements(groupId = null) {
     
     try {
         let url = `/api/requirements?project_id=${currentProject.id}`;
+        if (projectDataVersion !== null) {
+            url += `&min_version=${projectDataVersion}`;
+        }
         if (groupId) {
             url += `&group_id=${groupId}`;
         }
@@ -1074,7 +1172,7 @@ async function saveRequirement() {
     console.log('saveRequirement called, formData:', formData);
     try {
         const url = currentRequirementId ? 
-            `/api/requirements/${currentRequirementId}` : 
+            requirementUrl(currentRequirementId) : 
             '/api/requirements';
         const method = currentRequirementId ? 'PUT' : 'POST';
         const response = await fetch(url, {
@@ -1091,7 +1189,14 @@ async function saveRequirement() {
             showAlert('Requirement saved successfully', 'success');
             const modal = bootstrap.Modal.getInstance(document.getElementById('requirementModal'));
             modal.hide();
-            loadRequirements();
+            // An open event stream delivers the change as a patch; otherwise fetch it here
+            if (!projectEvents || projectEvents.readyState !== EventSource.OPEN) {
+                if (currentRequirementId && formData.requirement_id === currentRequirementId) {
+                    refreshRequirementRows([currentRequirementId]);
+                } else {
+                    loadRequirements();
+                }
+            }
         } else {
             showAlert(data.error || 'Error saving requirement', 'danger');
         }
@@ -1102,9 +1207,58 @@ async function saveRequirement() {
 }
 
 // Requirement details functions
+function renderHistoryItems(history) {
+    return history.map(h => `
+        <div class="history-item">
+            <div class="d-flex justify-content-between">
+                <strong>${h.field_name}</strong>
+                <small class="text-muted">${formatDate(h.changed_at)}</small>
+            </div>
+            <div class="text-muted">Changed by: ${h.changed_by}</div>
+            <div class="mt-1">
+                <span class="text-danger">${h.old_value || 'empty'}</span>
+                <i class="fas fa-arrow-right mx-2"></i>
+                <span class="text-success">${h.new_value || 'empty'}</span>
+            </div>
+        </div>
+    `).join('');
+}
+
+function appendHistoryLoadMore(container, requirementId, cursor) {
+    if (!cursor) {
+        return;
+    }
+    const button = document.createElement('button');
+    button.className = 'btn btn-sm btn-outline-secondary mt-2';
+    button.textContent = 'Load older changes';
+    button.addEventListener('click', () => loadMoreHistory(container, button, requirementId, cursor));
+    container.appendChild(button);
+}
+
+async function loadMoreHistory(container, button, requirementId, cursor) {
+    try {
+        button.disabled = true;
+        const response = await fetch(requirementUrl(requirementId, '/history') + `&cursor=${encodeURIComponent(cursor)}`);
+        const data = await response.json();
+        
+        if (data.success) {
+            button.remove();
+            container.insertAdjacentHTML('beforeend', renderHistoryItems(data.data));
+            appendHistoryLoadMore(container, requirementId, data.next_cursor);
+        } else {
+            button.disabled = false;
+            showAlert('Failed to load history: ' + data.error, 'danger');
+        }
+    } catch (error) {
+        console.error('Error loading history:', error);
+        button.disabled = false;
+        showAlert('Error loading history', 'danger');
+    }
+}
+
 async function showRequirementDetails(requirementId) {
     try {
-        const response = await fetch(`/api/requirements/${requirementId}`);
+        const response = await fetch(requirementUrl(requirementId));
         const data = await response.json();
         
         if (data.success) {
@@ -1164,25 +1318,12 @@ async function showRequirementDetails(requirementId) {
                 </div>
             `;
             
-            // Populate history tab
-            const historyHtml = req.history.length > 0 ? 
-                req.history.map(h => `
-                    <div class="history-item">
-                        <div class="d-flex justify-content-between">
-                            <strong>${h.field_name}</strong>
-                            <small class="text-muted">${formatDate(h.changed_at)}</small>
-                        </div>
-                        <div class="text-muted">Changed by: ${h.changed_by}</div>
-                        <div class="mt-1">
-                            <span class="text-danger">${h.old_value || 'empty'}</span>
-                            <i class="fas fa-arrow-right mx-2"></i>
-                            <span class="text-success">${h.new_value || 'empty'}</span>
-                        </div>
-                    </div>
-                `).join('') : 
+            // Populate history tab (latest page; older entries load on demand)
+            const historyContainer = document.getElementById('requirement-history');
+            historyContainer.innerHTML = req.history.length > 0 ?
+                renderHistoryItems(req.history) :
                 '<p class="text-muted">No changes recorded</p>';
-            
-            document.getElementById('requirement-history').innerHTML = historyHtml;
+            appendHistoryLoadMore(historyContainer, req.requirement_id, req.history_cursor);
             
             // Populate relationships tab
             const relationshipsHtml = `
@@ -1302,7 +1443,7 @@ async function moveRequirement() {
     }
     
     try {
-        const response = await fetch(`/api/requirements/${requirementId}/move`, {
+        const response = await fetch(requirementUrl(requirementId, '/move'), {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -1435,7 +1576,7 @@ async function deleteRequirement(requirementId) {
     }
     
     try {
-        const response = await fetch(`/api/requirements/${requirementId}`, {
+        const response = await fetch(requirementUrl(requirementId), {
             method: 'DELETE'
         });
         
@@ -2177,7 +2318,7 @@ async function handleParentChildRelationship(parentRequirementId, childRequireme
         if (existingEdge) {
             // Debug: log removal payload
             console.log('Removing parent-child relationship:', { childRequirementId, parent_id: null });
-            const response = await fetch(`/api/requirements/${childRequirementId}/parent`, {
+            const response = await fetch(requirementUrl(childRequirementId, '/parent'), {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -2195,7 +2336,7 @@ async function handleParentChildRelationship(parentRequirementId, childRequireme
         } else {
             // Debug: log creation payload
             console.log('Creating parent-child relationship:', { childRequirementId, parent_id: parentRequirementId });
-            const response = await fetch(`/api/requirements/${childRequirementId}/parent`, {
+            const response = await fetch(requirementUrl(childRequirementId, '/parent'), {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -2220,7 +2361,7 @@ async function handleParentChildRelationship(parentRequirementId, childRequireme
 async function removeParentChildLink(parentRequirementId, childRequirementId) {
     try {
         // Custom endpoint: remove only this parent-child link
-        const response = await fetch(`/api/requirements/${childRequirementId}/parent`, {
+        const response = await fetch(requirementUrl(childRequirementId, '/parent'), {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -2253,7 +2394,7 @@ function fitGraph() {
 
 async function saveNodePosition(requirementId, x, y) {
     try {
-        const response = await fetch(`/api/requirements/${requirementId}/position`, {
+        const response = await fetch(requirementUrl(requirementId, '/position'), {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -0,0 +1,133 @@
+"""Set-based traceability operations over the requirement link graph."""
+
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, literal, or_, select
+
+from app import db
+from app.cache import mark_project_changed
+from app.models import Group, Requirement, requirement_links
+
+# Fields whose change invalidates the downstream trace
+SUSPECT_TRIGGER_FIELDS = ('title', 'description')
+
+
+def mark_downstream_suspect(project_id, requirement_id):
+    """Flag every link below a requirement as suspect with one recursive UPDATE.
+
+    Runs inside the caller's transaction; returns the number of links flagged.
+    """
+    mark_project_changed(project_id)
+    affected = select(literal(requirement_id).label('id')).cte('affected', recursive=True)
+    affected = affected.union(
+        select(requirement_links.c.child_id).join(
+            affected, requirement_links.c.parent_id == affected.c.id
+        )
+    )
+    result = db.session.execute(
+        requirement_links.update()
+        .where(requirement_links.c.parent_id.in_(select(affected.c.id)))
+        .where(requirement_links.c.suspect.is_(False))
+        .values(suspect=True, suspect_since=datetime.utcnow())
+    )
+    return result.rowcount
+
+
+def project_suspect_links(project_id):
+    """Return suspect links of a project, oldest first"""
+    parent = Requirement.__table__.alias('parent')
+    child = Requirement.__table__.alias('child')
+    rows = db.session.execute(
+        select(
+            parent.c.requirement_id, parent.c.title,
+            child.c.requirement_id, child.c.title,
+            requirement_links.c.suspect_since
+        )
+        .select_from(requirement_links)
+        .join(parent, parent.c.id == requirement_links.c.parent_id)
+        .join(child, child.c.id == requirement_links.c.child_id)
+        .where(requirement_links.c.suspect.is_(True), child.c.project_id == project_id)
+        .order_by(requirement_links.c.suspect_since, child.c.requirement_id)
+    ).all()
+    return [{
+        'parent_id': parent_id,
+        'parent_title': parent_title,
+        'child_id': child_id,
+        'child_title': child_title,
+        'suspect_since': since.isoformat() if since else None
+    } for parent_id, parent_title, child_id, child_title, since in rows]
+
+
+def clear_suspect_links(project_id, child_id=None, parent_id=None):
+    """Clear suspect flags in a project, optionally narrowed to one child and/or parent"""
+    mark_project_changed(project_id)
+    child = Requirement.__table__.alias('child')
+    parent = Requirement.__table__.alias('parent')
+    in_project = select(child.c.id).where(child.c.project_id == project_id)
+    if child_id:
+        in_project = in_project.where(child.c.requirement_id == child_id)
+    stmt = (
+        requirement_links.update()
+        .where(requirement_links.c.suspect.is_(True))
+        .where(requirement_links.c.child_id.in_(in_project))
+        .values(suspect=False, suspect_since=None)
+    )
+    if parent_id:
+        stmt = stmt.where(requirement_links.c.parent_id.in_(
+            select(parent.c.id).where(parent.c.project_id == project_id, parent.c.requirement_id == parent_id)
+        ))
+    return db.session.execute(stmt).rowcount
+
+
+def coverage_metrics(project_id):
+    """Compute traceability coverage for a project with a single aggregate query"""
+    has_children = select(requirement_links.c.parent_id).where(
+        requirement_links.c.parent_id == Requirement.id
+    ).exists()
+    has_parents = select(requirement_links.c.child_id).where(
+        requirement_links.c.child_id == Requirement.id
+    ).exists()
+    is_leaf = ~has_children
+    no_verification = or_(Requirement.verification_method.is_(None), Requirement.verification_method == '')
+
+    rows = db.session.execute(
+        select(
+            Requirement.group_id,
+            Group.name,
+            Requirement.status,
+            func.count(),
+            func.sum(case((is_leaf, 1), else_=0)),
+            func.sum(case((and_(is_leaf, no_verification), 1), else_=0)),
+            func.sum(case((~has_parents, 1), else_=0)),
+        )
+        .join(Group, Group.id == Requirement.group_id)
+        .where(Requirement.project_id == project_id, Requirement.status != 'deleted')
+        .group_by(Requirement.group_id, Group.name, Requirement.status)
+    ).all()
+
+    totals = {'requirements': 0, 'without_children': 0, 'leaves_without_verification': 0, 'orphans': 0}
+    groups = {}
+    for group_id, group_name, status, count, leaves, unverified, orphans in rows:
+        group = groups.setdefault(group_id, {
+            'group_id': group_id,
+            'group_name': group_name,
+            'requirements': 0,
+            'without_children': 0,
+            'leaves_without_verification': 0,
+            'orphans': 0,
+            'status_counts': {}
+        })
+        for target in (totals, group):
+            target['requirements'] += count
+            target['without_children'] += leaves or 0
+            target['leaves_without_verification'] += unverified or 0
+            target['orphans'] += orphans or 0
+        group['status_counts'][status or 'Unknown'] = count
+
+    total = totals['requirements']
+    totals['with_children_pct'] = round(100.0 * (total - totals['without_children']) / total, 1) if total else None
+    totals['with_parents_pct'] = round(100.0 * (total - totals['orphans']) / total, 1) if total else None
+    return {
+        'totals': totals,
+        'groups': sorted(groups.values(), key=lambda g: g['group_name'] or '')
+    }
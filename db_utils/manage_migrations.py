@@ -79,7 +79,8 @@ def main():
         run_command(f'alembic revision --autogenerate -m "{description}"', f"Creating migration: {description}")
         
     elif command == "upgrade":
-        run_command("alembic upgrade head", "Applying pending migrations")
+        # Creates the tables first when the database is empty
+        run_command("python -m app.schema upgrade", "Applying pending migrations")
         
     elif command == "downgrade":
         run_command("alembic downgrade -1", "Rolling back last migration")
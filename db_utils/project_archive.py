@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Project Archive Script for Requirements Management Tool
+
+Dumps one project (groups, requirements, links, changesets and history) into a compressed
+archive with PostgreSQL COPY, and restores such an archive under new IDs.
+"""
+
+import os
+import sys
+import time
+
+# Allow importing the application package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.archive import dump_project, restore_project
+from app.models import Project, User
+
+def show_help():
+    """Show help information"""
+    print("""
+📦 Project Archive Script
+
+Usage: python db_utils/project_archive.py <command> [arguments]
+
+Commands:
+  dump <project name or id> <archive.tar.gz>
+      Write the project to a compressed archive
+  restore <archive.tar.gz> [--name NEW_NAME] [--grant USERNAME ...]
+      Restore an archive as a new project, optionally renamed and shared with users
+
+Examples:
+  python db_utils/project_archive.py dump "Satellite Bus" satellite_bus.tar.gz
+  python db_utils/project_archive.py restore satellite_bus.tar.gz --name "Satellite Bus (staging)" --grant alice
+""")
+
+def find_project(reference):
+    """Look a project up by ID or by name"""
+    return db.session.get(Project, reference) or Project.query.filter_by(name=reference).first()
+
+def parse_restore_options(args):
+    """Parse --name and --grant options of the restore command"""
+    name = None
+    usernames = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--name' and i + 1 < len(args):
+            name = args[i + 1]
+            i += 2
+        elif args[i] == '--grant' and i + 1 < len(args):
+            usernames.append(args[i + 1])
+            i += 2
+        else:
+            raise ValueError(f"Unknown option: {args[i]}")
+    return name, usernames
+
+def main():
+    if len(sys.argv) < 3:
+        show_help()
+        return 1
+
+    command = sys.argv[1].lower()
+    app = create_app()
+    with app.app_context():
+        started = time.monotonic()
+        try:
+            if command == "dump" and len(sys.argv) == 4:
+                project = find_project(sys.argv[2])
+                if not project:
+                    print(f"❌ Project not found: {sys.argv[2]}")
+                    return 1
+                print(f"\n🔄 Dumping project '{project.name}'...")
+                manifest = dump_project(project.id, sys.argv[3])
+                for table_name, table in manifest['tables'].items():
+                    print(f"   {table_name}: {table['rows']} rows")
+                print(f"✅ Archive written to {sys.argv[3]} in {time.monotonic() - started:.1f}s")
+
+            elif command == "restore":
+                name, usernames = parse_restore_options(sys.argv[3:])
+                user_ids = []
+                for username in usernames:
+                    user = User.query.filter_by(username=username).first()
+                    if not user:
+                        print(f"❌ User not found: {username}")
+                        return 1
+                    user_ids.append(user.id)
+                db.session.remove()
+                print(f"\n🔄 Restoring {sys.argv[2]}...")
+                project_id = restore_project(sys.argv[2], name=name, grant_user_ids=user_ids)
+                print(f"✅ Restored as project {project_id} in {time.monotonic() - started:.1f}s")
+
+            else:
+                print(f"❌ Unknown command or wrong arguments: {' '.join(sys.argv[1:])}")
+                show_help()
+                return 1
+        except Exception as e:
+            print(f"❌ {command.capitalize()} failed!")
+            print(f"Error: {e}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
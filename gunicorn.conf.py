@@ -0,0 +1,74 @@
+"""Gunicorn settings for production serving.
+
+    gunicorn -c gunicorn.conf.py app.app:app
+
+Every value can be overridden from the environment (see env.example).
+``kill -HUP <master pid>`` replaces the workers gracefully; with
+``GUNICORN_PRELOAD=1`` the master keeps the loaded code, so restart the
+container to deploy new code.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Selects ProductionConfig unless APP_CONFIG is set explicitly
+os.environ.setdefault('APP_CONFIG', 'production')
+
+# Workers share their request metrics through this directory (see app.metrics)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'reqmng-metrics'))
+
+bind = f"{os.environ.get('FLASK_HOST', '0.0.0.0')}:{os.environ.get('FLASK_PORT', '5000')}"
+
+# Processes x threads per process handle requests concurrently
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the application once in the master, before forking workers
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() == '1'
+
+# Recycle each worker after this many requests (jittered so they don't restart together)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Totals of a previous server run must not be added to this one's
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+
+
+def post_fork(server, worker):
+    from app import db
+    from app.app import app, start_background_workers
+
+    # Pooled connections opened by the master while preloading must not be shared
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    start_background_workers()
+
+
+def worker_exit(server, worker):
+    from app import metrics
+    from app.app import app
+
+    # Final totals for child_exit to archive
+    if app.config['METRICS_ENABLED']:
+        metrics.write_snapshot(os.environ['METRICS_DIR'])
+
+
+def child_exit(server, worker):
+    from app import metrics
+
+    # Runs in the master: fold the exited worker's metrics file into the archive
+    metrics.archive_process(os.environ['METRICS_DIR'], worker.pid)
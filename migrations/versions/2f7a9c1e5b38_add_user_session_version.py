@@ -0,0 +1,28 @@
+"""add_user_session_version
+
+Revision ID: 2f7a9c1e5b38
+Revises: 5e9d1c4b8a20
+Create Date: 2026-10-19 19:37:44.218306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7a9c1e5b38'
+down_revision: Union[str, Sequence[str], None] = '5e9d1c4b8a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('session_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'session_version')
@@ -0,0 +1,34 @@
+"""add_suspect_flag_to_requirement_links
+
+Revision ID: 3f9c2e1b7d4a
+Revises: 5a76c0a0a02e
+Create Date: 2026-10-19 09:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2e1b7d4a'
+down_revision: Union[str, Sequence[str], None] = '5a76c0a0a02e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('requirement_links', sa.Column('suspect', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('requirement_links', sa.Column('suspect_since', sa.DateTime(), nullable=True))
+    # Partial index keeps the "list suspects" query cheap; most links are not suspect
+    op.create_index('ix_requirement_links_suspect', 'requirement_links', ['child_id'], unique=False,
+                    postgresql_where=sa.text('suspect'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_requirement_links_suspect', table_name='requirement_links')
+    op.drop_column('requirement_links', 'suspect_since')
+    op.drop_column('requirement_links', 'suspect')
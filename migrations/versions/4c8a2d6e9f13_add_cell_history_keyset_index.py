@@ -0,0 +1,34 @@
+"""add_cell_history_keyset_index
+
+Revision ID: 4c8a2d6e9f13
+Revises: b7e3f1a9c5d2
+Create Date: 2026-10-19 15:02:11.874301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8a2d6e9f13'
+down_revision: Union[str, Sequence[str], None] = 'b7e3f1a9c5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_cell_history_requirement_changed_at', 'cell_history',
+        ['requirement_id', sa.text('changed_at DESC'), sa.text('id DESC')], unique=False
+    )
+    # The composite index serves every lookup by requirement_id alone as well
+    op.drop_index(op.f('ix_cell_history_requirement_id'), table_name='cell_history', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_cell_history_requirement_id'), 'cell_history', ['requirement_id'], unique=False)
+    op.drop_index('ix_cell_history_requirement_changed_at', table_name='cell_history')
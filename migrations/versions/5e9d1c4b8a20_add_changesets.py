@@ -0,0 +1,54 @@
+"""add_changesets
+
+Revision ID: 5e9d1c4b8a20
+Revises: c3b6e0f4d817
+Create Date: 2026-10-19 18:52:09.407731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9d1c4b8a20'
+down_revision: Union[str, Sequence[str], None] = 'c3b6e0f4d817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'changesets',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('operation', sa.String(length=50), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.String(length=100), nullable=True),
+        sa.Column('reverted_at', sa.DateTime(), nullable=True),
+        sa.Column('reverted_by', sa.String(length=100), nullable=True),
+        sa.Column('revert_changeset_id', sa.String(length=36), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['revert_changeset_id'], ['changesets.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_changesets_project_created_at', 'changesets', ['project_id', sa.text('created_at DESC')], unique=False
+    )
+    op.add_column('cell_history', sa.Column('changeset_id', sa.String(length=36), nullable=True))
+    op.create_foreign_key(
+        'cell_history_changeset_id_fkey', 'cell_history', 'changesets', ['changeset_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_cell_history_changeset_id'), 'cell_history', ['changeset_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_cell_history_changeset_id'), table_name='cell_history')
+    op.drop_constraint('cell_history_changeset_id_fkey', 'cell_history', type_='foreignkey')
+    op.drop_column('cell_history', 'changeset_id')
+    op.drop_index('ix_changesets_project_created_at', table_name='changesets')
+    op.drop_table('changesets')
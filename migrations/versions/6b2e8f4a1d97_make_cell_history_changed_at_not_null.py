@@ -0,0 +1,38 @@
+"""make_cell_history_changed_at_not_null
+
+Revision ID: 6b2e8f4a1d97
+Revises: 2f7a9c1e5b38
+Create Date: 2026-10-19 21:12:05.530417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b2e8f4a1d97'
+down_revision: Union[str, Sequence[str], None] = '2f7a9c1e5b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset cursors and the (changed_at, id) ordering need a time on every entry.
+    # Undated entries get their changeset's time, else their requirement's creation,
+    # else the epoch, so they sort as the oldest entries.
+    op.execute(
+        "UPDATE cell_history h SET changed_at = COALESCE("
+        "(SELECT c.created_at FROM changesets c WHERE c.id = h.changeset_id), "
+        "(SELECT r.created_at FROM requirements r WHERE r.id = h.requirement_id), "
+        "TIMESTAMP '1970-01-01 00:00:00') "
+        "WHERE h.changed_at IS NULL"
+    )
+    op.alter_column('cell_history', 'changed_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('cell_history', 'changed_at', existing_type=sa.DateTime(), nullable=True)
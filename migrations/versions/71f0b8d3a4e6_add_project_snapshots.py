@@ -0,0 +1,40 @@
+"""add_project_snapshots
+
+Revision ID: 71f0b8d3a4e6
+Revises: 9a5c3e7f2b64
+Create Date: 2026-10-19 17:15:42.390517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '71f0b8d3a4e6'
+down_revision: Union[str, Sequence[str], None] = '9a5c3e7f2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'project_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('taken_at', sa.DateTime(), nullable=False),
+        sa.Column('data_version', sa.Integer(), nullable=False),
+        sa.Column('requirements_count', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_project_snapshots_project_taken_at', 'project_snapshots', ['project_id', 'taken_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_project_snapshots_project_taken_at', table_name='project_snapshots')
+    op.drop_table('project_snapshots')
@@ -0,0 +1,28 @@
+"""add_project_data_version
+
+Revision ID: 8d1e4a6c2b90
+Revises: 3f9c2e1b7d4a
+Create Date: 2026-10-19 10:03:17.240915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1e4a6c2b90'
+down_revision: Union[str, Sequence[str], None] = '3f9c2e1b7d4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'data_version')
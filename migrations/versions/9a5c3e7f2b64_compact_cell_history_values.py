@@ -0,0 +1,113 @@
+"""compact_cell_history_values
+
+Revision ID: 9a5c3e7f2b64
+Revises: e2d94b7a1c58
+Create Date: 2026-10-19 16:32:05.662190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app import history_codec
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a5c3e7f2b64'
+down_revision: Union[str, Sequence[str], None] = 'e2d94b7a1c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# History rows scanned per batch while re-encoding existing values
+BACKFILL_BATCH_SIZE = 5000
+
+cell_history = sa.table(
+    'cell_history',
+    sa.column('id', sa.Integer),
+    sa.column('old_value', sa.Text),
+    sa.column('new_value', sa.Text),
+    sa.column('value_encoding', sa.String),
+    sa.column('old_value_blob', sa.LargeBinary),
+    sa.column('new_value_blob', sa.LargeBinary),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cell_history', sa.Column('value_encoding', sa.String(length=2), nullable=True))
+    op.add_column('cell_history', sa.Column('old_value_blob', sa.LargeBinary(), nullable=True))
+    op.add_column('cell_history', sa.Column('new_value_blob', sa.LargeBinary(), nullable=True))
+
+    bind = op.get_bind()
+    size = sa.func.coalesce(sa.func.length(cell_history.c.old_value), 0) + \
+        sa.func.coalesce(sa.func.length(cell_history.c.new_value), 0)
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(cell_history.c.id, cell_history.c.old_value, cell_history.c.new_value)
+            .where(
+                cell_history.c.id > last_id,
+                cell_history.c.value_encoding.is_(None),
+                size > history_codec.COMPRESS_THRESHOLD
+            )
+            .order_by(cell_history.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            encoding, old_value, new_value, old_blob, new_blob = history_codec.encode(row.old_value, row.new_value)
+            updates.append({
+                'row_id': row.id, 'encoding': encoding, 'old_value': old_value, 'new_value': new_value,
+                'old_blob': old_blob, 'new_blob': new_blob
+            })
+        bind.execute(
+            cell_history.update()
+            .where(cell_history.c.id == sa.bindparam('row_id'))
+            .values(
+                value_encoding=sa.bindparam('encoding'),
+                old_value=sa.bindparam('old_value'),
+                new_value=sa.bindparam('new_value'),
+                old_value_blob=sa.bindparam('old_blob'),
+                new_value_blob=sa.bindparam('new_blob'),
+            ),
+            updates
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(
+                cell_history.c.id, cell_history.c.value_encoding, cell_history.c.old_value,
+                cell_history.c.new_value, cell_history.c.old_value_blob, cell_history.c.new_value_blob
+            )
+            .where(cell_history.c.id > last_id, cell_history.c.value_encoding.isnot(None))
+            .order_by(cell_history.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            old_value, new_value = history_codec.decode(
+                row.value_encoding, row.old_value, row.new_value, row.old_value_blob, row.new_value_blob
+            )
+            updates.append({'row_id': row.id, 'old_value': old_value, 'new_value': new_value})
+        bind.execute(
+            cell_history.update()
+            .where(cell_history.c.id == sa.bindparam('row_id'))
+            .values(old_value=sa.bindparam('old_value'), new_value=sa.bindparam('new_value')),
+            updates
+        )
+        last_id = rows[-1].id
+
+    op.drop_column('cell_history', 'new_value_blob')
+    op.drop_column('cell_history', 'old_value_blob')
+    op.drop_column('cell_history', 'value_encoding')
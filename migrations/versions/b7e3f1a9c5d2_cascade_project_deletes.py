@@ -0,0 +1,55 @@
+"""cascade_project_deletes
+
+Revision ID: b7e3f1a9c5d2
+Revises: 8d1e4a6c2b90
+Create Date: 2026-10-19 14:21:48.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f1a9c5d2'
+down_revision: Union[str, Sequence[str], None] = '8d1e4a6c2b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, referenced table) of every foreign key that cascades deletes
+CASCADED_FOREIGN_KEYS = [
+    ('user_projects', 'project_id', 'projects'),
+    ('groups', 'project_id', 'projects'),
+    ('groups', 'parent_id', 'groups'),
+    ('requirements', 'project_id', 'projects'),
+    ('requirement_links', 'parent_id', 'requirements'),
+    ('requirement_links', 'child_id', 'requirements'),
+    ('cell_history', 'requirement_id', 'requirements'),
+]
+
+
+def _replace_foreign_key(table, column, referred_table, ondelete):
+    # Existing constraints were created unnamed, so look them up by column
+    inspector = sa.inspect(op.get_bind())
+    for foreign_key in inspector.get_foreign_keys(table):
+        if foreign_key['constrained_columns'] == [column] and foreign_key['name']:
+            op.drop_constraint(foreign_key['name'], table, type_='foreignkey')
+    op.create_foreign_key(
+        f'{table}_{column}_fkey', table, referred_table, [column], ['id'], ondelete=ondelete
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, referred_table in CASCADED_FOREIGN_KEYS:
+        _replace_foreign_key(table, column, referred_table, 'CASCADE')
+    op.add_column('projects', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'deleted_at')
+    for table, column, referred_table in CASCADED_FOREIGN_KEYS:
+        _replace_foreign_key(table, column, referred_table, None)
@@ -0,0 +1,45 @@
+"""add_baselines
+
+Revision ID: c3b6e0f4d817
+Revises: 71f0b8d3a4e6
+Create Date: 2026-10-19 18:04:27.915263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3b6e0f4d817'
+down_revision: Union[str, Sequence[str], None] = '71f0b8d3a4e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'baselines',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('project_id', sa.String(length=36), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.String(length=100), nullable=True),
+        sa.Column('requirements_count', sa.Integer(), nullable=False),
+        sa.Column('links_count', sa.Integer(), nullable=False),
+        sa.Column('requirements_payload', sa.LargeBinary(), nullable=False),
+        sa.Column('links_payload', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('project_id', 'name', name='uq_baselines_project_name')
+    )
+    op.create_index(op.f('ix_baselines_project_id'), 'baselines', ['project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_baselines_project_id'), table_name='baselines')
+    op.drop_table('baselines')
@@ -0,0 +1,61 @@
+"""add_project_id_to_cell_history
+
+Revision ID: e2d94b7a1c58
+Revises: 4c8a2d6e9f13
+Create Date: 2026-10-19 15:47:36.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2d94b7a1c58'
+down_revision: Union[str, Sequence[str], None] = '4c8a2d6e9f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# History rows backfilled per UPDATE, keeping each statement short
+BACKFILL_BATCH_SIZE = 50000
+
+AUDIT_INDEXES = [
+    ('ix_cell_history_project_changed_at', []),
+    ('ix_cell_history_project_user_changed_at', ['changed_by']),
+    ('ix_cell_history_project_field_changed_at', ['field_name']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cell_history', sa.Column('project_id', sa.String(length=36), nullable=True))
+
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text('SELECT max(id) FROM cell_history')).scalar() or 0
+    for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                'UPDATE cell_history h SET project_id = r.project_id FROM requirements r '
+                'WHERE r.id = h.requirement_id AND h.id >= :start AND h.id < :stop'
+            ),
+            {'start': start, 'stop': start + BACKFILL_BATCH_SIZE}
+        )
+
+    op.alter_column('cell_history', 'project_id', nullable=False)
+    op.create_foreign_key(
+        'cell_history_project_id_fkey', 'cell_history', 'projects', ['project_id'], ['id'], ondelete='CASCADE'
+    )
+    for name, columns in AUDIT_INDEXES:
+        op.create_index(
+            name, 'cell_history',
+            ['project_id', *columns, sa.text('changed_at DESC'), sa.text('id DESC')], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in AUDIT_INDEXES:
+        op.drop_index(name, table_name='cell_history')
+    op.drop_constraint('cell_history_project_id_fkey', 'cell_history', type_='foreignkey')
+    op.drop_column('cell_history', 'project_id')
@@ -1,3 +1,16 @@
 #!/bin/sh
 set -e
-exec python -m app.app 
\ No newline at end of file
+
+# Create the schema in an empty database or apply pending migrations first;
+# with RUN_MIGRATIONS=0 (additional replicas) only verify that it is current
+if [ "${RUN_MIGRATIONS:-1}" = "1" ]; then
+    python -m app.schema upgrade
+else
+    python -m app.schema check
+fi
+
+# APP_SERVER=flask runs the single-threaded development server instead
+if [ "${APP_SERVER:-gunicorn}" = "flask" ]; then
+    exec python -m app.app
+fi
+exec gunicorn -c gunicorn.conf.py app.app:app